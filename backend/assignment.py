@@ -0,0 +1,84 @@
+"""Otomatik personel ataması ("fark etmez" randevuları)
+
+Müşteri personel seçmezse hizmeti veren (Staff.services), o gün çalışan
+(Staff.working_days) ve istenen saatte boş olan personeller aday olur.
+İşletmenin o günkü tüm randevuları tek sorguda okunur, adaylar bellekte
+değerlendirilir. Adayların hangi sırayla deneneceğini politika belirler;
+yeni politika POLICIES'e eklenerek takılabilir.
+"""
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo import ReturnDocument
+
+from availability import appointment_interval, busy_intervals, is_free, staff_offers, staff_works_on
+
+STATE_COLLECTION = "assignment_state"
+
+# (adaylar, sıra sayacı) -> denenecek sırayla adaylar
+Policy = Callable[[List[dict], int], List[dict]]
+
+
+def eligible_candidates(
+    staff_list: Iterable[dict],
+    appointments: Iterable[dict],
+    day: date,
+    start: int,
+    end: int,
+    service_id: Optional[str] = None,
+) -> List[dict]:
+    """
+    O gün [start, end) aralığında randevu alabilecek personeller.
+    Her aday için günlük yük de (dolu dakika, randevu sayısı) döner.
+    """
+    by_staff: Dict[str, List[dict]] = {}
+    for a in appointments:
+        if a.get('staff_id'):
+            by_staff.setdefault(a['staff_id'], []).append(a)
+
+    candidates = []
+    for staff in staff_list:
+        if not staff_works_on(staff, day) or not staff_offers(staff, service_id):
+            continue
+        booked = by_staff.get(staff['id'], [])
+        if not is_free(busy_intervals(booked), start, end):
+            continue
+        candidates.append({
+            "staff": staff,
+            "booked_minutes": sum(e - s for s, e in map(appointment_interval, booked)),
+            "appointment_count": len(booked),
+        })
+    return candidates
+
+
+def least_loaded(candidates: List[dict], rotation: int) -> List[dict]:
+    """Günü en boş olan önce (dolu dakika, sonra randevu sayısı); sayaç kullanılmaz"""
+    return sorted(candidates, key=lambda c: (c['booked_minutes'], c['appointment_count'], c['staff']['id']))
+
+
+def round_robin(candidates: List[dict], rotation: int) -> List[dict]:
+    """Personel id sırasında, her atamada bir sonrakinden başlayarak"""
+    ordered = sorted(candidates, key=lambda c: c['staff']['id'])
+    if not ordered:
+        return ordered
+    offset = rotation % len(ordered)
+    return ordered[offset:] + ordered[:offset]
+
+
+POLICIES: Dict[str, Policy] = {
+    "least_loaded": least_loaded,
+    "round_robin": round_robin,
+}
+# Sıra sayacına ihtiyaç duyan politikalar (diğerleri için sayaç okunmaz)
+ROTATING_POLICIES = {"round_robin"}
+
+
+async def next_rotation(db, business_id: str) -> int:
+    """İşletmenin atama sayacını artırıp döndür (tek round trip)"""
+    state = await db[STATE_COLLECTION].find_one_and_update(
+        {"_id": business_id},
+        {"$inc": {"counter": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return state['counter']
@@ -0,0 +1,158 @@
+"""Tamponlu denetim (audit) logu
+
+create_log artık istek içinde insert_one beklemez: kayıt bellekteki
+tampona eklenir, arka plan görevi tamponu her flush_interval saniyede ya
+da batch_size kayda ulaşınca tek insert_many ile yazar. Yazılamayan
+kayıtlar tampona geri konur; tampon max_buffer'ı aşarsa en eski kayıtlar
+düşürülür ve sayılır (log yüzünden bellek sınırsız büyümesin).
+
+Saklama süresi timestamp üzerindeki TTL index'iyle sınırlanır (capped
+koleksiyon yerine TTL: süreye göre siler, belge boyutu değişebilir).
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "logs"
+TTL_INDEX = "timestamp_ttl"
+
+
+class AuditLogWriter:
+    def __init__(self, flush_interval: float = 0.2, batch_size: int = 500, max_buffer: int = 10000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._buffer: Deque[dict] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    def record(
+        self,
+        action: str,
+        user_email: Optional[str] = None,
+        details: Optional[dict] = None,
+        log_type: str = "info",
+        business_id: Optional[str] = None,
+    ) -> dict:
+        """Kaydı tampona ekle (beklemez); tampon dolduysa yazıcıyı uyandır"""
+        details = details or {}
+        entry = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc),
+            "action": action,
+            "user_email": user_email,
+            # Filtrelenebilsin diye details'taki işletme üst seviyeye de yazılır
+            "business_id": business_id or details.get("business_id"),
+            "details": details,
+            "type": log_type
+        }
+        self._append(entry)
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return entry
+
+    def _append(self, entry: dict, left: bool = False):
+        if left:
+            self._buffer.appendleft(entry)
+        else:
+            self._buffer.append(entry)
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self, db) -> int:
+        """Tampondakileri batch_size'lık insert_many'lerle yaz"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            written = 0
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                try:
+                    await db[COLLECTION].insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    # Tekrar eden id dışındaki hatalarda kayıt geri konur
+                    failed = {
+                        error['index'] for error in e.details.get('writeErrors', []) if error.get('code') != 11000
+                    }
+                    written += len(batch) - len(e.details.get('writeErrors', []))
+                    for index in sorted(failed, reverse=True):
+                        self._append(batch[index], left=True)
+                    break
+                except Exception as e:
+                    logger.warning(f"Loglar yazılamadı: {str(e)}")
+                    for entry in reversed(batch):
+                        self._append(entry, left=True)
+                    break
+                written += len(batch)
+            self.written += written
+            self.flushes += 1
+            return written
+
+    def start(self, db):
+        # Event ve Lock çalışan event loop'a bağlanır, bu yüzden burada oluşturulur
+        self._db = db
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._db is not None:
+            await self.flush(self._db)
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._buffer:
+                await self.flush(self._db)
+
+    def metrics(self) -> dict:
+        return {
+            "pending": self.pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+
+async def ensure_retention(db, retention_days: float) -> None:
+    """
+    timestamp üzerinde TTL index'i; süre değiştiyse collMod ile güncellenir.
+    retention_days <= 0 ise loglar silinmez.
+    """
+    if retention_days <= 0:
+        return
+    seconds = int(retention_days * 86400)
+    existing = (await db[COLLECTION].index_information()).get(TTL_INDEX)
+    try:
+        if existing is None:
+            await db[COLLECTION].create_index([("timestamp", ASCENDING)], name=TTL_INDEX, expireAfterSeconds=seconds)
+        elif existing.get("expireAfterSeconds") != seconds:
+            await db.command("collMod", COLLECTION, index={"name": TTL_INDEX, "expireAfterSeconds": seconds})
+    except OperationFailure as e:
+        logger.error(f"Log saklama süresi ayarlanamadı: {str(e)}")
@@ -0,0 +1,132 @@
+"""Kimlik doğrulama önbelleği
+
+PrincipalCache: token'daki `sub` (kullanıcı id) -> kullanıcı dokümanı,
+TTL ve boyut sınırlı (LRU). Kullanıcıyı değiştiren uçlar invalidate eder.
+
+LastLoginTracker: last_login her istekte yazılmaz; bellekte biriktirilir,
+sadece kayıtlı değer `resolution` süresinden eskiyse yazılacak olarak
+işaretlenir ve arka planda toplu (bulk_write) yazılır. Son yazma zamanları
+yazma sırasıyla tutulur; `resolution`'dan eski kayıtlar artık bir şey
+engellemediği için her yazmada baştan atılır (boyut da max_size ile sınırlı).
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from pymongo import UpdateOne
+
+from timefields import as_utc
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float = 60.0, max_size: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= self.clock():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def set(self, user_id: str, user: dict):
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[user_id] = (self.clock() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+    def invalidate_business(self, business_id: str):
+        """Bir işletmeye bağlı tüm kullanıcıları önbellekten çıkar"""
+        stale = [uid for uid, (_, user) in self._entries.items() if user.get('business_id') == business_id]
+        for user_id in stale:
+            del self._entries[user_id]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class LastLoginTracker:
+    def __init__(self, resolution_minutes: float = 5.0, flush_interval: float = 10.0, max_size: int = 100000):
+        self.resolution = timedelta(minutes=resolution_minutes)
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._seen: "OrderedDict[str, datetime]" = OrderedDict()
+        self._pending: Dict[str, datetime] = {}
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self, user_id: str, stored_last_login=None, now: Optional[datetime] = None):
+        """Kullanıcı aktivitesini kaydet; gerekiyorsa yazılmak üzere işaretle"""
+        now = now or datetime.now(timezone.utc)
+        previous = self._seen.get(user_id)
+        if previous is None and stored_last_login:
+            previous = as_utc(stored_last_login)
+        if previous is not None and now - previous < self.resolution:
+            return
+        self._seen[user_id] = now
+        self._seen.move_to_end(user_id)
+        self._pending[user_id] = now
+        self._evict(now)
+
+    def _evict(self, now: datetime):
+        while self._seen:
+            user_id, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.resolution and len(self._seen) <= self.max_size:
+                break
+            del self._seen[user_id]
+
+    async def flush(self, db) -> int:
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne({"id": user_id}, {"$set": {"last_login": ts}})
+            for user_id, ts in pending.items()
+        ]
+        try:
+            await db.users.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"last_login yazılamadı: {str(e)}")
+            for user_id, ts in pending.items():
+                self._pending.setdefault(user_id, ts)
+            return 0
+        return len(operations)
+
+    def start(self, db):
+        self._db = db
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._db is not None:
+            await self.flush(self._db)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush(self._db)
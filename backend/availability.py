@@ -0,0 +1,210 @@
+"""Müsaitlik motoru
+
+Çalışma saatleri, personelin çalışma günleri ve mevcut (iptal edilmemiş)
+randevulardan boş başlangıç saatlerini hesaplar. Dolu aralıklar bir kez
+sıralanıp birleştirilir, aday saatler tek geçişte (sweep) taranır.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SLOT_STEP_MINUTES = 30
+DEFAULT_OPEN = "09:00"
+DEFAULT_CLOSE = "18:30"
+MAX_RANGE_DAYS = 31
+MAX_DURATION_MINUTES = 24 * 60
+
+Interval = Tuple[int, int]
+
+
+def time_to_minutes(time_str: str) -> int:
+    """Saat string'ini dakikaya çevir (örn: '13:30' -> 810)"""
+    hours, minutes = map(int, time_str.split(':'))
+    return hours * 60 + minutes
+
+
+def minutes_to_time(minutes: int) -> str:
+    """Dakikayı saat string'ine çevir (örn: 810 -> '13:30')"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def js_weekday(day: date) -> int:
+    """Frontend'deki getDay() ile aynı numaralandırma (Pazar=0, Pazartesi=1 ...)"""
+    return day.isoweekday() % 7
+
+
+def parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def date_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def day_window(working_hours: Optional[dict], day: date) -> Optional[Interval]:
+    """
+    İşletmenin o günkü açılış/kapanış aralığı (dakika)
+    working_hours: {"1": {"open": "09:00", "close": "18:00"}, "0": None, ...}
+    Anahtar getDay() numarası; değer None veya {"closed": true} ise kapalı.
+    Boş sözlük = her gün varsayılan saatler.
+    """
+    if not working_hours:
+        return time_to_minutes(DEFAULT_OPEN), time_to_minutes(DEFAULT_CLOSE)
+
+    key = str(js_weekday(day))
+    if key not in working_hours:
+        return time_to_minutes(DEFAULT_OPEN), time_to_minutes(DEFAULT_CLOSE)
+
+    hours = working_hours[key]
+    if not hours or hours.get('closed'):
+        return None
+
+    start = time_to_minutes(hours.get('open', DEFAULT_OPEN))
+    end = time_to_minutes(hours.get('close', DEFAULT_CLOSE))
+    if end <= start:
+        return None
+    return start, end
+
+
+def appointment_interval(appointment: dict) -> Interval:
+    """Randevunun dakika aralığı; start_minute yoksa (eski kayıt) time_slot'tan hesaplanır"""
+    start = appointment.get('start_minute')
+    if start is None:
+        start = time_to_minutes(appointment['time_slot'])
+        return start, start + int(appointment.get('duration', 0))
+    return start, appointment['end_minute']
+
+
+def busy_intervals(appointments: Iterable[dict]) -> List[Interval]:
+    """Randevuları sıralı ve birleştirilmiş dolu aralıklara çevir"""
+    intervals = sorted(appointment_interval(a) for a in appointments)
+
+    merged: List[Interval] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(
+    window: Interval,
+    busy: List[Interval],
+    duration: int,
+    step: int = SLOT_STEP_MINUTES,
+) -> List[int]:
+    """
+    Pencere içinde `duration` dakikalık hizmetin başlayabileceği saatler.
+    `busy` sıralı ve birleştirilmiş olmalı; her aday için işaretçi sadece ileri gider.
+    """
+    open_at, close_at = window
+    slots = []
+    i = 0
+    start = open_at
+    while start + duration <= close_at:
+        end = start + duration
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        if i == len(busy) or busy[i][0] >= end:
+            slots.append(start)
+        start += step
+    return slots
+
+
+def is_free(busy: List[Interval], start: int, end: int) -> bool:
+    """Sıralı dolu aralıklarda [start, end) boş mu (ikili arama)"""
+    lo, hi = 0, len(busy)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if busy[mid][1] <= start:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo == len(busy) or busy[lo][0] >= end
+
+
+def staff_works_on(staff: dict, day: date) -> bool:
+    return js_weekday(day) in staff.get('working_days', [1, 2, 3, 4, 5])
+
+
+def staff_offers(staff: dict, service_id: Optional[str]) -> bool:
+    """Hizmet listesi boş olan personel tüm hizmetleri verebilir"""
+    services = staff.get('services') or []
+    return not service_id or not services or service_id in services
+
+
+def group_by_staff_day(appointments: Iterable[dict]) -> Dict[Tuple[Optional[str], str], List[dict]]:
+    grouped: Dict[Tuple[Optional[str], str], List[dict]] = {}
+    for a in appointments:
+        grouped.setdefault((a.get('staff_id'), a['appointment_date']), []).append(a)
+    return grouped
+
+
+def compute_availability(
+    business: dict,
+    staff_list: List[dict],
+    appointments: Iterable[dict],
+    days: List[date],
+    duration: int,
+    service_id: Optional[str] = None,
+    step: int = SLOT_STEP_MINUTES,
+) -> List[dict]:
+    """
+    Her gün için boş başlangıç saatleri.
+    staff_list tek kişiyse o personelin, birden fazlaysa en az bir uygun
+    personelin boş olduğu saatler döner. Personeli olmayan işletmede sadece
+    çalışma saatleri dikkate alınır.
+    """
+    grouped = group_by_staff_day(appointments)
+    working_hours = business.get('working_hours') or {}
+    result = []
+
+    for day in days:
+        day_str = day.isoformat()
+        window = day_window(working_hours, day)
+        if window is None:
+            result.append({"date": day_str, "slots": []})
+            continue
+
+        if not staff_list:
+            slots = free_slots(window, [], duration, step)
+        else:
+            available = set()
+            for staff in staff_list:
+                if not staff_works_on(staff, day) or not staff_offers(staff, service_id):
+                    continue
+                busy = busy_intervals(grouped.get((staff['id'], day_str), []))
+                available.update(free_slots(window, busy, duration, step))
+            slots = sorted(available)
+
+        result.append({"date": day_str, "slots": [minutes_to_time(m) for m in slots]})
+
+    return result
+
+
+def availability_by_staff(
+    business: dict,
+    staff_list: List[dict],
+    appointments: Iterable[dict],
+    days: List[date],
+    duration: int,
+    service_id: Optional[str] = None,
+    step: int = SLOT_STEP_MINUTES,
+) -> Dict[str, Dict[str, List[str]]]:
+    """Personel başına {tarih: boş saatler}; boş saati olmayan günler yazılmaz"""
+    appointments = list(appointments)
+    result = {}
+    for staff in staff_list:
+        days_free = compute_availability(business, [staff], appointments, days, duration, service_id, step)
+        result[staff['id']] = {d['date']: d['slots'] for d in days_free if d['slots']}
+    return result
+
+
+def merge_staff_availability(by_staff: Dict[str, Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """En az bir personelin boş olduğu saatler"""
+    merged: Dict[str, set] = {}
+    for days_free in by_staff.values():
+        for day, slots in days_free.items():
+            merged.setdefault(day, set()).update(slots)
+    return {day: sorted(slots) for day, slots in sorted(merged.items())}
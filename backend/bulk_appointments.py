@@ -0,0 +1,177 @@
+"""Toplu randevu içe aktarma ve durum güncelleme
+
+İçe aktarma: NDJSON veya CSV gövdesi satırlara ayrılır, her satır ayrı
+doğrulanır. Çakışmalar personel/gün bazında bellekte (mevcut randevular
++ aynı dosyada daha önce kabul edilen satırlar) kontrol edilir. Geçerli
+satırlar insert_many(ordered=False) ile parçalar halinde yazılır; hatalı
+satırlar diğerlerini durdurmaz, satır numarasıyla raporlanır.
+
+Durum güncelleme: eşleşen randevular tek bulk_write ile güncellenir.
+Her işlem eski durumla koşullanır, arada değişen randevu ezilmez ve
+hata olarak döner.
+"""
+import csv
+import io
+import json
+from typing import Dict, List, Tuple
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from availability import appointment_interval, group_by_staff_day
+from reports import record_status_changes
+from slot_locks import release_appointments, reserve_slot
+
+IMPORT_FORMATS = ("ndjson", "csv")
+APPOINTMENT_STATUSES = ("pending", "confirmed", "completed", "cancelled", "no-show")
+INSERT_CHUNK = 1000
+
+Row = Tuple[int, dict]
+
+
+def row_error(row: int, error: str) -> dict:
+    return {"row": row, "error": error}
+
+
+def valid_time_slot(value: str) -> bool:
+    """'SS:DD' biçiminde geçerli bir saat mi"""
+    parts = value.split(":")
+    return (
+        len(parts) == 2 and all(len(part) == 2 and part.isdigit() for part in parts)
+        and int(parts[0]) < 24 and int(parts[1]) < 60
+    )
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def parse_rows(body: bytes, fmt: str) -> Tuple[List[Row], List[dict]]:
+    """
+    Gövdeyi (satır numarası, alanlar) listesine çevir. Boş satırlar atlanır;
+    CSV'de boş hücreler alan hiç yokmuş gibi davranır.
+    """
+    text = body.decode("utf-8-sig")
+    rows: List[Row] = []
+    errors: List[dict] = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for record in reader:
+            fields = {k.strip(): v.strip() for k, v in record.items() if k and v is not None and v.strip()}
+            if fields:
+                rows.append((reader.line_num, fields))
+        return rows, errors
+
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            errors.append(row_error(line_number, "Geçersiz JSON"))
+            continue
+        if not isinstance(fields, dict):
+            errors.append(row_error(line_number, "Her satır bir JSON nesnesi olmalı"))
+            continue
+        rows.append((line_number, fields))
+    return rows, errors
+
+
+def check_overlaps(existing: List[dict], candidates: List[Row]) -> Tuple[List[Row], List[dict]]:
+    """
+    Adayları sırayla personel/gün bazında dolu aralıklarla karşılaştır.
+    Kabul edilen aday, sonraki satırlar için dolu sayılır. İptal edilmiş
+    ya da personelsiz randevular yer tutmaz.
+    """
+    taken: Dict[tuple, List[Tuple[int, int]]] = {
+        key: [appointment_interval(a) for a in items]
+        for key, items in group_by_staff_day(existing).items()
+    }
+    accepted: List[Row] = []
+    errors: List[dict] = []
+    for row, doc in candidates:
+        if not doc.get('staff_id') or doc.get('status') == "cancelled":
+            accepted.append((row, doc))
+            continue
+        start, end = appointment_interval(doc)
+        intervals = taken.setdefault((doc['staff_id'], doc['appointment_date']), [])
+        if any(busy_start < end and busy_end > start for busy_start, busy_end in intervals):
+            errors.append(row_error(row, f"{doc['appointment_date']} {doc['time_slot']} saatinde personelin başka randevusu var"))
+            continue
+        intervals.append((start, end))
+        accepted.append((row, doc))
+    return accepted, errors
+
+
+async def insert_in_chunks(db, rows: List[Row], chunk_size: int = INSERT_CHUNK) -> Tuple[List[dict], List[dict]]:
+    """insert_many(ordered=False); yazılamayan dokümanlar satır hatası olur"""
+    inserted: List[dict] = []
+    errors: List[dict] = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        failed: Dict[int, str] = {}
+        try:
+            await db.appointments.insert_many([doc for _, doc in chunk], ordered=False)
+        except BulkWriteError as e:
+            failed = {error['index']: error.get('errmsg', 'Yazılamadı') for error in e.details.get('writeErrors', [])}
+        for index, (row, doc) in enumerate(chunk):
+            doc.pop('_id', None)
+            if index in failed:
+                errors.append(row_error(row, failed[index]))
+            else:
+                inserted.append(doc)
+    return inserted, errors
+
+
+async def apply_status_changes(db, appointments: List[dict], status: str) -> Tuple[List[dict], List[dict]]:
+    """
+    Randevuların durumunu tek bulk_write ile değiştir.
+    (değişen randevular [eski durumlarıyla], hatalar) döndürür.
+    """
+    errors: List[dict] = []
+    pending: List[dict] = []
+    for appointment in appointments:
+        old_status = appointment.get('status', 'confirmed')
+        if old_status == status:
+            continue
+        # İptal edilmiş randevu tekrar aktif ediliyorsa slot yeniden kilitlenmeli
+        if appointment.get('staff_id') and old_status == "cancelled":
+            conflict = await reserve_slot(
+                db, appointment['business_id'], appointment['staff_id'], appointment['appointment_date'],
+                appointment['id'], appointment['time_slot'], appointment['duration']
+            )
+            if conflict:
+                errors.append({"id": appointment['id'], "error": f"{conflict['time_slot']} saatinde çakışan randevu var"})
+                continue
+        pending.append(appointment)
+
+    if not pending:
+        return [], errors
+
+    result = await db.appointments.bulk_write([
+        UpdateOne({"id": a['id'], "status": a.get('status', 'confirmed')}, {"$set": {"status": status}})
+        for a in pending
+    ], ordered=False)
+
+    changed = pending
+    if result.modified_count < len(pending):
+        # Arada başka bir istek durumu değiştirmiş; hangileri yazıldı bak
+        current = {
+            a['id']: a.get('status')
+            async for a in db.appointments.find({"id": {"$in": [a['id'] for a in pending]}}, {"_id": 0, "id": 1, "status": 1})
+        }
+        changed = [a for a in pending if current.get(a['id']) == status]
+        lost = [a for a in pending if current.get(a['id']) != status]
+        errors.extend({"id": a['id'], "error": "Randevu bu sırada değiştirildi"} for a in lost)
+        # Yeniden kilitlenip yazılamayan (hâlâ iptal) randevuların kilidi bırakılır
+        await release_appointments(db, [
+            a for a in lost if a.get('status') == "cancelled" and current.get(a['id']) == "cancelled"
+        ])
+
+    if status == "cancelled":
+        await release_appointments(db, [a for a in changed if a.get('status') != "cancelled"])
+    await record_status_changes(db, [(a, a.get('status', 'confirmed'), status) for a in changed])
+    return changed, errors
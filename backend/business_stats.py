@@ -0,0 +1,91 @@
+"""Süper admin işletme listesi
+
+Her işletme için ayrı ayrı count_documents çağırmak yerine personel,
+hizmet ve randevu sayıları koleksiyon başına tek bir $group ile
+hesaplanır ve bellekte birleştirilir. Liste sunucu tarafında aranır,
+sıralanır ve sayfalanır; sayılar sadece sayfadaki işletmeler için okunur
+(sayıya göre sıralamada sıralanan sayı tüm eşleşenler için hesaplanır).
+"""
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
+
+COUNT_COLLECTIONS = {
+    "staff_count": "staff",
+    "service_count": "services",
+    "appointment_count": "appointments",
+}
+# businesses dokümanındaki alanlar; SORT_FIELDS bunlara sayım alanlarını ekler
+DOCUMENT_SORT_FIELDS = ("name", "owner_email", "created_at", "last_login", "subscription_expires")
+SORT_FIELDS = DOCUMENT_SORT_FIELDS + tuple(COUNT_COLLECTIONS)
+
+LIST_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "slug": 1, "owner_email": 1, "created_at": 1, "last_login": 1,
+    "subscription_plan": 1, "subscription_expires": 1, "is_active": 1,
+}
+
+
+async def count_by_business(db, collection: str, business_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """business_id başına doküman sayısı (business_ids verilirse sadece onlar)"""
+    pipeline = []
+    if business_ids is not None:
+        pipeline.append({"$match": {"business_id": {"$in": business_ids}}})
+    pipeline.append({"$group": {"_id": "$business_id", "count": {"$sum": 1}}})
+    return {row['_id']: row['count'] async for row in db[collection].aggregate(pipeline)}
+
+
+async def counts_for(db, business_ids: List[str]) -> Dict[str, Dict[str, int]]:
+    """{alan: {business_id: sayı}}; üç sayım eşzamanlı çalışır"""
+    results = await asyncio.gather(*(
+        count_by_business(db, collection, business_ids) for collection in COUNT_COLLECTIONS.values()
+    ))
+    return dict(zip(COUNT_COLLECTIONS, results))
+
+
+def search_filter(search: Optional[str]) -> dict:
+    if not search:
+        return {}
+    pattern = {"$regex": re.escape(search.strip()), "$options": "i"}
+    return {"$or": [{"name": pattern}, {"slug": pattern}, {"owner_email": pattern}]}
+
+
+async def list_businesses(
+    db,
+    search: Optional[str] = None,
+    sort: str = "created_at",
+    descending: bool = True,
+    page: int = 1,
+    limit: int = 50,
+) -> Tuple[List[dict], int]:
+    """Sayfadaki işletme dokümanları (sayı alanları eklenmiş) ve toplam eşleşen sayısı"""
+    if sort not in SORT_FIELDS:
+        raise ValueError(sort)
+    query = search_filter(search)
+    skip = (page - 1) * limit
+    direction = -1 if descending else 1
+
+    if sort in DOCUMENT_SORT_FIELDS:
+        businesses, total = await asyncio.gather(
+            db.businesses.find(query, LIST_PROJECTION)
+            .sort([(sort, direction), ("id", 1)]).skip(skip).limit(limit).to_list(limit),
+            db.businesses.count_documents(query)
+        )
+    else:
+        # Sayıya göre sıralama: sadece id'ler ve sıralanan sayı tüm eşleşenler için okunur
+        ids = [b['id'] for b in await db.businesses.find(query, {"_id": 0, "id": 1}).to_list(None)]
+        total = len(ids)
+        sort_counts = await count_by_business(db, COUNT_COLLECTIONS[sort], ids if query else None)
+        ids.sort(key=lambda business_id: business_id)
+        ids.sort(key=lambda business_id: sort_counts.get(business_id, 0), reverse=descending)
+        page_ids = ids[skip:skip + limit]
+        by_id = {
+            b['id']: b
+            for b in await db.businesses.find({"id": {"$in": page_ids}}, LIST_PROJECTION).to_list(None)
+        }
+        businesses = [by_id[business_id] for business_id in page_ids if business_id in by_id]
+
+    counts = await counts_for(db, [b['id'] for b in businesses])
+    for b in businesses:
+        for field, by_business in counts.items():
+            b[field] = by_business.get(b['id'], 0)
+    return businesses, total
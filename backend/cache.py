@@ -0,0 +1,171 @@
+"""Herkese açık okuma önbelleği
+
+Booking sayfasının okuduğu işletme / hizmet / personel yanıtları JSON'a
+serileştirilmiş halde ETag'leriyle birlikte saklanır. İsabetli istek ne
+Mongo'ya gider ne de Pydantic modeli kurar. Aynı anahtar için eşzamanlı
+kaçırmalar tek bir yüklemede birleştirilir.
+
+Backend'ler:
+    LocalBackend: süreç içi LRU + TTL (varsayılan)
+    RedisBackend: redis.asyncio uyumlu istemci (CACHE_REDIS_URL), worker'lar arası ortak
+
+Yazma yapan uçlar ilgili anahtarları açıkça invalidate eder. Tek süreçli
+backend'de diğer worker'lar değişikliği en geç TTL sonunda görür.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+Entry = Tuple[str, bytes]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class LocalBackend:
+    def __init__(self, max_size: int = 5000, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Entry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: Entry, ttl: float):
+        self._entries[key] = (self.clock() + ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    async def close(self):
+        pass
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Değer: etag + '\\n' + gövde. TTL Redis'in kendi süre aşımıyla uygulanır."""
+
+    def __init__(self, client, prefix: str = "erandevu:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Entry]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        return etag.decode(), body
+
+    async def set(self, key: str, entry: Entry, ttl: float):
+        etag, body = entry
+        await self.client.set(self.prefix + key, etag.encode() + b"\n" + body, ex=max(1, int(ttl)))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self):
+        close = getattr(self.client, "aclose", None) or self.client.close
+        await close()
+
+
+class ReadThroughCache:
+    def __init__(self, backend, ttl_seconds: float = 60.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Yükleme sürerken invalidate gelirse eski sonuç önbelleğe yazılmasın
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[Entry]:
+        """
+        Önbellekteki (etag, gövde) çiftini döndür; yoksa loader ile yükle.
+        loader None döndürürse (bulunamadı) sonuç önbelleğe alınmaz.
+        """
+        if self.ttl_seconds > 0:
+            entry = await self.backend.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+        self.misses += 1
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        epoch = self._epoch
+        try:
+            body = await loader()
+            entry = (make_etag(body), body) if body is not None else None
+            if entry is not None and self.ttl_seconds > 0 and epoch == self._epoch:
+                await self.backend.set(key, entry, self.ttl_seconds)
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Bekleyen yoksa "exception was never retrieved" uyarısı çıkmasın
+            future.exception()
+            raise
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+    async def invalidate(self, *keys: str):
+        self._epoch += 1
+        for key in keys:
+            self._loading.pop(key, None)
+        await self.backend.delete(*keys)
+
+    async def clear(self):
+        self._epoch += 1
+        self._loading.clear()
+        await self.backend.clear()
+
+    def metrics(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,186 @@
+"""Randevu olayları (server push)
+
+Panel, randevu listesini ve bildirimleri periyodik olarak çekmek yerine
+işletme bazlı bir SSE kanalını dinler. create_appointment ve
+update_appointment_status olayları EventBroker'a yayınlar. Broker bunları
+o işletmeye abone olan bağlantılara dağıtır; boşta bekleyen panel
+veritabanına hiç sorgu atmaz.
+
+source="local": süreç içi dağıtım (tek worker).
+source="changestream": olaylar appointments koleksiyonunun change
+stream'inden okunur, böylece her worker tüm yazmaları görür (replica set gerekir).
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_CREATED = "appointment.created"
+APPOINTMENT_STATUS = "appointment.status"
+RESYNC = "resync"
+
+MOVE_FIELDS = {"appointment_date", "time_slot", "start_minute", "end_minute"}
+
+_CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, broker: "EventBroker", business_id: str, max_queue: int):
+        self.broker = broker
+        self.business_id = business_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def put(self, event):
+        """
+        Kuyruk doluysa (yavaş istemci) bekleyen olaylar atılır ve yerine tek bir
+        resync olayı konur; istemci listeyi baştan yükler.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.broker.dropped += 1
+            self.queue.put_nowait(event if event is _CLOSED else {"type": RESYNC, "data": {}})
+
+    async def get(self, timeout: float):
+        """Sıradaki olay; timeout dolarsa None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(self, source: str = "local", max_queue: int = 100, retry_seconds: float = 5.0):
+        self.source = source
+        self.max_queue = max_queue
+        self.retry_seconds = retry_seconds
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, business_id: str) -> Subscription:
+        subscription = Subscription(self, business_id, self.max_queue)
+        self._subscribers.setdefault(business_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.business_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.business_id]
+
+    def subscriber_count(self, business_id: Optional[str] = None) -> int:
+        if business_id is not None:
+            return len(self._subscribers.get(business_id, ()))
+        return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, business_id: str, event_type: str, data: dict):
+        """
+        Yazma yapan handler'lar çağırır. changestream modunda randevu olayları
+        zaten stream'den geleceği için burada dağıtılmaz (çift teslim olmasın);
+        stream'den türetilemeyen RESYNC ise yine de dağıtılır.
+        """
+        if self.source == "changestream" and event_type != RESYNC:
+            return
+        self.dispatch(business_id, {"type": event_type, "data": data})
+
+    def dispatch(self, business_id: str, event: dict):
+        self.published += 1
+        for subscription in list(self._subscribers.get(business_id, ())):
+            subscription.put(event)
+            self.delivered += 1
+
+    def start(self, db):
+        if self.source == "changestream":
+            self._task = asyncio.create_task(self._watch(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Açık SSE bağlantıları kapansın ki shutdown beklemesin
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.put(_CLOSED)
+
+    async def _watch(self, db):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        resume_token = None
+        while True:
+            try:
+                async with db.appointments.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        business_id, event = event_from_change(change)
+                        if event:
+                            self.dispatch(business_id, event)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.warning(f"Randevu change stream hatası, yeniden bağlanılıyor: {str(e)}")
+                await asyncio.sleep(self.retry_seconds)
+
+
+def event_from_change(change: dict):
+    """Change stream kaydını (business_id, olay) çiftine çevir"""
+    document = dict(change.get("fullDocument") or {})
+    document.pop("_id", None)
+    business_id = document.get("business_id")
+    if not business_id:
+        return None, None
+
+    if change["operationType"] == "insert":
+        return business_id, {"type": APPOINTMENT_CREATED, "data": document}
+
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    if change["operationType"] == "replace" or "status" in updated:
+        return business_id, {"type": APPOINTMENT_STATUS, "data": {"id": document["id"], "status": document["status"]}}
+    # Tarih/saat değişikliği (oluşum taşıma): panel listeyi baştan yükler
+    if MOVE_FIELDS & updated.keys():
+        return business_id, {"type": RESYNC, "data": {}}
+    return None, None
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], default=_json_default)}\n\n"
+
+
+async def sse_stream(
+    subscription: Subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat_seconds: float = 15.0,
+):
+    """
+    SSE gövdesi. Olay yoksa heartbeat yorumu gönderilir; proxy'ler bağlantıyı
+    kapatmaz ve kopan istemci fark edilir.
+    """
+    try:
+        yield "retry: 5000\n\n"
+        while not await is_disconnected():
+            event = await subscription.get(heartbeat_seconds)
+            if event is _CLOSED:
+                break
+            yield format_sse(event) if event else ": ping\n\n"
+    finally:
+        subscription.close()
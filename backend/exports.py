@@ -0,0 +1,121 @@
+"""Akışlı (streaming) dışa aktarım
+
+Randevular Motor cursor'ından batch_size'lık partilerle okunur ve CSV ya
+da NDJSON satırları olarak üretilir; satırlar küçük parçalar halinde
+StreamingResponse'a verilir. Bellekte hiçbir zaman tüm sonuç tutulmaz,
+milyonlarca satırlık bir aktarım da sabit bellekle çalışır. İstenirse
+çıktı akış sırasında gzip ile sıkıştırılır.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+APPOINTMENT_FIELDS = (
+    "id", "business_id", "appointment_date", "time_slot", "duration", "status",
+    "customer_name", "customer_phone", "service_id", "service_name",
+    "staff_id", "staff_name", "price", "notes", "created_at",
+)
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+# Bu kadar bayt birikince parça gönderilir (satır başına yield etmemek için)
+FLUSH_BYTES = 64 * 1024
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+async def csv_chunks(rows: AsyncIterator[dict], fields: Iterable[str]) -> AsyncIterator[bytes]:
+    fields = tuple(fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM: Excel Türkçe karakterleri doğru açsın
+    buffer.write("\ufeff")
+    writer.writerow(fields)
+    async for row in rows:
+        writer.writerow([_cell(row.get(field)) for field in fields])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+async def ndjson_chunks(rows: AsyncIterator[dict], fields: Iterable[str]) -> AsyncIterator[bytes]:
+    fields = tuple(fields)
+    parts, size = [], 0
+    async for row in rows:
+        line = json.dumps(
+            {field: row.get(field) for field in fields}, ensure_ascii=False, default=_json_default
+        ) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def iterate_cursor(cursor) -> AsyncIterator[dict]:
+    """İstemci bağlantıyı keserse (generator kapatılırsa) cursor sunucuda da kapatılır"""
+    try:
+        async for row in cursor:
+            yield row
+    finally:
+        close = cursor.close()
+        if close is not None and hasattr(close, "__await__"):
+            await close
+
+
+async def export_stream(
+    cursor, fmt: str, fields: Iterable[str] = APPOINTMENT_FIELDS, compress: bool = False
+) -> AsyncIterator[bytes]:
+    rows = iterate_cursor(cursor)
+    chunks = (csv_chunks if fmt == "csv" else ndjson_chunks)(rows, fields)
+    stream = gzip_chunks(chunks) if compress else chunks
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        # İç generator'lar dış generator kapatılınca kendiliğinden kapanmaz
+        for generator in (stream, chunks, rows):
+            await generator.aclose()
+
+
+def export_headers(fmt: str, name: str, compress: bool = False) -> dict:
+    _, extension = FORMATS[fmt]
+    filename = f"{name}.{extension}" + (".gz" if compress else "")
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def media_type(fmt: str, compress: bool = False) -> str:
+    return "application/gzip" if compress else FORMATS[fmt][0]
+
+
+def clamp_batch_size(batch_size: Optional[int]) -> int:
+    return max(1, min(batch_size or DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE))
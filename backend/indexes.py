@@ -0,0 +1,205 @@
+"""Index yöneticisi
+
+Sıcak sorguların ihtiyaç duyduğu index'ler burada tanımlanır ve startup'ta
+idempotent olarak oluşturulur. QUERY_SHAPES'e kayıtlı her sorgu şekli
+explain() ile kontrol edilir; COLLSCAN'e düşen sorgu strict modda
+uygulamanın açılmasını engeller (INDEX_VERIFY=strict).
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from timefields import since_filter, until_filter
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("business_id", ASCENDING)]),
+    ],
+    "businesses": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("slug", ASCENDING)], unique=True),
+        IndexModel([("is_active", ASCENDING), ("subscription_expires", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "services": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("business_id", ASCENDING)]),
+    ],
+    "staff": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("business_id", ASCENDING)]),
+    ],
+    "appointments": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("business_id", ASCENDING), ("appointment_date", ASCENDING), ("time_slot", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("business_id", ASCENDING), ("staff_id", ASCENDING), ("appointment_date", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("business_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("appointment_date", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("series_id", ASCENDING), ("appointment_date", ASCENDING)]),
+    ],
+    "appointment_series": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("business_id", ASCENDING)]),
+    ],
+    # Saklama süresi (TTL) index'i audit_log.ensure_retention'da; süresi ortam değişkeninden gelir
+    "logs": [
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("type", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("action", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_email", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("business_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "slot_locks": [
+        IndexModel([("staff_id", ASCENDING), ("date", ASCENDING)], unique=True),
+        IndexModel([("business_id", ASCENDING), ("date", ASCENDING)]),
+    ],
+    "report_rollups": [
+        IndexModel([("business_id", ASCENDING), ("dimension", ASCENDING), ("period", ASCENDING), ("key", ASCENDING)], unique=True),
+    ],
+    "report_customers": [
+        IndexModel([("business_id", ASCENDING), ("customer_phone", ASCENDING)], unique=True),
+    ],
+    "notification_outbox": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)]),
+        IndexModel([("lease_token", ASCENDING)], sparse=True),
+    ],
+}
+
+SHAPE_MOMENT = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+# Sıcak yollardaki sorgu şekilleri: (açıklama, koleksiyon, filtre, sıralama)
+QUERY_SHAPES = [
+    ("auth: kullanıcı id", "users", {"id": "x"}, None),
+    ("login: kullanıcı e-posta", "users", {"email": "x@example.com"}, None),
+    ("booking: işletme slug", "businesses", {"slug": "x"}, None),
+    ("işletme id", "businesses", {"id": "x"}, None),
+    ("aktif işletmeler", "businesses", {"is_active": True, **since_filter("subscription_expires", SHAPE_MOMENT)}, None),
+    ("hizmet listesi", "services", {"business_id": "x"}, None),
+    ("personel listesi", "staff", {"business_id": "x"}, None),
+    (
+        "randevu listesi",
+        "appointments",
+        {"business_id": "x", "appointment_date": {"$gte": "2000-01-01", "$lte": "2000-01-31"}},
+        [("appointment_date", -1), ("time_slot", -1), ("id", -1)]
+    ),
+    (
+        "müsaitlik",
+        "appointments",
+        {"business_id": "x", "appointment_date": {"$gte": "2000-01-01", "$lte": "2000-01-31"}, "status": {"$ne": "cancelled"}},
+        None
+    ),
+    (
+        "personel gün randevuları",
+        "appointments",
+        {"business_id": "x", "staff_id": "y", "appointment_date": "2000-01-01", "status": {"$ne": "cancelled"}},
+        None
+    ),
+    (
+        "otomatik atama",
+        "appointments",
+        {"business_id": "x", "appointment_date": "2000-01-01", "status": {"$ne": "cancelled"}},
+        None
+    ),
+    (
+        "bildirimler",
+        "appointments",
+        {"business_id": "x", "status": "confirmed", **since_filter("created_at", SHAPE_MOMENT)},
+        [("created_at", -1)]
+    ),
+    ("bugünkü randevular", "appointments", {"appointment_date": "2000-01-01"}, None),
+    (
+        "aylık gelir",
+        "appointments",
+        {"appointment_date": {"$gte": "2000-01-01", "$lt": "2000-02-01"}, "status": "completed"},
+        None
+    ),
+    (
+        "seri oluşumları",
+        "appointments",
+        {"business_id": "x", "series_id": "y", "appointment_date": {"$gte": "2000-01-01"}},
+        None
+    ),
+    ("son randevular", "appointments", since_filter("created_at", SHAPE_MOMENT), None),
+    ("loglar", "logs", {}, [("timestamp", -1), ("id", -1)]),
+    ("loglar: işlem", "logs", {"action": "login"}, [("timestamp", -1), ("id", -1)]),
+    (
+        "loglar: işletme + zaman",
+        "logs",
+        {"business_id": "x", "timestamp": {"$gte": SHAPE_MOMENT}},
+        [("timestamp", -1), ("id", -1)]
+    ),
+    ("slot kilidi", "slot_locks", {"staff_id": "x", "date": "2000-01-01"}, None),
+    ("slot bitmap'i", "slot_locks", {"business_id": "x", "date": {"$gte": "2000-01-01", "$lte": "2000-01-07"}}, None),
+    ("rapor sayaçları", "report_rollups", {"business_id": "x", "dimension": "staff", "period": "all"}, None),
+    (
+        "outbox",
+        "notification_outbox",
+        {"status": "pending", **until_filter("next_attempt_at", SHAPE_MOMENT)},
+        [("next_attempt_at", 1)]
+    ),
+    ("outbox lease", "notification_outbox", {"lease_token": "x"}, [("next_attempt_at", 1)]),
+]
+
+
+class IndexRegressionError(RuntimeError):
+    pass
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Tanımlı index'leri oluştur (var olanlar için no-op)"""
+    created = {}
+    for collection, models in INDEXES.items():
+        try:
+            created[collection] = await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # Örn. mevcut veride tekrar eden e-posta unique index'i engeller
+            logger.error(f"{collection} index'leri oluşturulamadı: {str(e)}")
+    return created
+
+
+def has_collscan(plan) -> bool:
+    """explain() çıktısında COLLSCAN aşaması var mı (iç içe planlar dahil)"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(has_collscan(item) for item in plan)
+    return False
+
+
+async def explain_query(db, collection: str, query: dict, sort=None) -> dict:
+    find_command = {"find": collection, "filter": query}
+    if sort:
+        find_command["sort"] = dict(sort)
+    result = await db.command({"explain": find_command, "verbosity": "queryPlanner"})
+    return result.get("queryPlanner", result)
+
+
+async def verify_query_plans(db, strict: bool = False) -> List[str]:
+    """
+    Kayıtlı sorgu şekillerinin index kullandığını doğrula.
+    COLLSCAN'e düşenleri döndürür; strict ise IndexRegressionError fırlatır.
+    """
+    regressions = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        planner = await explain_query(db, collection, query, sort)
+        if has_collscan(planner.get("winningPlan", planner)):
+            regressions.append(f"{name} ({collection})")
+
+    for regression in regressions:
+        logger.warning(f"Sorgu index kullanmıyor (COLLSCAN): {regression}")
+
+    if strict and regressions:
+        raise IndexRegressionError(f"COLLSCAN'e düşen sorgular: {', '.join(regressions)}")
+    return regressions
@@ -0,0 +1,286 @@
+"""İstek seviyesinde performans ölçümü ve Prometheus metrikleri
+
+- MetricsMiddleware: route şablonu başına gecikme histogramı, istek sayacı,
+  uçuştaki istek sayısı; eşiği aşan istekler loglanır.
+- MongoCommandMetrics: pymongo CommandListener. Komut başına süre ve sayı;
+  ayrıca o an işlenen isteğin (ContextVar) komut sayısı ve toplam süresi.
+  Motor komutları executor'da context kopyasıyla çalıştırdığı için
+  listener isteğin RequestStats nesnesini görür.
+- observe_whatsapp: gateway çağrılarının süresi ve sonucu.
+
+/metrics çıktısı Prometheus text formatındadır (0.0.4). Harici bağımlılık
+yoktur; sayaçlar executor thread'lerinden de güncellendiği için kilitlidir.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+DB_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} etiketleri {self.labelnames} olmalı")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = list(self._samples())
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + samples
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [bucket başına (kümülatif olmayan) sayılar + +Inf, toplam]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _samples(self):
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{self._labels(key, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._labels(key)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """Tek bir isteğin veritabanı maliyeti"""
+    __slots__ = ("db_commands", "db_failures", "db_seconds")
+
+    def __init__(self):
+        self.db_commands = 0
+        self.db_failures = 0
+        self.db_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+_stats_lock = threading.Lock()
+
+
+class AppMetrics:
+    """Uygulamanın tüm metrikleri ve yavaş istek eşiği"""
+
+    def __init__(self, slow_request_ms: float = 1000):
+        self.slow_request_ms = slow_request_ms
+        self.registry = registry = MetricsRegistry()
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP istek sayısı", ("method", "route", "status"))
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP istek süresi", ("method", "route"))
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "İşlenmekte olan HTTP istekleri")
+        self.request_db_commands = registry.histogram(
+            "http_request_db_commands", "İstek başına MongoDB komut sayısı", ("method", "route"), DB_COUNT_BUCKETS)
+        self.request_db_seconds = registry.histogram(
+            "http_request_db_seconds", "İstek başına toplam MongoDB süresi", ("method", "route"), DB_LATENCY_BUCKETS)
+        self.slow_requests = registry.counter(
+            "http_slow_requests_total", "Eşiği aşan istekler", ("method", "route"))
+        self.db_commands = registry.counter(
+            "mongodb_commands_total", "MongoDB komut sayısı", ("command", "outcome"))
+        self.db_latency = registry.histogram(
+            "mongodb_command_duration_seconds", "MongoDB komut süresi", ("command",), DB_LATENCY_BUCKETS)
+        self.whatsapp_requests = registry.counter(
+            "whatsapp_requests_total", "WhatsApp gateway çağrıları", ("endpoint", "outcome"))
+        self.whatsapp_latency = registry.histogram(
+            "whatsapp_request_duration_seconds", "WhatsApp gateway çağrı süresi", ("endpoint",))
+        self.command_listener = MongoCommandMetrics(self)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats, streaming: bool = False):
+        self.requests.inc(method=method, route=route, status=status)
+        self.latency.observe(seconds, method=method, route=route)
+        self.request_db_commands.observe(stats.db_commands, method=method, route=route)
+        self.request_db_seconds.observe(stats.db_seconds, method=method, route=route)
+        # SSE / akış yanıtlarının süresi bağlantı ömrüdür, yavaş sayılmaz
+        if streaming or self.slow_request_ms <= 0 or seconds * 1000 < self.slow_request_ms:
+            return
+        self.slow_requests.inc(method=method, route=route)
+        logger.warning(
+            f"Yavaş istek: {method} {route} {status} {seconds * 1000:.1f} ms, "
+            f"{stats.db_commands} db komutu ({stats.db_seconds * 1000:.1f} ms"
+            f"{f', {stats.db_failures} hatalı' if stats.db_failures else ''})"
+        )
+
+    def observe_command(self, command: str, seconds: float, failed: bool = False):
+        self.db_commands.inc(command=command, outcome="error" if failed else "ok")
+        self.db_latency.observe(seconds, command=command)
+        stats = current_request.get()
+        if stats is not None:
+            with _stats_lock:
+                stats.db_commands += 1
+                stats.db_seconds += seconds
+                stats.db_failures += failed
+
+    def observe_whatsapp(self, endpoint: str, outcome: str, seconds: float):
+        self.whatsapp_requests.inc(endpoint=endpoint, outcome=outcome)
+        self.whatsapp_latency.observe(seconds, endpoint=endpoint)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def __init__(self, metrics: AppMetrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.metrics.observe_command(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.metrics.observe_command(event.command_name, event.duration_micros / 1e6, failed=True)
+
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware (BaseHTTPMiddleware akış yanıtlarını tamponlar).
+    Route etiketi eşleşen route'un şablonudur (/api/appointments/{business_id});
+    eşleşmeyen yollar tek etikette toplanır, kardinalite sınırlı kalır.
+    """
+
+    def __init__(self, app, metrics: AppMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = any(
+                    name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", [])
+                )
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            self.metrics.in_flight.dec()
+            current_request.reset(token)
+            # Router eşleşen route'u aynı scope sözlüğüne yazar
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.metrics.observe_request(scope["method"], route, status_code, seconds, stats, streaming)
@@ -0,0 +1,270 @@
+"""Bildirim kuyruğu (outbox)
+
+WhatsApp/SMS gönderimleri istek içinde beklenmez; `notification_outbox`
+koleksiyonuna yazılır ve arka planda çalışan worker'lar tarafından
+gönderilir. Başarısız gönderimler üstel bekleme ile tekrar denenir,
+deneme hakkı biten kayıtlar "dead" durumuna alınır. Sonucu bilinmeyen
+gönderimler (yanıt zaman aşımı) aynı id ile tekrar denenir; gateway daha önce
+gönderdiği id'yi atlar. Hakkı biten bu kayıtlar "dead" değil "unconfirmed"
+olur: mesaj ulaşmış olabilir.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from timefields import as_utc, until_filter
+
+COLLECTION = "notification_outbox"
+CLAIM_ROUNDS = 3
+
+logger = logging.getLogger(__name__)
+
+# sender(phone, message, message_id=...): None dönerse gönderimin akıbeti bilinmiyor
+Sender = Callable[..., Awaitable[Optional[bool]]]
+# Sonuçtaki başarılı_mı None ise gönderimin akıbeti bilinmiyor (bkz. whatsapp_client)
+BulkSender = Callable[[List[dict]], Awaitable[List[Tuple[Optional[bool], Optional[str]]]]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class NotificationOutbox:
+    def __init__(
+        self,
+        sender: Sender,
+        bulk_sender: Optional[BulkSender] = None,
+        workers: int = 4,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        base_backoff_seconds: float = 5.0,
+        max_backoff_seconds: float = 600.0,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 2.0,
+    ):
+        self.sender = sender
+        self.bulk_sender = bulk_sender
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+        self._db = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._send_latencies = deque(maxlen=1000)
+        self._queue_latencies = deque(maxlen=1000)
+        self._counters = {"sent": 0, "retried": 0, "dead": 0, "unconfirmed": 0}
+
+    async def enqueue(self, db, notifications: List[dict]):
+        """
+        Bildirimleri kuyruğa ekle
+        notifications: [{"phone": "...", "message": "...", "kind": "customer"}, ...]
+        """
+        if not notifications:
+            return
+        now = _now()
+        docs = [
+            {
+                "id": str(uuid.uuid4()),
+                "channel": n.get("channel", "whatsapp"),
+                "kind": n.get("kind"),
+                "phone": n["phone"],
+                "message": n["message"],
+                "business_id": n.get("business_id"),
+                "status": "pending",
+                "attempts": 0,
+                "created_at": now,
+                "next_attempt_at": now,
+                "locked_until": None,
+                "last_error": None
+            }
+            for n in notifications
+        ]
+        await db[COLLECTION].insert_many(docs)
+        if self._wakeup:
+            self._wakeup.set()
+
+    def start(self, db):
+        self._db = db
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Bildirim kuyruğu başlatıldı ({self.workers} worker)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, worker_id: int):
+        while True:
+            try:
+                processed = await self.process_batch(self._db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Bildirim worker {worker_id} hatası: {str(e)}")
+                processed = 0
+
+            if processed == 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _claim_batch(self, db) -> List[dict]:
+        """
+        Sırası gelen en fazla batch_size kaydı sabit sayıda round trip ile al:
+        adayların id'leri okunur, tek update_many ile benzersiz lease token'ı
+        yazılır, ardından token ile okunur. update_many filtresi koşulu tekrar
+        kontrol ettiği için başka worker'ın aldığı kayıt ikinci kez alınmaz;
+        adayların bir kısmı başka worker'a gittiyse en fazla CLAIM_ROUNDS tur
+        tekrar denenir.
+        """
+        now = _now()
+        # until_filter: migrate_time_fields bitene kadar eski ISO string kayıtlar da eşlenir
+        due = {"$or": [
+            {"status": "pending", **until_filter("next_attempt_at", now)},
+            # Lease süresi dolan (worker'ı düşmüş) kayıtları geri al
+            {"status": "processing", **until_filter("locked_until", now)}
+        ]}
+        token = str(uuid.uuid4())
+        lease = now + timedelta(seconds=self.lease_seconds)
+        claimed = 0
+        for _ in range(CLAIM_ROUNDS):
+            candidates = await db[COLLECTION].find(
+                due, {"_id": 0, "id": 1}
+            ).sort("next_attempt_at", 1).limit(self.batch_size - claimed).to_list(None)
+            if not candidates:
+                break
+            result = await db[COLLECTION].update_many(
+                {"id": {"$in": [c["id"] for c in candidates]}, **due},
+                {"$set": {"status": "processing", "locked_until": lease, "lease_token": token}}
+            )
+            claimed += result.modified_count
+            if result.modified_count == len(candidates) or claimed >= self.batch_size:
+                break
+        if not claimed:
+            return []
+        return await db[COLLECTION].find({"lease_token": token}, {"_id": 0}).sort("next_attempt_at", 1).to_list(None)
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (attempts - 1)))
+
+    async def _send(self, doc: dict):
+        started = time.perf_counter()
+        try:
+            ok = await self.sender(doc["phone"], doc["message"], message_id=doc["id"])
+            if ok is None:
+                error = "Gateway yanıtı alınamadı"
+            else:
+                error = None if ok else "Gateway mesajı kabul etmedi"
+        except Exception as e:
+            ok, error = False, str(e)
+        self._send_latencies.append(time.perf_counter() - started)
+        return ok, error
+
+    async def _send_bulk(self, batch: List[dict]):
+        started = time.perf_counter()
+        try:
+            results = await self.bulk_sender(batch)
+        except Exception as e:
+            results = [(False, str(e))] * len(batch)
+        # Gateway isteği başına tek örnek (mesaj başına tekrarlanırsa yüzdelikler şişer)
+        self._send_latencies.append(time.perf_counter() - started)
+        return results
+
+    async def process_batch(self, db) -> int:
+        """
+        Bir grup bildirimi gönder ve sonuçları yaz. Her yazma kaydın hâlâ bu
+        worker'ın lease'inde olmasına koşulludur: gönderim lease süresini
+        aşıp kayıt başka worker'a geçtiyse onun durumu ezilmez. Sayaçlar ve
+        kuyruk süreleri sadece yazma gerçekleştiyse güncellenir.
+        """
+        batch = await self._claim_batch(db)
+        if not batch:
+            return 0
+
+        # Tek mesaj da toplu uçtan gider (gateway'de id ile tekilleştirilir)
+        if self.bulk_sender:
+            results = await self._send_bulk(batch)
+        else:
+            results = await asyncio.gather(*(self._send(doc) for doc in batch))
+        now = _now()
+        outcomes = []
+        writes = []
+
+        for doc, (ok, error) in zip(batch, results):
+            attempts = doc.get("attempts", 0) + 1
+            if ok:
+                outcome = "sent"
+                update = {"status": "sent", "sent_at": now, "attempts": attempts, "locked_until": None}
+            elif attempts >= self.max_attempts:
+                outcome = "dead" if ok is False else "unconfirmed"
+                update = {"status": outcome, "attempts": attempts, "last_error": error, "locked_until": None}
+            else:
+                outcome = "retried"
+                next_attempt = now + timedelta(seconds=self._backoff(attempts))
+                update = {
+                    "status": "pending",
+                    "attempts": attempts,
+                    "last_error": error,
+                    "next_attempt_at": next_attempt,
+                    "locked_until": None
+                }
+            outcomes.append((doc, outcome, error))
+            writes.append(db[COLLECTION].update_one(
+                {"id": doc["id"], "lease_token": doc["lease_token"], "status": "processing"},
+                {"$set": update, "$unset": {"lease_token": ""}}
+            ))
+
+        # Kayıt başına koşullu yazma; eşzamanlı gönderildiği için tek round trip sürer
+        for (doc, outcome, error), result in zip(outcomes, await asyncio.gather(*writes)):
+            if not result.modified_count:
+                logger.warning(f"Bildirim sonucu yazılmadı, lease başka worker'a geçmiş: {doc['id']}")
+                continue
+            self._counters[outcome] += 1
+            if outcome == "sent":
+                self._queue_latencies.append((now - as_utc(doc["created_at"])).total_seconds())
+            elif outcome in ("dead", "unconfirmed"):
+                logger.warning(f"Bildirim {outcome} durumuna alındı: {doc['phone']} - {error}")
+        return len(batch)
+
+    async def metrics(self, db) -> dict:
+        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        by_status = {row["_id"]: row["count"] async for row in db[COLLECTION].aggregate(pipeline)}
+        send_latencies = list(self._send_latencies)
+        queue_latencies = list(self._queue_latencies)
+        return {
+            "queue_depth": by_status.get("pending", 0) + by_status.get("processing", 0),
+            "by_status": by_status,
+            "workers": len(self._tasks),
+            "counters": dict(self._counters),
+            "send_latency_seconds": {
+                "avg": sum(send_latencies) / len(send_latencies) if send_latencies else 0.0,
+                "p50": _percentile(send_latencies, 50),
+                "p95": _percentile(send_latencies, 95)
+            },
+            "queue_latency_seconds": {
+                "avg": sum(queue_latencies) / len(queue_latencies) if queue_latencies else 0.0,
+                "p50": _percentile(queue_latencies, 50),
+                "p95": _percentile(queue_latencies, 95)
+            }
+        }
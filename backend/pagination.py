@@ -0,0 +1,57 @@
+"""Keyset (cursor) sayfalama
+
+Sayfa sınırı skip/offset ile değil, son satırın sıralama anahtarıyla
+belirlenir: sonraki sayfa "anahtarı son satırdan küçük/büyük olanlar"
+sorgusudur ve index üzerinden doğrudan o noktadan okunur. Cursor, son
+satırın anahtar değerlerinin base64 kodlanmış JSON'udur.
+"""
+import base64
+import json
+from typing import List, Optional, Sequence
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def keyset_filter(fields: Sequence[str], values: Sequence, descending: bool) -> dict:
+    """
+    (f1, f2, f3) > (v1, v2, v3) karşılaştırmasını Mongo filtresine çevir:
+    f1 > v1 veya (f1 = v1 ve f2 > v2) veya (f1 = v1 ve f2 = v2 ve f3 > v3)
+    """
+    op = "$lt" if descending else "$gt"
+    branches = []
+    for i, field in enumerate(fields):
+        branch = {fields[j]: values[j] for j in range(i)}
+        branch[field] = {op: values[i]}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+def keyset_sort(fields: Sequence[str], descending: bool) -> List[tuple]:
+    direction = -1 if descending else 1
+    return [(field, direction) for field in fields]
+
+
+def page_cursor(rows: List[dict], fields: Sequence[str], limit: int) -> Optional[str]:
+    """limit + 1 satır okunduysa devamı var demektir; son satırdan cursor üret"""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor([last.get(field) for field in fields])
@@ -0,0 +1,81 @@
+"""Şifre işlemleri ve giriş hız sınırı
+
+bcrypt her çağrıda ~100-300 ms CPU harcar; event loop'u bloklamaması için
+hash/verify sınırlı bir thread havuzunda çalıştırılır (bcrypt GIL'i bırakır).
+LoginRateLimiter bir anahtar (e-posta, IP) başına kayan pencere ile deneme sayısını sınırlar.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional
+
+from passlib.context import CryptContext
+
+
+class PasswordHasher:
+    def __init__(self, context: CryptContext, max_workers: int = 4):
+        self.context = context
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.context.verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class LoginRateLimiter:
+    def __init__(
+        self,
+        max_attempts: int = 10,
+        window_seconds: float = 60.0,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        self._attempts: Dict[str, Deque[float]] = {}
+
+    def _prune(self, key: str, now: float) -> Deque[float]:
+        attempts = self._attempts.setdefault(key, deque())
+        while attempts and attempts[0] <= now - self.window_seconds:
+            attempts.popleft()
+        return attempts
+
+    def retry_after(self, key: str) -> int:
+        """Sınır aşıldıysa kaç saniye beklenmeli (0 = serbest)"""
+        now = self.clock()
+        attempts = self._prune(key, now)
+        if len(attempts) < self.max_attempts:
+            return 0
+        return int(attempts[0] + self.window_seconds - now) + 1
+
+    def hit(self, key: str):
+        now = self.clock()
+        if len(self._attempts) > self.max_keys:
+            self._evict_idle(now)
+        self._prune(key, now).append(now)
+
+    def reset(self, key: str):
+        self._attempts.pop(key, None)
+
+    def _evict_idle(self, now: float):
+        idle = [k for k, v in self._attempts.items() if not v or v[-1] <= now - self.window_seconds]
+        for key in idle:
+            del self._attempts[key]
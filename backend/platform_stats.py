@@ -0,0 +1,121 @@
+"""Platform geneli istatistik snapshot'ı
+
+Süper admin dashboard'u her yenilendiğinde sayım ve gelir taraması
+yapılmaz; istatistikler arka planda `interval` saniyede bir hesaplanır,
+platform_stats koleksiyonuna yazılır ve uç bellekteki snapshot'ı
+computed_at zaman damgasıyla döndürür. Yeniden başlatılan worker son
+snapshot'ı koleksiyondan okuyarak hemen hizmet verir.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "platform_stats"
+SNAPSHOT_ID = "current"
+
+
+def month_bounds(day: date):
+    """[ayın ilk günü, sonraki ayın ilk günü) — ISO tarih string'leri"""
+    start = day.replace(day=1)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start.isoformat(), end.isoformat()
+
+
+async def monthly_revenue(db, day: date) -> float:
+    """Bu ay tarihli tamamlanmış randevuların toplam ücreti (DB tarafında toplanır)"""
+    start, end = month_bounds(day)
+    pipeline = [
+        {"$match": {"appointment_date": {"$gte": start, "$lt": end}, "status": "completed"}},
+        {"$group": {"_id": None, "revenue": {"$sum": "$price"}}}
+    ]
+    rows = await db.appointments.aggregate(pipeline).to_list(1)
+    return float(rows[0]['revenue']) if rows else 0.0
+
+
+async def compute_platform_stats(db, now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    (
+        total_businesses,
+        active_businesses,
+        total_users,
+        total_appointments,
+        today_appointments,
+        revenue,
+    ) = await asyncio.gather(
+        db.businesses.count_documents({}),
+        db.businesses.count_documents({"is_active": True}),
+        db.users.estimated_document_count(),
+        db.appointments.estimated_document_count(),
+        db.appointments.count_documents({"appointment_date": today.isoformat()}),
+        monthly_revenue(db, today),
+    )
+    return {
+        "total_businesses": total_businesses,
+        "active_businesses": active_businesses,
+        "inactive_businesses": total_businesses - active_businesses,
+        "total_users": total_users,
+        "total_appointments": total_appointments,
+        "today_appointments": today_appointments,
+        "monthly_revenue": round(revenue, 2),
+        "computed_at": now,
+    }
+
+
+class PlatformStatsSnapshot:
+    def __init__(self, interval: float = 60.0):
+        self.interval = interval
+        self.snapshot: Optional[dict] = None
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db) -> dict:
+        async with self._lock:
+            snapshot = await compute_platform_stats(db)
+            await db[COLLECTION].replace_one({"_id": SNAPSHOT_ID}, dict(snapshot), upsert=True)
+            self.snapshot = snapshot
+            return snapshot
+
+    async def load(self, db) -> Optional[dict]:
+        doc = await db[COLLECTION].find_one({"_id": SNAPSHOT_ID})
+        if doc:
+            doc.pop("_id")
+            computed_at = doc['computed_at']
+            if isinstance(computed_at, datetime) and computed_at.tzinfo is None:
+                doc['computed_at'] = computed_at.replace(tzinfo=timezone.utc)
+            self.snapshot = doc
+        return self.snapshot
+
+    async def get(self, db, max_age: Optional[float] = None) -> dict:
+        """Snapshot'ı döndür; yoksa veya max_age'den eskiyse yeniden hesapla"""
+        snapshot = self.snapshot or await self.load(db)
+        if snapshot is None or (max_age is not None and self.age_seconds() > max_age):
+            snapshot = await self.refresh(db)
+        return snapshot
+
+    def age_seconds(self) -> float:
+        if not self.snapshot:
+            return float("inf")
+        return (datetime.now(timezone.utc) - self.snapshot['computed_at']).total_seconds()
+
+    def start(self, db):
+        self._db = db
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh(self._db)
+            except Exception as e:
+                logger.warning(f"Platform istatistikleri hesaplanamadı: {str(e)}")
+            await asyncio.sleep(self.interval)
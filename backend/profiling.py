@@ -0,0 +1,145 @@
+"""İsteğe bağlı istek profilleme
+
+Bir istek süper adminin X-Profile başlığıyla ya da örnekleme oranıyla
+(PROFILE_SAMPLE_RATE) seçildiğinde işleyicisi cProfile altında çalışır.
+Sonuç, sınırlı boyutlu bir halka tamponda (en yeni `capacity` profil)
+tutulur ve süper admin ucundan okunur.
+
+cProfile thread seviyesinde çalışır: aynı anda tek profil alınır, diğer
+istekler profilsiz geçer. İstek await'te beklerken event loop'ta çalışan
+başka görevler de profile girer; bu yüzden profil zaman dağılımını
+kategorilere ayırır (model kurulumu, tarih ayrıştırma, sürücü, I/O
+beklemesi ...) ve isteğin kendi MongoDB komut sayısı / süresi metrics
+modülünün RequestStats'ından ayrıca eklenir.
+"""
+import cProfile
+import pstats
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, List, Optional
+
+from metrics import current_request
+
+APP_DIR = str(Path(__file__).resolve().parent)
+
+# (kategori, dosya yolunda ya da fonksiyon adında aranan parçalar); ilk eşleşen kazanır
+CATEGORY_RULES = (
+    ("io_wait", ("select.epoll", "select.poll", "select.select", "selectors.py")),
+    ("datetime_parse", ("fromisoformat", "strptime")),
+    ("pydantic", ("/pydantic/", "/pydantic_core/", "pydantic_core")),
+    ("db_driver", ("/pymongo/", "/motor/", "/bson/", "bson.")),
+    ("serialization", ("/json/", "jsonable_encoder", "encoders.py")),
+    ("framework", ("/fastapi/", "/starlette/", "/anyio/")),
+    ("event_loop", ("/asyncio/", "_asyncio", "concurrent/futures")),
+    ("app", (APP_DIR,)),
+)
+
+
+def categorize(filename: str, function: str) -> str:
+    target = f"{filename}:{function}"
+    for category, needles in CATEGORY_RULES:
+        if any(needle in target for needle in needles):
+            return category
+    return "other"
+
+
+def summarize(profile: cProfile.Profile, top_n: int) -> dict:
+    """Fonksiyon bazında en pahalı top_n satır ve kategori başına öz süre (ms)"""
+    stats = pstats.Stats(profile).stats
+    categories = {}
+    rows = []
+    total = 0.0
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.items():
+        total += own
+        category = categorize(filename, function)
+        categories[category] = categories.get(category, 0.0) + own * 1000
+        rows.append({
+            "function": function,
+            "location": f"{filename}:{line}" if filename != "~" else "builtin",
+            "category": category,
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return {
+        "profiled_ms": round(total * 1000, 3),
+        "categories": {name: round(ms, 3) for name, ms in sorted(categories.items(), key=lambda item: -item[1])},
+        "functions": rows[:top_n],
+    }
+
+
+class RequestProfiler:
+    def __init__(self, sample_rate: float = 0.0, capacity: int = 50, top_n: int = 30):
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self._profiles: Deque[dict] = deque(maxlen=capacity)
+        self._active = False
+        self.captured = 0
+        self.skipped = 0
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @asynccontextmanager
+    async def profile(self, method: str, route: str, trigger: str):
+        """
+        Bloğu profille; profil id'si döner. Başka bir profil sürüyorsa
+        profillenmez ve None döner.
+        """
+        if self._active:
+            self.skipped += 1
+            yield None
+            return
+
+        self._active = True
+        profile_id = str(uuid.uuid4())
+        stats = current_request.get()
+        db_before = (stats.db_commands, stats.db_seconds) if stats else (0, 0.0)
+        started_at = datetime.now(timezone.utc)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield profile_id
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - started
+            self._active = False
+            entry = {
+                "id": profile_id,
+                "method": method,
+                "route": route,
+                "trigger": trigger,
+                "started_at": started_at,
+                "wall_ms": round(wall * 1000, 3),
+                "db_commands": (stats.db_commands - db_before[0]) if stats else None,
+                "db_ms": round((stats.db_seconds - db_before[1]) * 1000, 3) if stats else None,
+                **summarize(profiler, self.top_n),
+            }
+            self._profiles.append(entry)
+            self.captured += 1
+
+    def list(self) -> List[dict]:
+        """Yeniden eskiye, fonksiyon satırları olmadan"""
+        return [{k: v for k, v in entry.items() if k != "functions"} for entry in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return next((entry for entry in self._profiles if entry["id"] == profile_id), None)
+
+    def clear(self):
+        self._profiles.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "stored": len(self._profiles),
+            "capacity": self._profiles.maxlen,
+            "captured": self.captured,
+            "skipped": self.skipped,
+            "sample_rate": self.sample_rate,
+        }
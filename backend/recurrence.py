@@ -0,0 +1,83 @@
+"""Tekrarlayan randevu serileri
+
+Seri kuralı (haftalık, iki haftada bir veya aylık; bitiş tarihi ya da
+adet) oluşum tarihlerine açılır. Her oluşum series_id taşıyan normal bir
+randevu olarak yazılır; müsaitlik, slot kilitleri, raporlar ve listeler
+oluşumları ek bir işlem olmadan görür. Tek oluşumun iptali normal durum
+güncellemesiyle, taşınması seri istisnası (series_exception) olarak yapılır.
+
+Çakışma kontrolü oluşum başına ayrı sorgu yapmaz: personelin tüm oluşum
+günlerindeki randevuları tek sorguda okunur ve hepsi tek geçişte seri
+aralığıyla karşılaştırılır.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from availability import appointment_interval
+
+FREQUENCIES = ("weekly", "biweekly", "monthly")
+MAX_OCCURRENCES = 104
+
+
+def _add_months(day: date, months: int) -> Optional[date]:
+    """Ayın aynı günü; o ayda bu gün yoksa (31 Nisan gibi) None"""
+    month_index = day.month - 1 + months
+    try:
+        return day.replace(year=day.year + month_index // 12, month=month_index % 12 + 1)
+    except ValueError:
+        return None
+
+
+def occurrence_dates(
+    start: date,
+    frequency: str,
+    until: Optional[date] = None,
+    count: Optional[int] = None,
+    limit: int = MAX_OCCURRENCES,
+) -> List[date]:
+    """
+    Kuralın oluşum tarihleri (ilk tarih dahil). until veya count'tan biri
+    verilmeli. Aylık seride ayda olmayan günler atlanır (RRULE gibi).
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"frequency şunlardan biri olmalı: {', '.join(FREQUENCIES)}")
+    if (until is None) == (count is None):
+        raise ValueError("until veya count'tan yalnızca biri belirtilmeli")
+    if count is not None and not 1 <= count <= limit:
+        raise ValueError(f"count 1 ile {limit} arasında olmalı")
+    if until is not None and until < start:
+        raise ValueError("until başlangıç tarihinden önce olamaz")
+
+    days: List[date] = []
+    step = 0
+    while count is None or len(days) < count:
+        if frequency == "monthly":
+            day = _add_months(start, step)
+        else:
+            day = date.fromordinal(start.toordinal() + step * (7 if frequency == "weekly" else 14))
+        step += 1
+        if day is None:
+            continue
+        if until is not None and day > until:
+            break
+        if len(days) == limit:
+            raise ValueError(f"Bir seri en fazla {limit} randevu içerebilir")
+        days.append(day)
+    return days
+
+
+def series_conflicts(existing: Iterable[dict], days: Iterable[str], start: int, end: int) -> Dict[str, dict]:
+    """
+    Tüm oluşumlar aynı [start, end) aralığını kullandığı için mevcut
+    randevular tek geçişte karşılaştırılır. {tarih: ilk çakışan randevu}
+    """
+    wanted = set(days)
+    conflicts: Dict[str, dict] = {}
+    for appointment in existing:
+        day = appointment['appointment_date']
+        if day not in wanted or day in conflicts:
+            continue
+        busy_start, busy_end = appointment_interval(appointment)
+        if busy_start < end and busy_end > start:
+            conflicts[day] = appointment
+    return conflicts
@@ -0,0 +1,278 @@
+"""Rapor rollup'ları
+
+Raporlar her çağrıda randevuları taramak yerine önceden toplanmış
+sayaçlardan okunur. Her randevu için işletme, personel ve hizmet
+boyutlarında gün / ay / tüm zamanlar dönemlerine ait sayaçlar tutulur:
+
+    {business_id, dimension: "business"|"staff"|"service", key, period,
+     counts: {status: n}, revenue: {status: tutar}, unique_customers}
+
+period: "2026-10-17" (gün), "2026-10" (ay) veya "all". Dönem, randevunun
+oluşturulma tarihine (UTC) göredir. Sayaçlar randevu oluşturulurken ve
+durum değişirken tek bulk_write ile güncellenir.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from timefields import as_utc
+
+ROLLUPS = "report_rollups"
+CUSTOMERS = "report_customers"
+
+ALL_TIME = "all"
+REVENUE_STATUSES = ("confirmed", "completed")
+WRITE_CHUNK = 1000
+
+
+def created_day(created_at) -> str:
+    return as_utc(created_at).date().isoformat()
+
+
+def periods_for(day: str) -> Tuple[str, str, str]:
+    return day, day[:7], ALL_TIME
+
+
+def targets_for(appointment: dict) -> List[Tuple[str, str]]:
+    targets = [("business", ""), ("service", appointment['service_id'])]
+    if appointment.get('staff_id'):
+        targets.append(("staff", appointment['staff_id']))
+    return targets
+
+
+def _rollup_filter(business_id: str, dimension: str, key: str, period: str) -> dict:
+    return {"business_id": business_id, "dimension": dimension, "key": key, "period": period}
+
+
+def _increments(appointment: dict, status: str, sign: int) -> dict:
+    return {
+        f"counts.{status}": sign,
+        f"revenue.{status}": sign * float(appointment.get('price', 0))
+    }
+
+
+def _rollup_updates(appointment: dict, increments: dict) -> List[UpdateOne]:
+    day = created_day(appointment['created_at'])
+    return [
+        UpdateOne(
+            _rollup_filter(appointment['business_id'], dimension, key, period),
+            {"$inc": increments},
+            upsert=True
+        )
+        for dimension, key in targets_for(appointment)
+        for period in periods_for(day)
+    ]
+
+
+async def record_appointment(db, appointment: dict):
+    """Yeni randevuyu sayaçlara ekle"""
+    customer = await db[CUSTOMERS].update_one(
+        {"business_id": appointment['business_id'], "customer_phone": appointment['customer_phone']},
+        {"$setOnInsert": {"first_seen": appointment['created_at']}},
+        upsert=True
+    )
+
+    operations = _rollup_updates(appointment, _increments(appointment, appointment.get('status', 'confirmed'), 1))
+    if customer.upserted_id is not None:
+        operations.append(UpdateOne(
+            _rollup_filter(appointment['business_id'], "business", "", ALL_TIME),
+            {"$inc": {"unique_customers": 1}},
+            upsert=True
+        ))
+    await db[ROLLUPS].bulk_write(operations, ordered=False)
+
+
+async def record_status_change(db, appointment: dict, old_status: str, new_status: str):
+    """Randevunun sayacını eski durumdan yeni duruma taşı"""
+    if old_status == new_status:
+        return
+    increments = _increments(appointment, old_status, -1)
+    increments.update(_increments(appointment, new_status, 1))
+    await db[ROLLUPS].bulk_write(_rollup_updates(appointment, increments), ordered=False)
+
+
+def _merge_increments(merged: Dict[tuple, dict], appointment: dict, increments: dict):
+    day = created_day(appointment['created_at'])
+    for dimension, key in targets_for(appointment):
+        for period in periods_for(day):
+            bucket = merged.setdefault((appointment['business_id'], dimension, key, period), {})
+            for field, value in increments.items():
+                bucket[field] = bucket.get(field, 0) + value
+
+
+async def _write_merged(db, merged: Dict[tuple, dict]):
+    operations = [
+        UpdateOne(_rollup_filter(*rollup_key), {"$inc": increments}, upsert=True)
+        for rollup_key, increments in merged.items()
+    ]
+    for start in range(0, len(operations), WRITE_CHUNK):
+        await db[ROLLUPS].bulk_write(operations[start:start + WRITE_CHUNK], ordered=False)
+
+
+async def record_appointments(db, appointments: List[dict]):
+    """Toplu eklenen randevuları sayaçlara ekle; aynı sayaca düşen artışlar birleştirilir"""
+    merged: Dict[tuple, dict] = {}
+    first_seen: Dict[Tuple[str, str], object] = {}
+    for appointment in appointments:
+        _merge_increments(merged, appointment, _increments(appointment, appointment.get('status', 'confirmed'), 1))
+        customer = (appointment['business_id'], appointment['customer_phone'])
+        if customer not in first_seen or appointment['created_at'] < first_seen[customer]:
+            first_seen[customer] = appointment['created_at']
+
+    # Geçmiş tarihli içe aktarımda ilk görülme tarihi geriye çekilebilir
+    customers = list(first_seen.items())
+    for start in range(0, len(customers), WRITE_CHUNK):
+        chunk = customers[start:start + WRITE_CHUNK]
+        result = await db[CUSTOMERS].bulk_write([
+            UpdateOne(
+                {"business_id": business_id, "customer_phone": phone},
+                {"$min": {"first_seen": seen}},
+                upsert=True
+            )
+            for (business_id, phone), seen in chunk
+        ], ordered=False)
+        for index in result.upserted_ids:
+            bucket = merged.setdefault((chunk[index][0][0], "business", "", ALL_TIME), {})
+            bucket['unique_customers'] = bucket.get('unique_customers', 0) + 1
+
+    await _write_merged(db, merged)
+
+
+async def record_status_changes(db, changes: List[Tuple[dict, str, str]]):
+    """(randevu, eski durum, yeni durum) listesini tek seferde sayaçlara yansıt"""
+    merged: Dict[tuple, dict] = {}
+    for appointment, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        increments = _increments(appointment, old_status, -1)
+        increments.update(_increments(appointment, new_status, 1))
+        _merge_increments(merged, appointment, increments)
+    await _write_merged(db, merged)
+
+
+def _totals(doc: Optional[dict]) -> Tuple[int, float]:
+    if not doc:
+        return 0, 0.0
+    count = sum(doc.get('counts', {}).values())
+    revenue = sum(v for k, v in doc.get('revenue', {}).items() if k in REVENUE_STATUSES)
+    return count, revenue
+
+
+def _revenue_totals(doc: Optional[dict]) -> Tuple[int, float]:
+    """Sadece onaylı + tamamlanmış randevuların adedi ve geliri"""
+    if not doc:
+        return 0, 0.0
+    counts = doc.get('counts', {})
+    revenue = doc.get('revenue', {})
+    return (
+        sum(counts.get(s, 0) for s in REVENUE_STATUSES),
+        sum(revenue.get(s, 0.0) for s in REVENUE_STATUSES)
+    )
+
+
+async def overview_report(db, business_id: str, now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    today, month, _ = periods_for(now.date().isoformat())
+    docs = await db[ROLLUPS].find(
+        {"business_id": business_id, "dimension": "business", "key": "", "period": {"$in": [today, month, ALL_TIME]}},
+        {"_id": 0}
+    ).to_list(3)
+    by_period = {d['period']: d for d in docs}
+
+    today_count, today_revenue = _totals(by_period.get(today))
+    month_count, month_revenue = _totals(by_period.get(month))
+    unique_customers = by_period.get(ALL_TIME, {}).get('unique_customers', 0)
+
+    return {
+        "today_appointments": today_count,
+        "today_revenue": round(today_revenue, 2),
+        "month_appointments": month_count,
+        "month_revenue": round(month_revenue, 2),
+        "total_customers": unique_customers,
+        "avg_appointment_value": round(month_revenue / month_count, 2) if month_count else 0
+    }
+
+
+async def dimension_totals(db, business_id: str, dimension: str) -> Dict[str, Tuple[int, float]]:
+    docs = await db[ROLLUPS].find(
+        {"business_id": business_id, "dimension": dimension, "period": ALL_TIME},
+        {"_id": 0, "key": 1, "counts": 1, "revenue": 1}
+    ).to_list(None)
+    return {d['key']: _revenue_totals(d) for d in docs}
+
+
+async def rebuild_rollups(db, business_id: Optional[str] = None) -> dict:
+    """
+    Sayaçları randevulardan baştan hesapla (geçmiş veri / tutarsızlık için).
+    Randevular DB tarafında gruplanır; Python'a sadece grup satırları gelir.
+    """
+    scope = {"business_id": business_id} if business_id else {}
+    await db[ROLLUPS].delete_many(scope)
+    await db[CUSTOMERS].delete_many(scope)
+
+    pipeline = [
+        {"$match": scope},
+        {"$group": {
+            "_id": {
+                "business_id": "$business_id",
+                # $substr hem ISO string'i hem BSON datetime'ı (UTC) YYYY-MM-DD'ye keser
+                "day": {"$substr": ["$created_at", 0, 10]},
+                "staff_id": "$staff_id",
+                "service_id": "$service_id",
+                "status": "$status"
+            },
+            "count": {"$sum": 1},
+            "revenue": {"$sum": "$price"}
+        }}
+    ]
+    rollups: Dict[Tuple[str, str, str, str], dict] = {}
+    async for row in db.appointments.aggregate(pipeline, allowDiskUse=True):
+        group = row['_id']
+        status = group.get('status') or 'confirmed'
+        for dimension, key in targets_for(group):
+            for period in periods_for(group['day']):
+                doc = rollups.setdefault(
+                    (group['business_id'], dimension, key, period),
+                    {"counts": {}, "revenue": {}}
+                )
+                doc['counts'][status] = doc['counts'].get(status, 0) + row['count']
+                doc['revenue'][status] = doc['revenue'].get(status, 0.0) + float(row['revenue'] or 0)
+
+    customer_pipeline = [
+        {"$match": scope},
+        {"$group": {
+            "_id": {"business_id": "$business_id", "customer_phone": "$customer_phone"},
+            "first_seen": {"$min": "$created_at"}
+        }}
+    ]
+    customer_ops = []
+    unique_customers: Dict[str, int] = {}
+    async for row in db.appointments.aggregate(customer_pipeline, allowDiskUse=True):
+        group = row['_id']
+        if not group.get('customer_phone'):
+            continue
+        unique_customers[group['business_id']] = unique_customers.get(group['business_id'], 0) + 1
+        customer_ops.append(UpdateOne(
+            {"business_id": group['business_id'], "customer_phone": group['customer_phone']},
+            {"$setOnInsert": {"first_seen": row['first_seen']}},
+            upsert=True
+        ))
+
+    for biz, count in unique_customers.items():
+        rollups.setdefault((biz, "business", "", ALL_TIME), {"counts": {}, "revenue": {}})['unique_customers'] = count
+
+    rollup_ops = [
+        UpdateOne(_rollup_filter(biz, dimension, key, period), {"$set": values}, upsert=True)
+        for (biz, dimension, key, period), values in rollups.items()
+    ]
+    await _bulk_write_chunked(db[ROLLUPS], rollup_ops)
+    await _bulk_write_chunked(db[CUSTOMERS], customer_ops)
+
+    return {"rollups": len(rollup_ops), "customers": len(customer_ops)}
+
+
+async def _bulk_write_chunked(collection, operations: Iterable[UpdateOne]):
+    operations = list(operations)
+    for start in range(0, len(operations), WRITE_CHUNK):
+        await collection.bulk_write(operations[start:start + WRITE_CHUNK], ordered=False)
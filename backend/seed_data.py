@@ -0,0 +1,436 @@
+"""Sentetik çok kiracılı veri üretici
+
+Performans ölçümleri için gerçekçi veri seti üretir: abonelik paketine
+göre (baslangic / profesyonel / isletme) personel ve hizmet sayıları,
+yıllara yayılmış randevular, saat ve gün yoğunluğu, durum dağılımı
+(geçmişte tamamlandı / iptal / gelmedi, gelecekte onaylı / bekliyor),
+tekrar eden müşteriler. Aynı personelin randevuları çakışmaz.
+
+Veri API üzerinden değil, doğrudan insert_many ile paralel partiler
+halinde yazılır. Her işletme kendi (seed, sıra) tohumlu RNG'siyle
+üretildiği için çıktı, işçi sayısından bağımsız olarak seed'e göre
+deterministiktir. İşletmeler --workers süreç arasında paylaştırılır; her
+süreç --concurrency kadar insert_many'yi aynı anda uçuşta tutar.
+
+Kullanım:
+  python backend/seed_data.py --businesses 5000 --appointments 10000000 --years 3 \\
+      --workers 8 --seed 42 [--drop] [--no-derived]
+MONGO_URL / DB_NAME .env'den okunur (--mongo-url / --db ile değiştirilebilir).
+Tüm işletme sahiplerinin şifresi --password (varsayılan: seed1234).
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from availability import day_window, js_weekday
+
+logger = logging.getLogger(__name__)
+
+PLAN_PROFILES = {
+    # ağırlık, personel (min, max), hizmet (min, max), personel başına günlük randevu (min, max)
+    "baslangic": {"weight": 60, "staff": (1, 3), "services": (3, 10), "daily": (2.0, 5.0)},
+    "profesyonel": {"weight": 30, "staff": (3, 10), "services": (8, 30), "daily": (3.0, 7.0)},
+    "isletme": {"weight": 10, "staff": (8, 25), "services": (15, 60), "daily": (3.5, 7.0)},
+}
+SEEDED_COLLECTIONS = ("businesses", "users", "services", "staff", "appointments")
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_CONCURRENCY = 4
+
+OPEN_MINUTE = 9 * 60
+CELL_MINUTES = 30
+CELL_COUNT = 19  # 09:00 - 18:30
+WORKING_HOURS = {"open": "09:00", "close": "18:30"}
+# Saat yoğunluğu: öğle öncesi ve akşamüstü zirve
+CELL_WEIGHTS = [3, 5, 7, 8, 8, 7, 5, 4, 4, 5, 6, 7, 8, 9, 9, 8, 6, 4, 2]
+# getDay() numarası -> gün yoğunluğu (Pazar=0)
+WEEKDAY_FACTORS = {0: 0.5, 1: 0.75, 2: 0.85, 3: 0.9, 4: 1.0, 5: 1.2, 6: 1.35}
+MONTH_FACTORS = {1: 0.85, 2: 0.9, 3: 1.0, 4: 1.0, 5: 1.1, 6: 1.15, 7: 0.95, 8: 0.8, 9: 1.0, 10: 1.05, 11: 1.05, 12: 1.25}
+PAST_STATUSES = (("completed", 78), ("cancelled", 12), ("no-show", 6), ("confirmed", 4))
+FUTURE_STATUSES = (("confirmed", 85), ("pending", 7), ("cancelled", 8))
+
+BUSINESS_KINDS = ("Kuaför", "Berber", "Güzellik Salonu", "Tırnak Stüdyosu", "Spa", "Klinik", "Diyetisyen", "Masaj")
+BUSINESS_ADJECTIVES = ("Altın", "Mavi", "Yıldız", "Lale", "Papatya", "Modern", "Şık", "Işıltı", "Zümrüt", "Defne")
+SERVICE_NAMES = (
+    "Saç Kesimi", "Sakal Tıraşı", "Fön", "Boya", "Röfle", "Keratin Bakım", "Manikür", "Pedikür",
+    "Kaş Alımı", "Cilt Bakımı", "Ağda", "Masaj", "Makyaj", "Gelin Saçı", "Protez Tırnak", "Danışmanlık",
+)
+FIRST_NAMES = (
+    "Ayşe", "Fatma", "Zeynep", "Elif", "Emine", "Merve", "Büşra", "Selin", "Deniz", "Ece",
+    "Mehmet", "Mustafa", "Ahmet", "Ali", "Hüseyin", "Emre", "Burak", "Can", "Murat", "Oğuz",
+)
+LAST_NAMES = ("Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir", "Arslan", "Doğan")
+
+
+def business_rng(seed: int, index: int, part: str = "") -> random.Random:
+    """İşletme başına bağımsız ve deterministik RNG (işçi sayısından etkilenmez)"""
+    return random.Random(f"{seed}:{index}:{part}")
+
+
+def new_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def weighted(rng: random.Random, pairs) -> str:
+    names, weights = zip(*pairs)
+    return rng.choices(names, weights=weights)[0]
+
+
+def business_profile(seed: int, index: int) -> dict:
+    """Paket ve boyutlar; toplam hacmi önceden hesaplayabilmek için ayrı RNG ile"""
+    rng = business_rng(seed, index, "profile")
+    plan = rng.choices(list(PLAN_PROFILES), weights=[p["weight"] for p in PLAN_PROFILES.values()])[0]
+    profile = PLAN_PROFILES[plan]
+    staff_count = rng.randint(*profile["staff"])
+    return {
+        "plan": plan,
+        "staff_count": staff_count,
+        "service_count": rng.randint(*profile["services"]),
+        # İşletmenin bir gün boyunca (tüm personel) ortalama randevu sayısı
+        "daily_rate": staff_count * rng.uniform(*profile["daily"]),
+        # Bazı işletmeler aralığın ortasında açılmış olur
+        "age_fraction": 1.0 if rng.random() < 0.7 else rng.uniform(0.1, 1.0),
+        "sunday_open": rng.random() < 0.25,
+    }
+
+
+def expected_appointments(profile: dict, total_days: int) -> float:
+    open_days = total_days * (1.0 if profile["sunday_open"] else 6 / 7)
+    return profile["daily_rate"] * open_days * profile["age_fraction"]
+
+
+def build_business(seed: int, index: int, profile: dict, start: date, now: datetime, password_hash: str):
+    """İşletme, sahibi, hizmetleri ve personeli"""
+    rng = business_rng(seed, index, "business")
+    business_id = new_id(rng)
+    owner_email = f"owner{index}@seed.example.com"
+    kind = rng.choice(BUSINESS_KINDS)
+    opened = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+    plan = profile["plan"]
+
+    services = []
+    for n in range(profile["service_count"]):
+        duration = rng.choice((30, 30, 30, 45, 60, 60, 90))
+        services.append({
+            "id": new_id(rng), "business_id": business_id,
+            "name": f"{SERVICE_NAMES[n % len(SERVICE_NAMES)]}" + (f" {n // len(SERVICE_NAMES) + 1}" if n >= len(SERVICE_NAMES) else ""),
+            "description": None, "duration": duration,
+            "price": round(rng.randrange(100, 1500, 50) * duration / 60, 2),
+            "created_at": opened,
+        })
+
+    working_days = [1, 2, 3, 4, 5, 6] + ([0] if profile["sunday_open"] else [])
+    working_hours = {str(day): (WORKING_HOURS if day in working_days else None) for day in range(7)}
+    staff = []
+    for n in range(profile["staff_count"]):
+        offered = [] if rng.random() < 0.4 else [s["id"] for s in rng.sample(services, rng.randint(1, len(services)))]
+        days = sorted(rng.sample(working_days, rng.randint(max(1, len(working_days) - 2), len(working_days))))
+        staff.append({
+            "id": new_id(rng), "business_id": business_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "phone": f"05{rng.randrange(10 ** 9):09d}", "email": None,
+            "services": offered, "working_days": days, "created_at": opened,
+        })
+
+    business = {
+        "id": business_id,
+        "name": f"{rng.choice(BUSINESS_ADJECTIVES)} {kind} {index}",
+        "slug": f"seed-{index}",
+        "description": None, "logo_url": None,
+        "phone": f"0212{rng.randrange(10 ** 7):07d}", "address": f"{rng.choice(LAST_NAMES)} Sok. No:{rng.randint(1, 120)}",
+        "working_hours": working_hours,
+        "created_at": opened,
+        "owner_email": owner_email,
+        "subscription_plan": plan,
+        "subscription_expires": now + timedelta(days=rng.randint(-60, 365)),
+        "is_active": rng.random() > 0.03,
+        "last_login": now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+        "total_appointments": 0,
+        "total_staff": len(staff),
+        "total_services": len(services),
+    }
+    owner = {
+        "id": new_id(rng), "email": owner_email, "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "business_id": business_id, "role": "business_owner",
+        "created_at": opened, "last_login": business["last_login"], "password_hash": password_hash,
+    }
+    return business, owner, services, staff
+
+
+def free_cell(taken: int, cell: int, length: int) -> Optional[int]:
+    """İstenen hücre doluysa müşteri en yakın boş saati alır (önce sonrası, sonra öncesi)"""
+    mask = (1 << length) - 1
+    for candidate in list(range(cell, CELL_COUNT - length + 1)) + list(range(min(cell, CELL_COUNT - length + 1) - 1, -1, -1)):
+        if not taken & (mask << candidate):
+            return candidate
+    return None
+
+
+def generate_appointments(
+    seed: int,
+    index: int,
+    business: dict,
+    services: List[dict],
+    staff: List[dict],
+    daily_rate: float,
+    start: date,
+    end: date,
+    today: date,
+) -> Iterator[dict]:
+    """
+    Gün gün randevular. Her personel-gün için 30 dakikalık hücreler bit
+    maskesiyle tutulur; dolu hücreye denk gelen randevu en yakın boş hücreye
+    kayar, gün doluysa atlanır (çakışma yok).
+    """
+    rng = business_rng(seed, index, "appointments")
+    business_id = business["id"]
+    service_cells = [(s, -(-s["duration"] // CELL_MINUTES)) for s in services]
+    offered = {
+        member["id"]: [pair for pair in service_cells if not member["services"] or pair[0]["id"] in member["services"]]
+        for member in staff
+    }
+    customers = [
+        (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"05{rng.randrange(10 ** 9):09d}")
+        for _ in range(max(20, int(daily_rate * 40)))
+    ]
+    cells = range(CELL_COUNT)
+    time_slots = [f"{(OPEN_MINUTE + c * CELL_MINUTES) // 60:02d}:{(OPEN_MINUTE + c * CELL_MINUTES) % 60:02d}" for c in cells]
+    choices, randint, random_ = rng.choices, rng.randint, rng.random
+
+    day = start
+    one_day = timedelta(days=1)
+    while day <= end:
+        weekday = js_weekday(day)
+        if day_window(business["working_hours"], day):
+            working = [m for m in staff if weekday in m["working_days"] and offered[m["id"]]]
+            expected = daily_rate * WEEKDAY_FACTORS[weekday] * MONTH_FACTORS[day.month]
+            count = int(expected + random_() * 2 - 0.5) if working else 0
+            day_str = day.isoformat()
+            past = day < today
+            statuses = PAST_STATUSES if past else FUTURE_STATUSES
+            status_names, status_weights = zip(*statuses)
+            busy: Dict[str, int] = {}
+            starts = choices(cells, weights=CELL_WEIGHTS, k=count)
+            members = choices(working, k=count) if working else []
+            picked_statuses = choices(status_names, weights=status_weights, k=count)
+            for cell, member, status in zip(starts, members, picked_statuses):
+                service, length = offered[member["id"]][randint(0, len(offered[member["id"]]) - 1)]
+                taken = busy.get(member["id"], 0)
+                cell = free_cell(taken, cell, length)
+                if cell is None:
+                    continue
+                busy[member["id"]] = taken | (((1 << length) - 1) << cell)
+                start_minute = OPEN_MINUTE + cell * CELL_MINUTES
+                name, phone = customers[int(len(customers) * random_() ** 1.6)]
+                lead = timedelta(days=int(random_() ** 2 * 21), seconds=randint(0, 86399))
+                created_at = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) - lead
+                yield {
+                    "id": new_id(rng),
+                    "business_id": business_id,
+                    "customer_name": name,
+                    "customer_phone": phone,
+                    "service_id": service["id"],
+                    "service_name": service["name"],
+                    "staff_id": member["id"],
+                    "staff_name": member["name"],
+                    "appointment_date": day_str,
+                    "time_slot": time_slots[cell],
+                    "duration": service["duration"],
+                    "price": service["price"],
+                    "status": status,
+                    "notes": None,
+                    "start_minute": start_minute,
+                    "end_minute": start_minute + service["duration"],
+                    "series_id": None,
+                    "series_exception": False,
+                    "created_at": created_at,
+                }
+        day += one_day
+
+
+class BatchWriter:
+    """insert_many partilerini en fazla `concurrency` tanesi aynı anda uçuşta olacak şekilde yazar"""
+
+    def __init__(self, db, batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY):
+        self.db = db
+        self.batch_size = batch_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._buffers: Dict[str, List[dict]] = {}
+        self._tasks = set()
+        self.written: Dict[str, int] = {}
+
+    async def add(self, collection: str, docs):
+        buffer = self._buffers.setdefault(collection, [])
+        for doc in docs:
+            buffer.append(doc)
+            if len(buffer) >= self.batch_size:
+                await self._submit(collection, buffer)
+                buffer = self._buffers[collection] = []
+
+    async def _submit(self, collection: str, docs: List[dict]):
+        await self._slots.acquire()
+        task = asyncio.create_task(self._insert(collection, docs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _insert(self, collection: str, docs: List[dict]):
+        try:
+            await self.db[collection].insert_many(docs, ordered=False)
+            self.written[collection] = self.written.get(collection, 0) + len(docs)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        for collection, buffer in self._buffers.items():
+            if buffer:
+                await self._submit(collection, buffer)
+        self._buffers = {}
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+
+async def seed_businesses(
+    db,
+    indices: List[int],
+    seed: int,
+    scale: float,
+    start: date,
+    end: date,
+    now: datetime,
+    password_hash: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> Dict[str, int]:
+    """Verilen sıra numaralı işletmeleri tüm verileriyle yaz; koleksiyon başına yazılan sayıyı döndürür"""
+    writer = BatchWriter(db, batch_size, concurrency)
+    today = now.date()
+    total_days = (end - start).days + 1
+    for index in indices:
+        profile = business_profile(seed, index)
+        opened = end - timedelta(days=int(total_days * profile["age_fraction"]) - 1)
+        business, owner, services, staff = build_business(seed, index, profile, opened, now, password_hash)
+        appointments = list(generate_appointments(
+            seed, index, business, services, staff, profile["daily_rate"] * scale, opened, end, today
+        ))
+        business["total_appointments"] = len(appointments)
+        await writer.add("businesses", [business])
+        await writer.add("users", [owner])
+        await writer.add("services", services)
+        await writer.add("staff", staff)
+        await writer.add("appointments", appointments)
+    await writer.close()
+    return writer.written
+
+
+def _worker(args: Tuple) -> Dict[str, int]:
+    """Ayrı süreçte kendi Motor istemcisiyle bir işletme dilimini yaz"""
+    mongo_url, db_name, indices, kwargs = args
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def run():
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+        try:
+            return await seed_businesses(client[db_name], indices, **kwargs)
+        finally:
+            client.close()
+
+    return asyncio.run(run())
+
+
+def plan_scale(seed: int, businesses: int, total_days: int, target: Optional[int]) -> float:
+    """Hedef randevu sayısına ulaşmak için günlük oranların çarpanı (hedef yoksa 1)"""
+    if not target:
+        return 1.0
+    expected = sum(expected_appointments(business_profile(seed, i), total_days) for i in range(businesses))
+    return target / expected if expected else 1.0
+
+
+async def finalize(db, derived: bool, today: date) -> None:
+    """Index'ler (toplu yazımdan sonra oluşturmak daha hızlı) ve türetilmiş veriler"""
+    from indexes import ensure_indexes
+    from reports import rebuild_rollups
+    from slot_locks import rebuild_slot_locks
+
+    await ensure_indexes(db)
+    if derived:
+        await rebuild_rollups(db)
+        await rebuild_slot_locks(db, since_date=today.isoformat())
+
+
+def main():
+    load_dotenv(Path(__file__).parent / '.env')
+    parser = argparse.ArgumentParser(description="Sentetik çok kiracılı veri üretici")
+    parser.add_argument("--businesses", type=int, default=100)
+    parser.add_argument("--appointments", type=int, default=None, help="hedef toplam randevu (yaklaşık)")
+    parser.add_argument("--years", type=float, default=2.0, help="geçmişe doğru kaç yıl")
+    parser.add_argument("--future-days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="süreç başına uçuştaki insert_many")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"))
+    parser.add_argument("--db", default=os.environ.get("DB_NAME"))
+    parser.add_argument("--password", default="seed1234")
+    parser.add_argument("--drop", action="store_true", help="önce üretilen koleksiyonları sil")
+    parser.add_argument("--no-derived", dest="derived", action="store_false", help="rapor sayaçları ve slot kilitleri kurulmasın")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from passlib.context import CryptContext
+
+    now = datetime.now(timezone.utc)
+    end = now.date() + timedelta(days=args.future_days)
+    start = now.date() - timedelta(days=int(args.years * 365))
+    total_days = (end - start).days + 1
+    scale = plan_scale(args.seed, args.businesses, total_days, args.appointments)
+    # bcrypt pahalı: tüm sahipler için bir kez hesaplanır
+    password_hash = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(args.password)
+    kwargs = {"seed": args.seed, "scale": scale, "start": start, "end": end, "now": now,
+              "password_hash": password_hash, "batch_size": args.batch_size, "concurrency": args.concurrency}
+
+    async def prepare():
+        client = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+        if args.drop:
+            for collection in SEEDED_COLLECTIONS + ("report_rollups", "report_customers", "slot_locks"):
+                await client[args.db][collection].drop()
+        client.close()
+
+    asyncio.run(prepare())
+    workers = max(1, min(args.workers, args.businesses))
+    # İşletmeler sırayla dağıtılır; büyük ve küçük işletmeler işçilere dengeli düşer
+    slices = [(args.mongo_url, args.db, list(range(n, args.businesses, workers)), kwargs) for n in range(workers)]
+    logger.info(f"{args.businesses} işletme, {start} - {end}, {workers} işçi, ölçek {scale:.3f}")
+    started = time.perf_counter()
+    totals: Dict[str, int] = {}
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        for written in pool.imap_unordered(_worker, slices):
+            for collection, count in written.items():
+                totals[collection] = totals.get(collection, 0) + count
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Yazıldı ({elapsed:.1f} sn, {totals.get('appointments', 0) / elapsed:,.0f} randevu/sn): "
+        + ", ".join(f"{collection}={count:,}" for collection, count in sorted(totals.items()))
+    )
+
+    async def complete():
+        client = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+        finalize_started = time.perf_counter()
+        await finalize(client[args.db], args.derived, now.date())
+        client.close()
+        logger.info(f"Index'ler{' ve türetilmiş veriler' if args.derived else ''} hazır ({time.perf_counter() - finalize_started:.1f} sn)")
+
+    asyncio.run(complete())
+
+
+if __name__ == "__main__":
+    main()
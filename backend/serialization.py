@@ -0,0 +1,88 @@
+"""Güvenilir DB okumaları için hızlı JSON yolu
+
+Liste uçlarında her doküman için Pydantic modeli kurmak, ardından
+FastAPI'nin response_model ile yeniden doğrulayıp jsonable_encoder'dan
+geçirmesi yanıt süresinin çoğunu oluşturur. Bu dokümanlar zaten modeller
+üzerinden yazıldığı için okuma yolunda doğrulama atlanır:
+
+- model_projection: sorgu sadece modelin alanlarını okur
+- DocumentShaper: eksik alanlara modelin varsayılanını koyar (eski kayıtlar)
+- json_response: dict'ler doğrudan bayta çevrilir (orjson varsa orjson)
+
+Çıktı modelin JSON'uyla aynı biçimdedir: UTC datetime'lar "Z" ile biter.
+orjson opsiyoneldir; yoksa standart json kullanılır.
+"""
+import json
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson  # opsiyonel bağımlılık
+except ImportError:  # pragma: no cover - ortamına göre
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if value.utcoffset() is not None and not value.utcoffset() else text
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value).__name__}")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(value) -> bytes:
+        return json.dumps(
+            value, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projeksiyonu: sadece modelin alanları, _id hariç"""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+
+class DocumentShaper:
+    """
+    Dokümanı modelin alanlarına göre biçimlendirir (doğrulama yapmadan).
+    Eksik alan varsa model kurulsaydı alacağı varsayılan değer konur.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.fields = tuple(model.model_fields)
+        self._optional = {name: field for name, field in model.model_fields.items() if not field.is_required()}
+
+    def __call__(self, doc: dict) -> dict:
+        # Projeksiyonlu okumada tüm alanlar varsa doküman olduğu gibi döner
+        if len(doc) == len(self.fields):
+            return doc
+        for name in self._optional.keys() - doc.keys():
+            doc[name] = self._optional[name].get_default(call_default_factory=True)
+        return doc
+
+    def many(self, docs: Iterable[dict]) -> List[dict]:
+        return [self(doc) for doc in docs]
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, **kwargs) -> FastJSONResponse:
+    return FastJSONResponse(content, **kwargs)
@@ -7,7 +7,7 @@ const app = express();
 const PORT = 3001;
 
 app.use(cors());
-app.use(bodyParser.json());
+app.use(bodyParser.json({ limit: '5mb' }));
 
 // WhatsApp'ı başlat
 initWhatsApp();
@@ -27,22 +27,70 @@ app.get('/api/whatsapp/status', (req, res) => {
     res.json(getStatus());
 });
 
+// Gönderilen outbox id'leri: istemci yanıtı alamayıp aynı mesajı tekrar
+// denerse ikinci kez gönderilmez (devam eden gönderimin sonucu beklenir)
+const SENT_ID_LIMIT = 10000;
+const sentIds = new Map();
+
+function sendOnce(id, phone, message) {
+    if (!id) {
+        return sendMessage(phone, message);
+    }
+    let pending = sentIds.get(id);
+    if (!pending) {
+        pending = sendMessage(phone, message);
+        sentIds.set(id, pending);
+        // Başarısız gönderim tekrar denenebilsin
+        pending.catch(() => sentIds.delete(id));
+        if (sentIds.size > SENT_ID_LIMIT) {
+            sentIds.delete(sentIds.keys().next().value);
+        }
+    }
+    return pending;
+}
+
 // Mesaj gönderme
 app.post('/api/whatsapp/send', async (req, res) => {
-    const { phone, message } = req.body;
+    const { id, phone, message } = req.body;
 
     if (!phone || !message) {
         return res.status(400).json({ success: false, error: 'Telefon ve mesaj gerekli' });
     }
 
     try {
-        await sendMessage(phone, message);
+        await sendOnce(id, phone, message);
         res.json({ success: true });
     } catch (error) {
         res.status(500).json({ success: false, error: error.message });
     }
 });
 
+// Toplu mesaj gönderme (hatırlatma gönderimleri için)
+app.post('/api/whatsapp/send-bulk', async (req, res) => {
+    const { messages } = req.body;
+
+    if (!Array.isArray(messages) || messages.length === 0) {
+        return res.status(400).json({ success: false, error: 'Mesaj listesi gerekli' });
+    }
+
+    // WhatsApp oturumu tek olduğu için mesajlar sırayla gönderilir
+    const results = [];
+    for (const item of messages) {
+        if (!item || !item.phone || !item.message) {
+            results.push({ phone: item && item.phone, success: false, error: 'Telefon ve mesaj gerekli' });
+            continue;
+        }
+        try {
+            await sendOnce(item.id, item.phone, item.message);
+            results.push({ phone: item.phone, success: true });
+        } catch (error) {
+            results.push({ phone: item.phone, success: false, error: error.message });
+        }
+    }
+
+    res.json({ success: results.every(r => r.success), results });
+});
+
 app.listen(PORT, () => {
     console.log(`🚀 WhatsApp servisi http://localhost:${PORT} adresinde çalışıyor`);
 });
@@ -1,18 +1,90 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import csv
 import logging
+import secrets
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta, date, time
 from passlib.context import CryptContext
 import jwt
-import httpx
+
+from assignment import (
+    POLICIES as ASSIGNMENT_POLICIES,
+    ROTATING_POLICIES,
+    eligible_candidates,
+    next_rotation,
+)
+from audit_log import AuditLogWriter, ensure_retention as ensure_log_retention
+from availability import (
+    MAX_DURATION_MINUTES,
+    MAX_RANGE_DAYS,
+    appointment_interval,
+    compute_availability,
+    date_range,
+    merge_staff_availability,
+    parse_date,
+)
+from bulk_appointments import (
+    APPOINTMENT_STATUSES,
+    IMPORT_FORMATS,
+    apply_status_changes,
+    check_overlaps,
+    insert_in_chunks,
+    parse_rows,
+    row_error,
+    valid_time_slot,
+    validation_message,
+)
+import business_stats
+from cache import LocalBackend, ReadThroughCache, RedisBackend, etag_matches
+from events import APPOINTMENT_CREATED, APPOINTMENT_STATUS, RESYNC, EventBroker, sse_stream
+from exports import (
+    DEFAULT_BATCH_SIZE as DEFAULT_EXPORT_BATCH_SIZE,
+    FORMATS as EXPORT_FORMATS,
+    clamp_batch_size,
+    export_headers,
+    export_stream,
+    media_type as export_media_type,
+)
+from notification_queue import NotificationOutbox
+from pagination import InvalidCursor, decode_cursor, keyset_filter, keyset_sort, page_cursor
+from passwords import LoginRateLimiter, PasswordHasher
+from platform_stats import PlatformStatsSnapshot
+from recurrence import occurrence_dates, series_conflicts
+from serialization import DocumentShaper, dumps as fast_dumps, json_response, model_projection
+from reports import (
+    dimension_totals,
+    overview_report,
+    rebuild_rollups,
+    record_appointment,
+    record_appointments,
+    record_status_change,
+)
+from auth_cache import LastLoginTracker, PrincipalCache
+from indexes import ensure_indexes, verify_query_plans
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, AppMetrics, MetricsMiddleware
+from profiling import RequestProfiler
+from slot_grid import grid_availability, grid_days
+from slot_locks import (
+    load_grids,
+    lock_appointments,
+    rebuild_slot_locks,
+    release_appointments,
+    release_slot,
+    reserve_slot,
+    reserve_slots,
+)
+from timefields import appointment_minutes, as_utc, migrate_time_fields, since_filter
+from whatsapp_client import WhatsAppGateway
 
 # LOG HELPER FONKSİYONU
 async def create_log(action: str, user_email: str = None, details: dict = None, log_type: str = "info"):
@@ -23,22 +95,19 @@ async def create_log(action: str, user_email: str = None, details: dict = None,
     details: Ek bilgiler (dict)
     log_type: "info", "warning", "error", "admin"
     """
-    log_entry = {
-        "id": str(uuid.uuid4()),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "action": action,
-        "user_email": user_email,
-        "details": details or {},
-        "type": log_type
-    }
-    await db.logs.insert_one(log_entry)
-    return log_entry
+    # Tampona eklenir, arka planda toplu yazılır (istek insert'i beklemez)
+    return audit_log.record(action, user_email, details, log_type)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# /metrics: istek gecikmeleri, MongoDB komutları, WhatsApp çağrıları
+app_metrics = AppMetrics(slow_request_ms=float(os.environ.get('SLOW_REQUEST_MS', 1000)))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: BSON datetime'lar UTC aware datetime olarak okunur
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[app_metrics.command_listener])
 db = client[os.environ['DB_NAME']]
 
 app = FastAPI()
@@ -54,11 +123,66 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 # Super Admin Email
 SUPER_ADMIN_EMAIL = os.environ.get('SUPER_ADMIN_EMAIL', '')
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt event loop'u bloklamasın diye sınırlı thread havuzunda çalışır
+password_hasher = PasswordHasher(pwd_context, max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 4)))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+login_email_limiter = LoginRateLimiter(
+    max_attempts=int(os.environ.get('LOGIN_RATE_LIMIT_EMAIL', 10)),
+    window_seconds=float(os.environ.get('LOGIN_RATE_WINDOW_EMAIL_SECONDS', 300))
+)
+login_ip_limiter = LoginRateLimiter(
+    max_attempts=int(os.environ.get('LOGIN_RATE_LIMIT_IP', 50)),
+    window_seconds=float(os.environ.get('LOGIN_RATE_WINDOW_IP_SECONDS', 60))
+)
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
+# Önümüzdeki güvenilir proxy sayısı; 0 ise X-Forwarded-For'a hiç bakılmaz
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+
+def client_ip(request: Request) -> str:
+    """
+    İstemci adresi. X-Forwarded-For'un soldaki girdileri istemcinin yazdığı
+    değerlerdir; sadece güvenilir proxy'lerin sağdan eklediği girdi kullanılır
+    (TRUSTED_PROXY_HOPS'uncu girdi). Proxy yoksa bağlantı adresi.
+    """
+    forwarded = request.headers.get('x-forwarded-for')
+    if TRUSTED_PROXY_HOPS > 0 and forwarded:
+        entries = [entry.strip() for entry in forwarded.split(',') if entry.strip()]
+        # Girdi sayısı hop sayısından azsa istek proxy zincirinden gelmemiştir
+        if len(entries) >= TRUSTED_PROXY_HOPS:
+            return entries[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else 'unknown'
+
+# Her istekte kullanıcıyı DB'den okumamak için token sub'ına göre önbellek
+principal_cache = PrincipalCache(
+    ttl_seconds=float(os.environ.get('AUTH_CACHE_TTL', 60)),
+    max_size=int(os.environ.get('AUTH_CACHE_SIZE', 10000))
+)
+audit_log = AuditLogWriter(
+    flush_interval=float(os.environ.get('AUDIT_LOG_FLUSH_MS', 200)) / 1000,
+    batch_size=int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 500)),
+    max_buffer=int(os.environ.get('AUDIT_LOG_MAX_BUFFER', 10000))
+)
+LOG_RETENTION_DAYS = float(os.environ.get('LOG_RETENTION_DAYS', 90))
+# Sıcak yolların isteğe bağlı profillenmesi (X-Profile başlığı veya örnekleme)
+request_profiler = RequestProfiler(
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    capacity=int(os.environ.get('PROFILE_BUFFER_SIZE', 50)),
+    top_n=int(os.environ.get('PROFILE_TOP_FUNCTIONS', 30))
+)
+# Süper admin dashboard istatistikleri arka planda periyodik hesaplanır
+platform_stats = PlatformStatsSnapshot(
+    interval=float(os.environ.get('PLATFORM_STATS_REFRESH_SECONDS', 60))
+)
+last_login_tracker = LastLoginTracker(
+    resolution_minutes=float(os.environ.get('LAST_LOGIN_RESOLUTION_MINUTES', 5)),
+    flush_interval=float(os.environ.get('LAST_LOGIN_FLUSH_SECONDS', 10))
+)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -66,52 +190,118 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def send_whatsapp_message(phone: str, message: str):
+# Uygulama boyunca paylaşılan, bağlantı havuzlu WhatsApp istemcisi
+whatsapp_gateway = WhatsAppGateway(
+    base_url=os.environ.get('WHATSAPP_GATEWAY_URL', 'http://localhost:3001'),
+    max_connections=int(os.environ.get('WHATSAPP_MAX_CONNECTIONS', 20)),
+    max_keepalive_connections=int(os.environ.get('WHATSAPP_MAX_KEEPALIVE', 10)),
+    keepalive_expiry=float(os.environ.get('WHATSAPP_KEEPALIVE_EXPIRY', 30)),
+    max_connections_per_host=int(os.environ.get('WHATSAPP_MAX_PER_HOST', 10)),
+    timeout=float(os.environ.get('WHATSAPP_TIMEOUT', 10)),
+    # Toplu gönderimde mesaj başına eklenen okuma süresi (outbox lease süresinden kısa kalmalı)
+    bulk_message_timeout=float(os.environ.get('WHATSAPP_BULK_MESSAGE_TIMEOUT', 2)),
+    observer=app_metrics.observe_whatsapp
+)
+
+async def send_whatsapp_message(phone: str, message: str, message_id: Optional[str] = None):
     """WhatsApp mesajı gönder"""
-    try:
-        async with httpx.AsyncClient(timeout=3.0) as client:
-            response = await client.post(
-                'http://localhost:3001/api/whatsapp/send',
-                json={'phone': phone, 'message': message},
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                logger.info(f"WhatsApp mesajı gönderildi: {phone}")
-                return True
-            else:
-                logger.warning(f"WhatsApp mesajı gönderilemedi: {phone} - {response.text}")
-                return False
-    except Exception as e:
-        logger.warning(f"WhatsApp hatası (numara kayıtlı olmayabilir): {phone} - {str(e)}")
-        return False
-
-def time_to_minutes(time_str: str) -> int:
-    """Saat string'ini dakikaya çevir (örn: '13:30' -> 810)"""
-    hours, minutes = map(int, time_str.split(':'))
-    return hours * 60 + minutes
-
-def check_time_overlap(start1: int, end1: int, start2: int, end2: int) -> bool:
-    """İki zaman aralığının çakışıp çakışmadığını kontrol et"""
-    return start1 < end2 and end1 > start2
+    return await whatsapp_gateway.send(phone, message, message_id)
+
+async def send_whatsapp_bulk(messages: List[dict]):
+    """Birden fazla WhatsApp mesajını tek istekle gönder"""
+    return await whatsapp_gateway.send_bulk(messages)
+
+# Bildirimler istek içinde gönderilmez, outbox'a yazılıp worker'lar tarafından gönderilir
+notification_outbox = NotificationOutbox(
+    send_whatsapp_message,
+    bulk_sender=send_whatsapp_bulk,
+    workers=int(os.environ.get('NOTIFICATION_WORKERS', 4)),
+    batch_size=int(os.environ.get('NOTIFICATION_BATCH_SIZE', 20)),
+    max_attempts=int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 5))
+)
+
+# Panel randevu olaylarını SSE ile dinler (local: süreç içi, changestream: çok worker)
+event_broker = EventBroker(
+    source=os.environ.get('EVENT_SOURCE', 'local'),
+    max_queue=int(os.environ.get('EVENT_QUEUE_SIZE', 100))
+)
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get('EVENT_HEARTBEAT_SECONDS', 15))
+
+def build_public_cache() -> ReadThroughCache:
+    """Booking sayfası okumaları için önbellek (CACHE_REDIS_URL varsa Redis, yoksa süreç içi)"""
+    ttl = float(os.environ.get('PUBLIC_CACHE_TTL', 60))
+    redis_url = os.environ.get('CACHE_REDIS_URL')
+    if redis_url:
+        import redis.asyncio as redis  # opsiyonel bağımlılık
+        return ReadThroughCache(RedisBackend(redis.from_url(redis_url)), ttl)
+    return ReadThroughCache(LocalBackend(max_size=int(os.environ.get('PUBLIC_CACHE_SIZE', 5000))), ttl)
+
+public_cache = build_public_cache()
+
+def business_cache_key(slug: str) -> str:
+    return f"business:{slug}"
+
+def services_cache_key(business_id: str) -> str:
+    return f"services:{business_id}"
+
+def staff_cache_key(business_id: str) -> str:
+    return f"staff:{business_id}"
+
+def encode_json(value) -> bytes:
+    return fast_dumps(value)
+
+async def cached_json_response(request: Request, key: str, loader, not_found: str) -> Response:
+    """Yanıtı önbellekten ver; If-None-Match ETag ile eşleşirse 304 dön"""
+    async def load():
+        value = await loader()
+        return None if value is None else encode_json(value)
+    
+    entry = await public_cache.get_or_load(key, load)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def invalidate_business_cache(business_id: str, *slugs: str):
+    """İşletme önbelleği slug ile tutulur; slug verilmezse DB'den bulunur"""
+    if not slugs:
+        business = await db.businesses.find_one({"id": business_id}, {"_id": 0, "slug": 1})
+        slugs = (business['slug'],) if business else ()
+    await public_cache.invalidate(*(business_cache_key(slug) for slug in slugs))
+
+def slot_conflict_error(conflict: dict) -> HTTPException:
+    """Slot kilidi çakışmasını kullanıcıya gösterilecek hataya çevir"""
+    return HTTPException(
+        status_code=400,
+        detail=f"Bu saatte zaten bir randevu var. "
+               f"Mevcut randevu: {conflict['time_slot']} ({conflict['duration']} dk)"
+    )
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await authenticate_token(credentials.credentials)
+
+async def authenticate_token(token: str):
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Geçersiz token")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="Kullanıcı bulunamadı")
+        user = principal_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="Kullanıcı bulunamadı")
+            principal_cache.set(user_id, user)
         
-        # Last login güncelle
-        await db.users.update_one(
-            {"id": user_id},
-            {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
-        )
+        # Last login güncelle (bellekte biriktirilir, toplu yazılır)
+        last_login_tracker.touch(user_id, user.get('last_login'))
         
-        return user
+        # Handler'lar dokümanı değiştirebildiği için önbellekteki kopyayı vermiyoruz
+        return dict(user)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token süresi doldu")
     except Exception:
@@ -126,6 +316,36 @@ async def get_super_admin(current_user: dict = Depends(get_current_user)):
         )
     return current_user
 
+async def profile_trigger(request: Request) -> Optional[str]:
+    """Süper admin X-Profile başlığı gönderdiyse "header", örneklemeye düştüyse "sample" """
+    authorization = request.headers.get('authorization', '')
+    if request.headers.get('x-profile') and authorization.startswith('Bearer '):
+        try:
+            user = await authenticate_token(authorization[len('Bearer '):])
+        except HTTPException:
+            user = None
+        if user and SUPER_ADMIN_EMAIL and user.get('email') == SUPER_ADMIN_EMAIL:
+            return "header"
+    if request_profiler.should_sample():
+        return "sample"
+    return None
+
+async def profile_request(request: Request, response: Response):
+    """Route bağımlılığı: seçilen isteğin işleyicisini profiller, id'yi X-Profile-Id ile döndürür"""
+    trigger = await profile_trigger(request)
+    if trigger is None:
+        yield
+        return
+    route = getattr(request.scope.get('route'), 'path', request.url.path)
+    async with request_profiler.profile(request.method, route, trigger) as profile_id:
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+        yield
+
+def can_access_business(user: dict, business_id: str) -> bool:
+    """İşletmenin sahibi veya super admin mi"""
+    return user.get('business_id') == business_id or user.get('email') == SUPER_ADMIN_EMAIL
+
 # ==================== MODELS ====================
 
 class Business(BaseModel):
@@ -206,8 +426,34 @@ class Appointment(BaseModel):
     price: float
     status: str = "confirmed"
     notes: Optional[str] = None
+    start_minute: Optional[int] = None
+    end_minute: Optional[int] = None
+    series_id: Optional[str] = None
+    series_exception: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class BulkStatusUpdate(BaseModel):
+    status: str
+    ids: Optional[List[str]] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    current_status: Optional[str] = None
+    staff_id: Optional[str] = None
+
+class AppointmentPage(BaseModel):
+    appointments: List[Appointment]
+    next_cursor: Optional[str] = None
+
+# Liste uçları modeli kurmadan, sadece modelin alanlarını okuyup döndürür
+BUSINESS_PROJECTION = model_projection(Business)
+SERVICE_PROJECTION = model_projection(Service)
+STAFF_PROJECTION = model_projection(Staff)
+APPOINTMENT_PROJECTION = model_projection(Appointment)
+shape_business = DocumentShaper(Business)
+shape_service = DocumentShaper(Service)
+shape_staff = DocumentShaper(Staff)
+shape_appointment = DocumentShaper(Appointment)
+
 class AppointmentCreate(BaseModel):
     customer_name: str
     customer_phone: str
@@ -217,6 +463,19 @@ class AppointmentCreate(BaseModel):
     time_slot: str
     notes: Optional[str] = None
 
+class RecurrenceRule(BaseModel):
+    frequency: str  # weekly / biweekly / monthly
+    until: Optional[str] = None
+    count: Optional[int] = None
+
+class SeriesCreate(AppointmentCreate):
+    recurrence: RecurrenceRule
+    skip_conflicts: bool = False  # True: çakışan tarihler atlanır, False: seri hiç oluşturulmaz
+
+class OccurrenceMove(BaseModel):
+    appointment_date: str
+    time_slot: str
+
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     email: EmailStr
@@ -250,6 +509,7 @@ class SuperAdminStats(BaseModel):
     total_appointments: int
     today_appointments: int
     monthly_revenue: float
+    computed_at: Optional[datetime] = None
 
 class BusinessDetail(BaseModel):
     id: str
@@ -265,6 +525,12 @@ class BusinessDetail(BaseModel):
     days_remaining: int
     is_active: bool
 
+class BusinessDetailPage(BaseModel):
+    businesses: List[BusinessDetail]
+    total: int
+    page: int
+    limit: int
+
 class SubscriptionUpdate(BaseModel):
     subscription_plan: str
     subscription_expires: datetime
@@ -281,8 +547,7 @@ async def register(user_data: UserCreate):
     user = User(**user_dict)
     
     doc = user.model_dump()
-    doc['password_hash'] = hash_password(user_data.password)
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc['password_hash'] = await hash_password(user_data.password)
     
     await db.users.insert_one(doc)
     
@@ -290,14 +555,26 @@ async def register(user_data: UserCreate):
     return Token(access_token=token, user=user)
 
 @api_router.post("/auth/login", response_model=Token)
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
+    email_key = credentials.email.lower()
+    ip_key = client_ip(request)
+    retry_after = max(login_email_limiter.retry_after(email_key), login_ip_limiter.retry_after(ip_key))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Çok fazla giriş denemesi. Lütfen biraz sonra tekrar deneyin",
+            headers={"Retry-After": str(retry_after)}
+        )
+    login_email_limiter.hit(email_key)
+    login_ip_limiter.hit(ip_key)
+    
     user_doc = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user_doc or not verify_password(credentials.password, user_doc['password_hash']):
+    if not user_doc or not await verify_password(credentials.password, user_doc['password_hash']):
         raise HTTPException(status_code=401, detail="Geçersiz e-posta veya şifre")
     
+    login_email_limiter.reset(email_key)
+    
     user_doc.pop('password_hash', None)
-    if isinstance(user_doc.get('created_at'), str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
     user = User(**user_doc)
     token = create_access_token({"sub": user.id, "email": user.email})
@@ -310,8 +587,6 @@ async def login(credentials: UserLogin):
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: dict = Depends(get_current_user)):
     current_user.pop('password_hash', None)
-    if isinstance(current_user.get('created_at'), str):
-        current_user['created_at'] = datetime.fromisoformat(current_user['created_at'])
     return User(**current_user)
 
 # ==================== BUSINESS ENDPOINTS ====================
@@ -330,8 +605,6 @@ async def create_business(business_data: BusinessCreate, current_user: dict = De
     business_dict['owner_email'] = current_user['email']
     business = Business(**business_dict)
     doc = business.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['subscription_expires'] = doc['subscription_expires'].isoformat()
     
     await db.businesses.insert_one(doc)
     
@@ -340,6 +613,7 @@ async def create_business(business_data: BusinessCreate, current_user: dict = De
         {"id": current_user['id']},
         {"$set": {"business_id": doc['id']}}
     )
+    principal_cache.invalidate(current_user['id'])
     
     # Log ekle
     await create_log(
@@ -360,6 +634,10 @@ async def update_business(business_id: str, business_data: BusinessCreate, curre
     if existing:
         raise HTTPException(status_code=400, detail="URL adresi zaten kullanılıyor")
     
+    previous = await db.businesses.find_one({"id": business_id}, {"_id": 0, "slug": 1})
+    if not previous:
+        raise HTTPException(status_code=404, detail="İşletme bulunamadı")
+    
     update_data = business_data.model_dump()
     result = await db.businesses.update_one(
         {"id": business_id},
@@ -369,26 +647,22 @@ async def update_business(business_id: str, business_data: BusinessCreate, curre
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="İşletme bulunamadı")
     
+    await invalidate_business_cache(business_id, previous['slug'], business_data.slug)
+    
     updated_business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
-    if isinstance(updated_business.get('created_at'), str):
-        updated_business['created_at'] = datetime.fromisoformat(updated_business['created_at'])
-    if isinstance(updated_business.get('subscription_expires'), str):
-        updated_business['subscription_expires'] = datetime.fromisoformat(updated_business['subscription_expires'])
     
     return Business(**updated_business)
 
 @api_router.get("/businesses/{slug}", response_model=Business)
-async def get_business_by_slug(slug: str):
-    business = await db.businesses.find_one({"slug": slug}, {"_id": 0})
-    if not business:
-        raise HTTPException(status_code=404, detail="İşletme bulunamadı")
-    
-    if isinstance(business.get('created_at'), str):
-        business['created_at'] = datetime.fromisoformat(business['created_at'])
-    if isinstance(business.get('subscription_expires'), str):
-        business['subscription_expires'] = datetime.fromisoformat(business['subscription_expires'])
+async def get_business_by_slug(slug: str, request: Request):
+    async def load():
+        business = await db.businesses.find_one({"slug": slug}, BUSINESS_PROJECTION)
+        if not business:
+            return None
+        
+        return shape_business(business)
     
-    return Business(**business)
+    return await cached_json_response(request, business_cache_key(slug), load, "İşletme bulunamadı")
 
 @api_router.get("/businesses", response_model=List[Business])
 async def get_businesses_list():
@@ -396,12 +670,9 @@ async def get_businesses_list():
     now = datetime.now(timezone.utc)
     businesses = await db.businesses.find({
         "is_active": True,
-        "subscription_expires": {"$gte": now.isoformat()}
-    }, {"_id": 0}).to_list(1000)
-    for b in businesses:
-        if isinstance(b.get('created_at'), str):
-            b['created_at'] = datetime.fromisoformat(b['created_at'])
-    return [Business(**b) for b in businesses]
+        **since_filter("subscription_expires", now)
+    }, BUSINESS_PROJECTION).to_list(1000)
+    return json_response(shape_business.many(businesses))
 
 # ==================== SERVICE ENDPOINTS ====================
 
@@ -435,9 +706,9 @@ async def create_service(service_data: ServiceCreate, current_user: dict = Depen
     service_dict['business_id'] = current_user['business_id']
     service = Service(**service_dict)
     doc = service.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.services.insert_one(doc)
+    await public_cache.invalidate(services_cache_key(current_user['business_id']))
     
     # İşletme total_services güncelle
     await db.businesses.update_one(
@@ -448,12 +719,12 @@ async def create_service(service_data: ServiceCreate, current_user: dict = Depen
     return service
 
 @api_router.get("/services/{business_id}", response_model=List[Service])
-async def get_services(business_id: str):
-    services = await db.services.find({"business_id": business_id}, {"_id": 0}).to_list(1000)
-    for s in services:
-        if isinstance(s.get('created_at'), str):
-            s['created_at'] = datetime.fromisoformat(s['created_at'])
-    return [Service(**s) for s in services]
+async def get_services(business_id: str, request: Request):
+    async def load():
+        services = await db.services.find({"business_id": business_id}, SERVICE_PROJECTION).to_list(1000)
+        return shape_service.many(services)
+    
+    return await cached_json_response(request, services_cache_key(business_id), load, "Hizmet bulunamadı")
 
 @api_router.put("/services/{service_id}", response_model=Service)
 async def update_service(service_id: str, service_data: ServiceCreate, current_user: dict = Depends(get_current_user)):
@@ -469,9 +740,9 @@ async def update_service(service_id: str, service_data: ServiceCreate, current_u
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
     
+    await public_cache.invalidate(services_cache_key(current_user['business_id']))
+    
     updated_service = await db.services.find_one({"id": service_id}, {"_id": 0})
-    if isinstance(updated_service.get('created_at'), str):
-        updated_service['created_at'] = datetime.fromisoformat(updated_service['created_at'])
     
     return Service(**updated_service)
 
@@ -481,6 +752,8 @@ async def delete_service(service_id: str, current_user: dict = Depends(get_curre
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
     
+    await public_cache.invalidate(services_cache_key(current_user['business_id']))
+    
     # 🆕 İşletme total_services güncelle
     await db.businesses.update_one(
         {"id": current_user['business_id']},
@@ -488,10 +761,10 @@ async def delete_service(service_id: str, current_user: dict = Depends(get_curre
     )
     
     await create_log(
-        "delete_business",
+        "delete_service",
         current_user['email'],
-        {"business_id": business_id, "business_name": business.get('name', 'N/A')},
-        "admin"
+        {"business_id": current_user['business_id'], "service_id": service_id},
+        "info"
     )
 
     return {"message": "Hizmet silindi"}
@@ -528,9 +801,9 @@ async def create_staff(staff_data: StaffCreate, current_user: dict = Depends(get
     staff_dict['business_id'] = current_user['business_id']
     staff = Staff(**staff_dict)
     doc = staff.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
     await db.staff.insert_one(doc)
+    await public_cache.invalidate(staff_cache_key(current_user['business_id']))
     
     # İşletme total_staff güncelle
     await db.businesses.update_one(
@@ -548,12 +821,12 @@ async def create_staff(staff_data: StaffCreate, current_user: dict = Depends(get
     return staff
 
 @api_router.get("/staff/{business_id}", response_model=List[Staff])
-async def get_staff(business_id: str):
-    staff_list = await db.staff.find({"business_id": business_id}, {"_id": 0}).to_list(1000)
-    for s in staff_list:
-        if isinstance(s.get('created_at'), str):
-            s['created_at'] = datetime.fromisoformat(s['created_at'])
-    return [Staff(**s) for s in staff_list]
+async def get_staff(business_id: str, request: Request):
+    async def load():
+        staff_list = await db.staff.find({"business_id": business_id}, STAFF_PROJECTION).to_list(1000)
+        return shape_staff.many(staff_list)
+    
+    return await cached_json_response(request, staff_cache_key(business_id), load, "Personel bulunamadı")
 
 @api_router.put("/staff/{staff_id}", response_model=Staff)
 async def update_staff(staff_id: str, staff_data: StaffCreate, current_user: dict = Depends(get_current_user)):
@@ -569,9 +842,9 @@ async def update_staff(staff_id: str, staff_data: StaffCreate, current_user: dic
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Personel bulunamadı")
     
+    await public_cache.invalidate(staff_cache_key(current_user['business_id']))
+    
     updated_staff = await db.staff.find_one({"id": staff_id}, {"_id": 0})
-    if isinstance(updated_staff.get('created_at'), str):
-        updated_staff['created_at'] = datetime.fromisoformat(updated_staff['created_at'])
     
     return Staff(**updated_staff)
 
@@ -581,6 +854,9 @@ async def delete_staff(staff_id: str, current_user: dict = Depends(get_current_u
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Personel bulunamadı")
     
+    await db.slot_locks.delete_many({"staff_id": staff_id})
+    await public_cache.invalidate(staff_cache_key(current_user['business_id']))
+    
     # 🆕 İşletme total_staff güncelle
     await db.businesses.update_one(
         {"id": current_user['business_id']},
@@ -589,52 +865,166 @@ async def delete_staff(staff_id: str, current_user: dict = Depends(get_current_u
     
     return {"message": "Personel silindi"}
 
+# ==================== BOOKING ENDPOINTS ====================
+
+BOOKING_DEFAULT_DAYS = 14
+
+@api_router.get("/booking/{slug}")
+async def get_booking_bootstrap(
+    slug: str,
+    days: int = BOOKING_DEFAULT_DAYS,
+    date_from: Optional[str] = None,
+    service_id: Optional[str] = None
+):
+    """
+    Booking sayfası için tek çağrı: işletme, hizmetler, personel ve önümüzdeki
+    `days` günün personel bazlı boş saatleri. service_id verilirse süre o
+    hizmete göre hesaplanır, yoksa 30 dk.
+    """
+    days = max(1, min(days, MAX_RANGE_DAYS))
+    try:
+        start_day = parse_date(date_from or datetime.now(timezone.utc).date().isoformat())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    end_day = start_day + timedelta(days=days - 1)
+    
+    business = await db.businesses.find_one(
+        {"slug": slug},
+        {"_id": 0, "id": 1, "name": 1, "slug": 1, "description": 1, "logo_url": 1, "phone": 1,
+         "address": 1, "working_hours": 1, "is_active": 1, "subscription_expires": 1}
+    )
+    if not business:
+        raise HTTPException(status_code=404, detail="İşletme bulunamadı")
+    business_id = business['id']
+    
+    services, staff_list, grids = await asyncio.gather(
+        db.services.find(
+            {"business_id": business_id},
+            {"_id": 0, "id": 1, "name": 1, "description": 1, "duration": 1, "price": 1}
+        ).to_list(1000),
+        db.staff.find(
+            {"business_id": business_id},
+            {"_id": 0, "id": 1, "name": 1, "phone": 1, "services": 1, "working_days": 1}
+        ).to_list(1000),
+        load_grids(db, business_id, start_day.isoformat(), end_day.isoformat())
+    )
+    
+    duration = 30
+    if service_id:
+        service = next((s for s in services if s['id'] == service_id), None)
+        if not service:
+            raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
+        duration = service['duration']
+    
+    booking_days = date_range(start_day, end_day)
+    by_staff = grid_availability(business, staff_list, grids, booking_days, duration, service_id)
+    if staff_list:
+        any_staff = merge_staff_availability(by_staff)
+    else:
+        any_staff = {
+            d['date']: d['slots']
+            for d in compute_availability(business, [], [], booking_days, duration)
+            if d['slots']
+        }
+    
+    expires = business.pop('subscription_expires', None)
+    is_active = business.pop('is_active', True)
+    business['accepting_bookings'] = bool(is_active) and (
+        not expires or as_utc(expires) >= datetime.now(timezone.utc)
+    )
+    
+    return {
+        "business": business,
+        "services": services,
+        "staff": staff_list,
+        "availability": {
+            "service_id": service_id,
+            "duration": duration,
+            "date_from": start_day.isoformat(),
+            "date_to": end_day.isoformat(),
+            "staff": by_staff,
+            "any": any_staff
+        }
+    }
+
 # ==================== APPOINTMENT ENDPOINTS ====================
 
-@api_router.post("/appointments/{business_id}", response_model=Appointment)
-async def create_appointment(business_id: str, appointment_data: AppointmentCreate):
-    # 🆕 İşletme aktif mi ve süresi dolmamış mı kontrol et
+async def get_bookable_business(business_id: str) -> dict:
+    """🆕 İşletme aktif mi ve süresi dolmamış mı kontrol et"""
     business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
     if not business:
         raise HTTPException(status_code=404, detail="İşletme bulunamadı")
     
     now = datetime.now(timezone.utc)
-    subscription_expires = datetime.fromisoformat(business.get('subscription_expires'))
+    subscription_expires = as_utc(business.get('subscription_expires'))
     
     if not business.get('is_active', True):
         raise HTTPException(status_code=403, detail="Bu işletme askıya alınmış")
     
     if subscription_expires < now:
         raise HTTPException(status_code=403, detail="Bu işletmenin aboneliği sona ermiş")
+    return business
+
+STAFF_ASSIGNMENT_POLICY = os.environ.get('STAFF_ASSIGNMENT_POLICY', 'least_loaded')
+if STAFF_ASSIGNMENT_POLICY not in ASSIGNMENT_POLICIES:
+    raise RuntimeError(f"STAFF_ASSIGNMENT_POLICY şunlardan biri olmalı: {', '.join(ASSIGNMENT_POLICIES)}")
+
+async def assign_staff(business_id: str, appointment: Appointment) -> Optional[dict]:
+    """
+    Personel seçilmemiş randevuya uygun personeli seç ve slotunu kilitle.
+    Personeller ve o günün randevuları birer sorguyla okunur. Seçilen
+    personelin slotu arada dolarsa sıradaki aday denenir. İşletmenin hiç
+    personeli yoksa None döner (sadece çalışma saatleri geçerli).
+    """
+    try:
+        day = parse_date(appointment.appointment_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    staff_list, appointments = await asyncio.gather(
+        db.staff.find({"business_id": business_id}, {"_id": 0}).to_list(None),
+        db.appointments.find(
+            {"business_id": business_id, "appointment_date": appointment.appointment_date, "status": {"$ne": "cancelled"}},
+            {"_id": 0, "staff_id": 1, "time_slot": 1, "duration": 1, "start_minute": 1, "end_minute": 1}
+        ).to_list(None)
+    )
+    if not staff_list:
+        return None
+    
+    candidates = eligible_candidates(
+        staff_list, appointments, day, appointment.start_minute, appointment.end_minute, appointment.service_id
+    )
+    rotation = 0
+    if STAFF_ASSIGNMENT_POLICY in ROTATING_POLICIES and len(candidates) > 1:
+        rotation = await next_rotation(db, business_id)
+    for candidate in ASSIGNMENT_POLICIES[STAFF_ASSIGNMENT_POLICY](candidates, rotation):
+        staff = candidate['staff']
+        conflict = await reserve_slot(
+            db, business_id, staff['id'], appointment.appointment_date,
+            appointment.id, appointment.time_slot, appointment.duration
+        )
+        if not conflict:
+            return staff
+    raise HTTPException(status_code=400, detail="Bu saatte uygun personel yok")
+
+@api_router.post("/appointments/{business_id}", response_model=Appointment, dependencies=[Depends(profile_request)])
+async def create_appointment(business_id: str, appointment_data: AppointmentCreate):
+    await get_bookable_business(business_id)
+    
+    try:
+        parse_date(appointment_data.appointment_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    if not valid_time_slot(appointment_data.time_slot):
+        raise HTTPException(status_code=400, detail="Geçersiz saat formatı (SS:DD)")
     
     # Hizmet kontrolü (eski kod)
     service = await db.services.find_one({"id": appointment_data.service_id}, {"_id": 0})
     if not service:
         raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
     
+    staff = None
     staff_name = None
     if appointment_data.staff_id:
-        existing_appointments = await db.appointments.find({
-            "business_id": business_id,
-            "staff_id": appointment_data.staff_id,
-            "appointment_date": appointment_data.appointment_date,
-            "status": {"$ne": "cancelled"}
-        }, {"_id": 0}).to_list(1000)
-        
-        requested_start = time_to_minutes(appointment_data.time_slot)
-        requested_end = requested_start + service['duration']
-        
-        for existing in existing_appointments:
-            existing_start = time_to_minutes(existing['time_slot'])
-            existing_end = existing_start + existing['duration']
-            
-            if check_time_overlap(requested_start, requested_end, existing_start, existing_end):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Bu saatte zaten bir randevu var. "
-                           f"Mevcut randevu: {existing['time_slot']} ({existing['duration']} dk)"
-                )
-        
         staff = await db.staff.find_one({"id": appointment_data.staff_id}, {"_id": 0})
         if staff:
             staff_name = staff['name']
@@ -645,25 +1035,51 @@ async def create_appointment(business_id: str, appointment_data: AppointmentCrea
     appointment_dict['staff_name'] = staff_name
     appointment_dict['duration'] = service['duration']
     appointment_dict['price'] = service['price']
+    appointment_dict.update(appointment_minutes(appointment_data.time_slot, service['duration']))
     
     appointment = Appointment(**appointment_dict)
     
+    # Çakışma kontrolü veritabanında atomik olarak yapılır (slot kilidi)
+    if appointment.staff_id:
+        conflict = await reserve_slot(
+            db,
+            business_id,
+            appointment.staff_id,
+            appointment.appointment_date,
+            appointment.id,
+            appointment.time_slot,
+            appointment.duration
+        )
+        if conflict:
+            raise slot_conflict_error(conflict)
+    else:
+        # "Fark etmez": uygun personel atanır
+        staff = await assign_staff(business_id, appointment)
+        if staff:
+            staff_name = staff['name']
+            appointment.staff_id = staff['id']
+            appointment.staff_name = staff_name
+    
     doc = appointment.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
-    await db.appointments.insert_one(doc)
+    try:
+        await db.appointments.insert_one(doc)
+    except Exception:
+        if appointment.staff_id:
+            await release_slot(
+                db, appointment.staff_id, appointment.appointment_date, appointment.id,
+                appointment.start_minute, appointment.end_minute
+            )
+        raise
+    
+    # Rapor sayaçlarını güncelle
+    await record_appointment(db, doc)
+    event_broker.publish(business_id, APPOINTMENT_CREATED, {k: v for k, v in doc.items() if k != '_id'})
     
     # İşletme bilgisini al
     business = await db.businesses.find_one({"id": business_id}, {"_id": 0})
     business_name = business['name'] if business else 'İşletme'
     
-    print(f"\n[SMS - {appointment.customer_phone}] Randevunuz onaylandı - {business_name}")
-    print(f"Hizmet: {appointment.service_name}")
-    print(f"Tarih: {appointment.appointment_date} saat {appointment.time_slot}")
-    if staff_name:
-        print(f"Personel: {staff_name}")
-    print(f"[SMS - İşletme] Yeni randevu: {appointment.customer_name} - {appointment.appointment_date}\n")
-
     # İşletme total_appointments güncelle
     await db.businesses.update_one(
         {"id": business_id},
@@ -683,12 +1099,16 @@ async def create_appointment(business_id: str, appointment_data: AppointmentCrea
     
     customer_message += f"\n💰 Ücret: {appointment.price} TL\n\nGörüşmek üzere! 🙏"
     
-    await send_whatsapp_message(appointment.customer_phone, customer_message)
+    notifications = [{
+        "kind": "customer",
+        "phone": appointment.customer_phone,
+        "message": customer_message,
+        "business_id": business_id
+    }]
     
     # WhatsApp mesajı gönder - Personele (eğer personel seçilmişse)
-    if staff_name and appointment_data.staff_id:
-        staff = await db.staff.find_one({"id": appointment_data.staff_id}, {"_id": 0})
-        if staff and staff.get('phone'):
+    if staff_name and appointment.staff_id:
+        if staff.get('phone'):
             # Numara formatını düzelt (başında 90 yoksa ekle)
             staff_phone = staff['phone']
             if not staff_phone.startswith('90'):
@@ -706,10 +1126,77 @@ async def create_appointment(business_id: str, appointment_data: AppointmentCrea
 🕐 Saat: {appointment.time_slot}
 💰 Ücret: {appointment.price} TL"""
             
-            await send_whatsapp_message(staff_phone, staff_message)
+            notifications.append({
+                "kind": "staff",
+                "phone": staff_phone,
+                "message": staff_message,
+                "business_id": business_id
+            })
+    
+    await notification_outbox.enqueue(db, notifications)
     
     return appointment
 
+@api_router.get("/appointments/availability")
+async def get_availability(
+    business_id: str,
+    appointment_date: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    service_id: Optional[str] = None,
+    staff_id: Optional[str] = None,
+    time_slot: Optional[str] = None,
+    duration: Optional[int] = Query(None, gt=0, le=MAX_DURATION_MINUTES)
+):
+    """
+    Boş randevu saatlerini getir (tek gün veya tarih aralığı). time_slot
+    verilirse appointment_date (yoksa aralığın ilk günü) için uygunluğu döner.
+    """
+    try:
+        start_day = parse_date(appointment_date or date_from or datetime.now(timezone.utc).date().isoformat())
+        end_day = parse_date(date_to) if date_to and not appointment_date else start_day
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+
+    if end_day < start_day or (end_day - start_day).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Tarih aralığı en fazla {MAX_RANGE_DAYS} gün olabilir")
+
+    business = await db.businesses.find_one({"id": business_id}, {"_id": 0, "id": 1, "working_hours": 1})
+    if not business:
+        raise HTTPException(status_code=404, detail="İşletme bulunamadı")
+
+    if service_id:
+        service = await db.services.find_one({"id": service_id, "business_id": business_id}, {"_id": 0, "duration": 1})
+        if not service:
+            raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
+        duration = service['duration']
+    duration = duration or 30
+
+    staff_query = {"business_id": business_id}
+    if staff_id:
+        staff_query["id"] = staff_id
+    staff_list = await db.staff.find(
+        staff_query, {"_id": 0, "id": 1, "services": 1, "working_days": 1}
+    ).to_list(1000)
+    if staff_id and not staff_list:
+        raise HTTPException(status_code=404, detail="Personel bulunamadı")
+
+    grids = await load_grids(db, business_id, start_day.isoformat(), end_day.isoformat(), staff_id)
+    days = grid_days(business, staff_list, grids, date_range(start_day, end_day), duration, service_id)
+
+    response = {
+        "business_id": business_id,
+        "service_id": service_id,
+        "staff_id": staff_id,
+        "duration": duration,
+        "days": days
+    }
+    if time_slot:
+        slot_day = start_day.isoformat()
+        response["time_slot"] = time_slot
+        response["available"] = any(d["date"] == slot_day and time_slot in d["slots"] for d in days)
+    return response
+
 @api_router.get("/appointments/{business_id}/notifications")
 async def get_new_appointments(business_id: str, current_user: dict = Depends(get_current_user)):
     """Son 24 saatin yeni randevularını getir"""
@@ -722,186 +1209,757 @@ async def get_new_appointments(business_id: str, current_user: dict = Depends(ge
     appointments = await db.appointments.find({
         "business_id": business_id,
         "status": "confirmed",  # Sadece onaylı
-        "created_at": {"$gte": yesterday.isoformat()}  # Son 24 saat
+        **since_filter("created_at", yesterday)  # Son 24 saat
     }, {"_id": 0}).sort("created_at", -1).to_list(100)
     
-    # Datetime string'lerini düzelt
-    for apt in appointments:
-        if isinstance(apt.get('created_at'), str):
-            apt['created_at'] = datetime.fromisoformat(apt['created_at'])
-        if isinstance(apt.get('appointment_date'), str):
-            pass  # Zaten string
-    
     return appointments
 
-@api_router.get("/appointments/{business_id}", response_model=List[Appointment])
-async def get_appointments(business_id: str): 
-    appointments = await db.appointments.find({"business_id": business_id}, {"_id": 0}).sort("appointment_date", -1).to_list(1000)
-    for a in appointments:
-        if isinstance(a.get('created_at'), str):
-            a['created_at'] = datetime.fromisoformat(a['created_at'])
-    return [Appointment(**a) for a in appointments]
+@api_router.get("/events/{business_id}")
+async def stream_business_events(business_id: str, token: str, request: Request):
+    """
+    Randevu olayları (Server-Sent Events).
+    EventSource header gönderemediği için token query parametresiyle gelir.
+    """
+    user = await authenticate_token(token)
+    if not can_access_business(user, business_id):
+        raise HTTPException(status_code=403, detail="Bu işletmenin olaylarını görme yetkiniz yok")
+    
+    subscription = event_broker.subscribe(business_id)
+    return StreamingResponse(
+        sse_stream(subscription, request.is_disconnected, EVENT_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+APPOINTMENT_PAGE_KEY = ("appointment_date", "time_slot", "id")
+APPOINTMENT_EXPORT_SORT = [(field, 1) for field in APPOINTMENT_PAGE_KEY]
+MAX_APPOINTMENT_PAGE = 500
+
+@api_router.get("/appointments/{business_id}", response_model=AppointmentPage)
+async def get_appointments(
+    business_id: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    staff_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    order: str = "desc"
+):
+    """
+    Randevuları (appointment_date, time_slot, id) sırasıyla sayfa sayfa getir.
+    Sonraki sayfa için dönen next_cursor, cursor parametresiyle gönderilir.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order 'asc' veya 'desc' olmalı")
+    descending = order == "desc"
+    limit = max(1, min(limit, MAX_APPOINTMENT_PAGE))
+    
+    query = {"business_id": business_id}
+    date_filter = {}
+    try:
+        if date_from:
+            date_filter["$gte"] = parse_date(date_from).isoformat()
+        if date_to:
+            date_filter["$lte"] = parse_date(date_to).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    if date_filter:
+        query["appointment_date"] = date_filter
+    if staff_id:
+        query["staff_id"] = staff_id
+    if status:
+        query["status"] = status
+    
+    if cursor:
+        try:
+            after = decode_cursor(cursor, len(APPOINTMENT_PAGE_KEY))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Geçersiz cursor")
+        query = {"$and": [query, keyset_filter(APPOINTMENT_PAGE_KEY, after, descending)]}
+    
+    # Bir fazla satır okunur; varsa sonraki sayfa vardır
+    appointments = await db.appointments.find(query, APPOINTMENT_PROJECTION).sort(
+        keyset_sort(APPOINTMENT_PAGE_KEY, descending)
+    ).limit(limit + 1).to_list(limit + 1)
+    next_cursor = page_cursor(appointments, APPOINTMENT_PAGE_KEY, limit)
+    
+    return json_response({
+        "appointments": shape_appointment.many(appointments[:limit]),
+        "next_cursor": next_cursor
+    })
 
 @api_router.patch("/appointments/{appointment_id}/status")
 async def update_appointment_status(appointment_id: str, status: str, current_user: dict = Depends(get_current_user)):
+    appointment = await db.appointments.find_one({"id": appointment_id}, {"_id": 0})
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Randevu bulunamadı")
+    if not can_access_business(current_user, appointment['business_id']):
+        raise HTTPException(status_code=403, detail="Bu randevuyu güncelleme yetkiniz yok")
+    
+    was_active = appointment.get('status') != "cancelled"
+    will_be_active = status != "cancelled"
+    staff_id = appointment.get('staff_id')
+    
+    # İptal edilen randevu tekrar aktif ediliyorsa slotu yeniden kilitle
+    reserved = bool(staff_id and not was_active and will_be_active)
+    if reserved:
+        conflict = await reserve_slot(
+            db,
+            appointment['business_id'],
+            staff_id,
+            appointment['appointment_date'],
+            appointment_id,
+            appointment['time_slot'],
+            appointment['duration']
+        )
+        if conflict:
+            raise slot_conflict_error(conflict)
+    
+    # Eski durum filtresi: araya giren başka bir değişiklik sayaçları bozmasın
     result = await db.appointments.update_one(
-        {"id": appointment_id},
+        {"id": appointment_id, "status": appointment.get('status')},
         {"$set": {"status": status}}
     )
     
     if result.modified_count == 0:
+        # Araya başka bir değişiklik girdi: az önce alınan kilit randevuda kalmasın
+        if reserved:
+            await release_slot(db, staff_id, appointment['appointment_date'], appointment_id, *appointment_interval(appointment))
         raise HTTPException(status_code=404, detail="Randevu bulunamadı")
     
+    if staff_id and was_active and not will_be_active:
+        await release_slot(db, staff_id, appointment['appointment_date'], appointment_id, *appointment_interval(appointment))
+    
+    await record_status_change(db, appointment, appointment.get('status', 'confirmed'), status)
+    event_broker.publish(appointment['business_id'], APPOINTMENT_STATUS, {"id": appointment_id, "status": status})
+    
     return {"message": "Durum güncellendi"}
 
-    # ============ REPORTS API ENDPOINTS ============
-@api_router.get("/reports/overview/{business_id}")
-async def get_overview_report(business_id: str):
-    appointments = await db.appointments.find({"business_id": business_id}, {"_id": 0}).to_list(1000)
+def appointment_range_query(date_from: Optional[str], date_to: Optional[str], status: Optional[str]) -> dict:
+    """Tarih aralığı (YYYY-AA-GG) ve durum filtresi"""
+    query = {}
+    date_filter = {}
+    try:
+        if date_from:
+            date_filter["$gte"] = parse_date(date_from).isoformat()
+        if date_to:
+            date_filter["$lte"] = parse_date(date_to).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    if date_filter:
+        query["appointment_date"] = date_filter
+    if status:
+        query["status"] = status
+    return query
+
+IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS', 50000))
+BULK_STATUS_MAX = int(os.environ.get('BULK_STATUS_MAX', 10000))
+BULK_APPOINTMENT_PROJECTION = {
+    "_id": 0, "id": 1, "business_id": 1, "service_id": 1, "staff_id": 1, "customer_phone": 1,
+    "appointment_date": 1, "time_slot": 1, "duration": 1, "start_minute": 1, "end_minute": 1,
+    "price": 1, "status": 1, "created_at": 1
+}
+
+def import_appointment_doc(fields: dict, business_id: str, services: dict, staff_by_id: dict, now: datetime) -> dict:
+    """İçe aktarılan satırı doğrula ve randevu dokümanına çevir; geçersizse ValueError"""
+    fields = dict(fields)
+    status = fields.pop('status', None) or "confirmed"
+    created_at = fields.pop('created_at', None)
+    try:
+        data = AppointmentCreate(**fields)
+    except ValidationError as e:
+        raise ValueError(validation_message(e))
+    if status not in APPOINTMENT_STATUSES:
+        raise ValueError(f"Geçersiz durum: {status}")
+    try:
+        parse_date(data.appointment_date)
+    except ValueError:
+        raise ValueError("Geçersiz tarih formatı (YYYY-AA-GG)")
+    if not valid_time_slot(data.time_slot):
+        raise ValueError("Geçersiz saat formatı (SS:DD)")
+    service = services.get(data.service_id)
+    if not service:
+        raise ValueError("Hizmet bulunamadı")
+    staff = None
+    if data.staff_id:
+        staff = staff_by_id.get(data.staff_id)
+        if not staff:
+            raise ValueError("Personel bulunamadı")
+    try:
+        created = as_utc(created_at) if created_at else now
+    except (TypeError, ValueError):
+        raise ValueError("Geçersiz created_at")
+    
+    appointment = Appointment(
+        **data.model_dump(),
+        business_id=business_id,
+        service_name=service['name'],
+        staff_name=staff['name'] if staff else None,
+        duration=service['duration'],
+        price=service['price'],
+        status=status,
+        created_at=created,
+        **appointment_minutes(data.time_slot, service['duration'])
+    )
+    return appointment.model_dump()
+
+@api_router.post("/appointments/{business_id}/import")
+async def import_appointments(
+    business_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    dry_run: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    NDJSON veya CSV ile toplu randevu içe aktarma (AppointmentCreate alanları,
+    isteğe bağlı status ve created_at). Hatalı satırlar satır numarasıyla
+    raporlanır, geçerli olanlar yazılır. dry_run=true sadece doğrular.
+    """
+    if not can_access_business(current_user, business_id):
+        raise HTTPException(status_code=403, detail="Bu işletmeye randevu aktarma yetkiniz yok")
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format şunlardan biri olmalı: {', '.join(IMPORT_FORMATS)}")
+    if not await db.businesses.find_one({"id": business_id}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="İşletme bulunamadı")
     
-    from datetime import datetime, timezone
+    try:
+        rows, errors = parse_rows(await request.body(), fmt)
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="Dosya okunamadı (UTF-8 CSV veya NDJSON olmalı)")
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Tek seferde en fazla {IMPORT_MAX_ROWS} satır aktarılabilir")
+    
+    services, staff_list = await asyncio.gather(
+        db.services.find({"business_id": business_id}, {"_id": 0, "id": 1, "name": 1, "duration": 1, "price": 1}).to_list(None),
+        db.staff.find({"business_id": business_id}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    )
+    services = {s['id']: s for s in services}
+    staff_by_id = {s['id']: s for s in staff_list}
     now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
-    today_appointments = [a for a in appointments if datetime.fromisoformat(a.get('created_at', '')) >= today_start]
-    month_appointments = [a for a in appointments if datetime.fromisoformat(a.get('created_at', '')) >= month_start]
-    
-    total_revenue_today = sum(float(a.get('price', 0)) for a in today_appointments if a.get('status') in ['confirmed', 'completed'])
-    total_revenue_month = sum(float(a.get('price', 0)) for a in month_appointments if a.get('status') in ['confirmed', 'completed'])
+    candidates = []
+    for row, fields in rows:
+        try:
+            candidates.append((row, import_appointment_doc(fields, business_id, services, staff_by_id, now)))
+        except ValueError as e:
+            errors.append(row_error(row, str(e)))
+    
+    # Çakışma kontrolü için ilgili personellerin mevcut randevuları tek sorguda okunur
+    existing = []
+    staffed = [doc for _, doc in candidates if doc.get('staff_id')]
+    if staffed:
+        existing = await db.appointments.find({
+            "business_id": business_id,
+            "staff_id": {"$in": list({doc['staff_id'] for doc in staffed})},
+            "appointment_date": {
+                "$gte": min(doc['appointment_date'] for doc in staffed),
+                "$lte": max(doc['appointment_date'] for doc in staffed)
+            },
+            "status": {"$ne": "cancelled"}
+        }, BULK_APPOINTMENT_PROJECTION).to_list(None)
+    accepted, overlap_errors = check_overlaps(existing, candidates)
+    errors.extend(overlap_errors)
+    
+    inserted = []
+    if accepted and not dry_run:
+        inserted, write_errors = await insert_in_chunks(db, accepted)
+        errors.extend(write_errors)
+    if inserted:
+        await lock_appointments(db, [a for a in inserted if a['status'] != "cancelled"])
+        await record_appointments(db, inserted)
+        await db.businesses.update_one({"id": business_id}, {"$inc": {"total_appointments": len(inserted)}})
+        # Tek tek olay yerine panelin listeyi yeniden yüklemesi yeterli
+        event_broker.publish(business_id, RESYNC, {})
+        await create_log(
+            "import_appointments",
+            current_user['email'],
+            {"business_id": business_id, "inserted": len(inserted), "failed": len(errors)},
+            "info"
+        )
     
-    unique_customers = len(set(a.get('customer_phone', '') for a in appointments if a.get('customer_phone')))
+    errors.sort(key=lambda e: e['row'])
+    return {
+        "dry_run": dry_run,
+        "valid": len(accepted),
+        "inserted": len(inserted),
+        "failed": len(errors),
+        "errors": errors
+    }
+
+@api_router.post("/appointments/{business_id}/status/bulk")
+async def bulk_update_appointment_status(
+    business_id: str,
+    update: BulkStatusUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Filtreye uyan randevuların durumunu toplu değiştir
+    (örn: dünün onaylı randevularını tamamlandı yap). ids veya tarih aralığı zorunlu.
+    """
+    if not can_access_business(current_user, business_id):
+        raise HTTPException(status_code=403, detail="Bu işletmenin randevularını güncelleme yetkiniz yok")
+    if update.status not in APPOINTMENT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status şunlardan biri olmalı: {', '.join(APPOINTMENT_STATUSES)}")
+    if not update.ids and not (update.date_from or update.date_to):
+        raise HTTPException(status_code=400, detail="ids veya tarih aralığı belirtilmeli")
+    
+    query = {"business_id": business_id, **appointment_range_query(update.date_from, update.date_to, update.current_status)}
+    if update.ids:
+        query["id"] = {"$in": update.ids}
+    if update.staff_id:
+        query["staff_id"] = update.staff_id
+    appointments = await db.appointments.find(query, BULK_APPOINTMENT_PROJECTION).to_list(BULK_STATUS_MAX + 1)
+    if len(appointments) > BULK_STATUS_MAX:
+        raise HTTPException(status_code=400, detail=f"En fazla {BULK_STATUS_MAX} randevu güncellenebilir, filtreyi daraltın")
+    
+    errors = []
+    if update.ids:
+        found = {a['id'] for a in appointments}
+        errors.extend({"id": appointment_id, "error": "Randevu bulunamadı"} for appointment_id in update.ids if appointment_id not in found)
+    
+    changed, change_errors = await apply_status_changes(db, appointments, update.status)
+    errors.extend(change_errors)
+    for a in changed:
+        event_broker.publish(business_id, APPOINTMENT_STATUS, {"id": a['id'], "status": update.status})
     
     return {
-        "today_appointments": len(today_appointments),
-        "today_revenue": total_revenue_today,
-        "month_appointments": len(month_appointments),
-        "month_revenue": total_revenue_month,
-        "total_customers": unique_customers,
-        "avg_appointment_value": total_revenue_month / len(month_appointments) if month_appointments else 0
+        "matched": len(appointments),
+        "updated": len(changed),
+        "unchanged": len(appointments) - len(changed) - len(change_errors),
+        "failed": len(errors),
+        "errors": errors
     }
 
-@api_router.get("/reports/staff/{business_id}")
+# ==================== RECURRING SERIES ENDPOINTS ====================
+
+SERIES_OCCURRENCE_PROJECTION = {"_id": 0, "id": 1, "appointment_date": 1, "time_slot": 1, "duration": 1, "start_minute": 1, "end_minute": 1}
+
+@api_router.post("/appointments/{business_id}/series")
+async def create_appointment_series(
+    business_id: str,
+    series_data: SeriesCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Tekrarlayan randevu serisi (haftalık / iki haftada bir / aylık, until veya count).
+    Tüm oluşumların çakışma kontrolü tek sorgu ve tek geçişle yapılır;
+    skip_conflicts=true ise çakışan tarihler atlanır, değilse seri reddedilir.
+    Personel seçilmezse her oluşuma o gün uygun personel ayrı ayrı atanır.
+    """
+    if not can_access_business(current_user, business_id):
+        raise HTTPException(status_code=403, detail="Bu işletmeye randevu ekleme yetkiniz yok")
+    business = await get_bookable_business(business_id)
+    
+    rule = series_data.recurrence
+    try:
+        first_day = parse_date(series_data.appointment_date)
+        until = parse_date(rule.until) if rule.until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    if not valid_time_slot(series_data.time_slot):
+        raise HTTPException(status_code=400, detail="Geçersiz saat formatı (SS:DD)")
+    try:
+        days = [d.isoformat() for d in occurrence_dates(first_day, rule.frequency, until, rule.count)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    service = await db.services.find_one({"id": series_data.service_id, "business_id": business_id}, {"_id": 0})
+    if not service:
+        raise HTTPException(status_code=404, detail="Hizmet bulunamadı")
+    staff = None
+    if series_data.staff_id:
+        staff = await db.staff.find_one({"id": series_data.staff_id, "business_id": business_id}, {"_id": 0})
+        if not staff:
+            raise HTTPException(status_code=404, detail="Personel bulunamadı")
+    minutes = appointment_minutes(series_data.time_slot, service['duration'])
+    
+    # Personelin tüm oluşum günlerindeki randevuları tek sorguda
+    skipped = set()
+    if staff:
+        existing = await db.appointments.find({
+            "business_id": business_id,
+            "staff_id": staff['id'],
+            "appointment_date": {"$in": days},
+            "status": {"$ne": "cancelled"}
+        }, SERIES_OCCURRENCE_PROJECTION).to_list(None)
+        skipped = set(series_conflicts(existing, days, minutes['start_minute'], minutes['end_minute']))
+        if skipped and not series_data.skip_conflicts:
+            raise HTTPException(status_code=400, detail=f"Şu tarihlerde çakışan randevu var: {', '.join(sorted(skipped))}")
+    
+    series_id = str(uuid.uuid4())
+    fields = series_data.model_dump(exclude={"recurrence", "skip_conflicts", "appointment_date"})
+    appointments = [
+        Appointment(
+            **fields,
+            appointment_date=day,
+            business_id=business_id,
+            service_name=service['name'],
+            staff_name=staff['name'] if staff else None,
+            duration=service['duration'],
+            price=service['price'],
+            series_id=series_id,
+            **minutes
+        ).model_dump()
+        for day in days if day not in skipped
+    ]
+    
+    # Slotlar tek bulk_write ile kilitlenir; arada alınan slotlar da çakışma sayılır
+    if staff and appointments:
+        lost = await reserve_slots(db, business_id, staff['id'], appointments)
+        if lost and not series_data.skip_conflicts:
+            lost_days = [appointments[i]['appointment_date'] for i in lost]
+            await release_appointments(db, [a for i, a in enumerate(appointments) if i not in lost])
+            raise HTTPException(status_code=400, detail=f"Şu tarihlerde çakışan randevu var: {', '.join(lost_days)}")
+        skipped.update(appointments[i]['appointment_date'] for i in lost)
+        appointments = [a for i, a in enumerate(appointments) if i not in lost]
+    elif appointments:
+        # "Fark etmez": tekli randevudaki gibi her oluşuma o gün uygun personel atanır
+        assigned = []
+        for a in appointments:
+            try:
+                chosen = await assign_staff(business_id, Appointment(**a))
+            except HTTPException:
+                if not series_data.skip_conflicts:
+                    await release_appointments(db, assigned)
+                    raise HTTPException(status_code=400, detail=f"Şu tarihte uygun personel yok: {a['appointment_date']}")
+                skipped.add(a['appointment_date'])
+                continue
+            if chosen:
+                a['staff_id'], a['staff_name'] = chosen['id'], chosen['name']
+            assigned.append(a)
+        appointments = assigned
+    if not appointments:
+        raise HTTPException(status_code=400, detail="Serinin tüm tarihleri dolu")
+    
+    try:
+        await db.appointments.insert_many(appointments)
+    except Exception:
+        await release_appointments(db, appointments)
+        raise
+    for a in appointments:
+        a.pop('_id', None)
+    
+    series = {
+        "id": series_id,
+        "business_id": business_id,
+        "customer_name": series_data.customer_name,
+        "customer_phone": series_data.customer_phone,
+        "service_id": service['id'],
+        "staff_id": staff['id'] if staff else None,
+        "time_slot": series_data.time_slot,
+        "recurrence": rule.model_dump(),
+        "first_date": days[0],
+        "skipped_dates": sorted(skipped),
+        "status": "active",
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.appointment_series.insert_one(series)
+    series.pop('_id', None)
+    
+    await record_appointments(db, appointments)
+    await db.businesses.update_one({"id": business_id}, {"$inc": {"total_appointments": len(appointments)}})
+    for a in appointments:
+        event_broker.publish(business_id, APPOINTMENT_CREATED, a)
+    
+    # Müşteriye oluşum başına değil, seri için tek mesaj
+    customer_message = f"""🔁 Düzenli Randevunuz Oluşturuldu!
+
+🏢 {business['name']}
+📋 Hizmet: {service['name']}
+📅 İlk randevu: {appointments[0]['appointment_date']}
+🕐 Saat: {series_data.time_slot}
+🗓️ Toplam: {len(appointments)} randevu"""
+    if staff:
+        customer_message += f"\n👤 Personel: {staff['name']}"
+    customer_message += "\n\nGörüşmek üzere! 🙏"
+    await notification_outbox.enqueue(db, [{
+        "kind": "customer",
+        "phone": series_data.customer_phone,
+        "message": customer_message,
+        "business_id": business_id
+    }])
+    
+    return {"series": series, "appointments": appointments, "skipped_dates": sorted(skipped)}
+
+async def get_series_or_404(business_id: str, series_id: str, current_user: dict) -> dict:
+    if not can_access_business(current_user, business_id):
+        raise HTTPException(status_code=403, detail="Bu işletmenin randevularına erişim yetkiniz yok")
+    series = await db.appointment_series.find_one({"id": series_id, "business_id": business_id}, {"_id": 0})
+    if not series:
+        raise HTTPException(status_code=404, detail="Seri bulunamadı")
+    return series
+
+@api_router.get("/appointments/{business_id}/series/{series_id}")
+async def get_appointment_series(business_id: str, series_id: str, current_user: dict = Depends(get_current_user)):
+    """Seri ve tüm oluşumları (tarih sırasıyla)"""
+    series = await get_series_or_404(business_id, series_id, current_user)
+    appointments = await db.appointments.find(
+        {"business_id": business_id, "series_id": series_id}, {"_id": 0}
+    ).sort([("appointment_date", 1), ("time_slot", 1)]).to_list(None)
+    return {"series": series, "appointments": appointments}
+
+async def restore_occurrence_slot(business_id: str, staff_id: str, appointment: dict) -> Optional[dict]:
+    """
+    Başarısız taşımada bırakılan eski aralığı yeniden kilitle. Aralık bu
+    arada başka randevuya verildiyse çakışmayı loglar ve döndürür.
+    """
+    conflict = await reserve_slot(
+        db, business_id, staff_id, appointment['appointment_date'], appointment['id'],
+        appointment['time_slot'], appointment['duration']
+    )
+    if conflict:
+        logger.error(
+            f"Taşıma geri alınamadı, randevu kilitsiz kaldı: {appointment['id']} "
+            f"({appointment['appointment_date']} {appointment['time_slot']})"
+        )
+    return conflict
+
+OCCURRENCE_SLOT_LOST = "Randevunun eski saati bu sırada başka bir randevuya verildi; lütfen randevuyu kontrol edin"
+
+@api_router.patch("/appointments/{business_id}/series/{series_id}/occurrences/{appointment_id}")
+async def move_series_occurrence(
+    business_id: str,
+    series_id: str,
+    appointment_id: str,
+    move: OccurrenceMove,
+    current_user: dict = Depends(get_current_user)
+):
+    """Tek oluşumu başka gün/saate taşı (seri istisnası); diğer oluşumlar değişmez"""
+    await get_series_or_404(business_id, series_id, current_user)
+    appointment = await db.appointments.find_one(
+        {"id": appointment_id, "business_id": business_id, "series_id": series_id}, {"_id": 0}
+    )
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Randevu bulunamadı")
+    if appointment.get('status') not in ("pending", "confirmed"):
+        raise HTTPException(status_code=400, detail="Sadece bekleyen veya onaylı randevu taşınabilir")
+    try:
+        parse_date(move.appointment_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    if not valid_time_slot(move.time_slot):
+        raise HTTPException(status_code=400, detail="Geçersiz saat formatı (SS:DD)")
+    
+    staff_id = appointment.get('staff_id')
+    if staff_id:
+        # Aynı gün içinde kaydırmada eski aralık kendisiyle çakışmasın diye önce bırakılır
+        await release_slot(db, staff_id, appointment['appointment_date'], appointment_id, *appointment_interval(appointment))
+        conflict = await reserve_slot(
+            db, business_id, staff_id, move.appointment_date, appointment_id, move.time_slot, appointment['duration']
+        )
+        if conflict:
+            if await restore_occurrence_slot(business_id, staff_id, appointment):
+                raise HTTPException(status_code=409, detail=OCCURRENCE_SLOT_LOST)
+            raise slot_conflict_error(conflict)
+    
+    changes = {
+        "appointment_date": move.appointment_date,
+        "time_slot": move.time_slot,
+        "series_exception": True,
+        **appointment_minutes(move.time_slot, appointment['duration'])
+    }
+    result = await db.appointments.update_one(
+        {"id": appointment_id, "status": appointment['status']}, {"$set": changes}
+    )
+    if result.modified_count == 0:
+        if staff_id:
+            await release_slot(
+                db, staff_id, move.appointment_date, appointment_id, changes['start_minute'], changes['end_minute']
+            )
+            # Randevu hâlâ aktif ve eski yerindeyse eski aralığı geri kilitle
+            current = await db.appointments.find_one(
+                {"id": appointment_id, "status": {"$ne": "cancelled"}},
+                {"_id": 0, "appointment_date": 1, "time_slot": 1}
+            )
+            if current and (current['appointment_date'], current['time_slot']) == (
+                appointment['appointment_date'], appointment['time_slot']
+            ):
+                if await restore_occurrence_slot(business_id, staff_id, appointment):
+                    raise HTTPException(status_code=409, detail=OCCURRENCE_SLOT_LOST)
+        raise HTTPException(status_code=409, detail="Randevu bu sırada değiştirildi")
+    
+    event_broker.publish(business_id, RESYNC, {})
+    return {**appointment, **changes}
+
+@api_router.delete("/appointments/{business_id}/series/{series_id}")
+async def cancel_appointment_series(
+    business_id: str,
+    series_id: str,
+    from_date: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Serinin from_date (varsayılan bugün) ve sonrasındaki bekleyen/onaylı
+    oluşumlarını iptal et. Tek oluşum iptali için durum güncellemesi kullanılır.
+    """
+    await get_series_or_404(business_id, series_id, current_user)
+    try:
+        start = parse_date(from_date) if from_date else datetime.now(timezone.utc).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (YYYY-AA-GG)")
+    
+    appointments = await db.appointments.find({
+        "business_id": business_id,
+        "series_id": series_id,
+        "appointment_date": {"$gte": start.isoformat()},
+        "status": {"$in": ["pending", "confirmed"]}
+    }, BULK_APPOINTMENT_PROJECTION).to_list(None)
+    changed, errors = await apply_status_changes(db, appointments, "cancelled")
+    for a in changed:
+        event_broker.publish(business_id, APPOINTMENT_STATUS, {"id": a['id'], "status": "cancelled"})
+    
+    await db.appointment_series.update_one(
+        {"id": series_id},
+        {"$set": {"status": "cancelled", "cancelled_from": start.isoformat()}}
+    )
+    return {"cancelled": len(changed), "errors": errors}
+
+    # ============ REPORTS API ENDPOINTS ============
+@api_router.get("/reports/overview/{business_id}", dependencies=[Depends(profile_request)])
+async def get_overview_report(business_id: str):
+    return await overview_report(db, business_id)
+
+@api_router.get("/reports/staff/{business_id}", dependencies=[Depends(profile_request)])
 async def get_staff_report(business_id: str):
-    appointments = await db.appointments.find({"business_id": business_id, "status": {"$in": ["confirmed", "completed"]}}, {"_id": 0}).to_list(1000)
-    staff_list = await db.staff.find({"business_id": business_id}, {"_id": 0}).to_list(1000)
+    staff_list = await db.staff.find({"business_id": business_id}, {"_id": 0, "id": 1, "name": 1}).to_list(1000)
+    totals = await dimension_totals(db, business_id, "staff")
     
     staff_stats = []
     for staff in staff_list:
-        staff_appointments = [a for a in appointments if a.get('staff_id') == staff['id']]
-        revenue = sum(float(a.get('price', 0)) for a in staff_appointments)
-        
+        count, revenue = totals.get(staff['id'], (0, 0.0))
         staff_stats.append({
             "staff_id": staff['id'],
             "staff_name": staff['name'],
-            "appointment_count": len(staff_appointments),
+            "appointment_count": count,
             "total_revenue": revenue
         })
     
     return sorted(staff_stats, key=lambda x: x['total_revenue'], reverse=True)
 
-@api_router.get("/reports/services/{business_id}")
+@api_router.get("/reports/services/{business_id}", dependencies=[Depends(profile_request)])
 async def get_services_report(business_id: str):
-    appointments = await db.appointments.find({"business_id": business_id, "status": {"$in": ["confirmed", "completed"]}}, {"_id": 0}).to_list(1000)
-    services = await db.services.find({"business_id": business_id}, {"_id": 0}).to_list(1000)
+    services = await db.services.find({"business_id": business_id}, {"_id": 0, "id": 1, "name": 1}).to_list(1000)
+    totals = await dimension_totals(db, business_id, "service")
     
     service_stats = []
     for service in services:
-        service_appointments = [a for a in appointments if a.get('service_id') == service['id']]
-        revenue = sum(float(a.get('price', 0)) for a in service_appointments)
-        
+        count, revenue = totals.get(service['id'], (0, 0.0))
         service_stats.append({
             "service_id": service['id'],
             "service_name": service['name'],
-            "count": len(service_appointments),
+            "count": count,
             "revenue": revenue
         })
     
     return sorted(service_stats, key=lambda x: x['count'], reverse=True)
 
-# ==================== 🆕 SUPER ADMIN ENDPOINTS ====================
+# ==================== EXPORT ENDPOINTS ====================
 
-@api_router.get("/superadmin/stats", response_model=SuperAdminStats)
-async def get_super_admin_stats(current_user: dict = Depends(get_super_admin)):
-    """Dashboard istatistikleri"""
-    
-    # Toplam işletme
-    total_businesses = await db.businesses.count_documents({})
-    
-    # Aktif/Pasif işletmeler
-    active_businesses = await db.businesses.count_documents({"is_active": True})
-    inactive_businesses = total_businesses - active_businesses
-    
-    # Toplam kullanıcı
-    total_users = await db.users.count_documents({})
-    
-    # Toplam randevu
-    total_appointments = await db.appointments.count_documents({})
-    
-    # Bugünkü randevular
-    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-    today_appointments = await db.appointments.count_documents({"appointment_date": today})
-    
-    # Aylık gelir (bu ay oluşturulan randevuların toplamı)
-    current_month = datetime.now(timezone.utc).strftime('%Y-%m')
-    monthly_appointments = await db.appointments.find({
-        "appointment_date": {"$regex": f"^{current_month}"},
-        "status": "completed"  # 👈 Sadece tamamlananlar
-    }, {"_id": 0, "price": 1}).to_list(10000)
-    monthly_revenue = sum(a.get('price', 0) for a in monthly_appointments)
-    
-    return SuperAdminStats(
-        total_businesses=total_businesses,
-        active_businesses=active_businesses,
-        inactive_businesses=inactive_businesses,
-        total_users=total_users,
-        total_appointments=total_appointments,
-        today_appointments=today_appointments,
-        monthly_revenue=monthly_revenue
+def export_response(query: dict, sort: list, format: str, gzip: bool, batch_size: int, name: str) -> StreamingResponse:
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format şunlardan biri olmalı: {', '.join(EXPORT_FORMATS)}")
+    cursor = db.appointments.find(query, {"_id": 0}).sort(sort).batch_size(clamp_batch_size(batch_size))
+    return StreamingResponse(
+        export_stream(cursor, format, compress=gzip),
+        media_type=export_media_type(format, gzip),
+        headers=export_headers(format, name, gzip)
     )
 
-@api_router.get("/superadmin/businesses", response_model=List[BusinessDetail])
-async def get_all_businesses_detail(current_user: dict = Depends(get_super_admin)):
-    """Tüm işletmelerin detaylı listesi"""
-    
-    businesses = await db.businesses.find({}, {"_id": 0}).to_list(1000)
+@api_router.get("/appointments/{business_id}/export")
+async def export_appointments(
+    business_id: str,
+    format: str = "csv",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[str] = None,
+    gzip: bool = False,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """İşletmenin randevularını CSV / NDJSON olarak akışla indir"""
+    if not can_access_business(current_user, business_id):
+        raise HTTPException(status_code=403, detail="Bu işletmenin randevularını indirme yetkiniz yok")
+    query = {"business_id": business_id, **appointment_range_query(date_from, date_to, status)}
+    return export_response(
+        query, APPOINTMENT_EXPORT_SORT, format, gzip, batch_size, f"randevular-{business_id}"
+    )
+
+@api_router.get("/superadmin/export/appointments")
+async def export_all_appointments(
+    format: str = "csv",
+    business_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[str] = None,
+    gzip: bool = False,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+    current_user: dict = Depends(get_super_admin)
+):
+    """Platformdaki tüm randevuları CSV / NDJSON olarak akışla indir"""
+    query = appointment_range_query(date_from, date_to, status)
+    if business_id:
+        query["business_id"] = business_id
+        sort = APPOINTMENT_EXPORT_SORT
+    else:
+        # (appointment_date, status) index'i sırayı karşılar, bellekte sıralama yapılmaz
+        sort = [("appointment_date", 1)]
+    return export_response(query, sort, format, gzip, batch_size, "randevular")
+
+# ==================== 🆕 SUPER ADMIN ENDPOINTS ====================
+
+@api_router.get("/superadmin/stats", response_model=SuperAdminStats)
+async def get_super_admin_stats(refresh: bool = False, current_user: dict = Depends(get_super_admin)):
+    """Dashboard istatistikleri (arka planda hesaplanan snapshot, computed_at ile)"""
+    if refresh:
+        snapshot = await platform_stats.refresh(db)
+    else:
+        # Arka plan görevi takılırsa snapshot en fazla iki periyot bayat kalır
+        snapshot = await platform_stats.get(db, max_age=platform_stats.interval * 2)
+    return SuperAdminStats(**snapshot)
+
+MAX_BUSINESS_PAGE = 200
+
+@api_router.get("/superadmin/businesses", response_model=BusinessDetailPage)
+async def get_all_businesses_detail(
+    search: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    page: int = 1,
+    limit: int = 50,
+    current_user: dict = Depends(get_super_admin)
+):
+    """İşletmelerin detaylı listesi (arama, sıralama ve sayfalama sunucuda)"""
+    if sort not in business_stats.SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort şunlardan biri olmalı: {', '.join(business_stats.SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order 'asc' veya 'desc' olmalı")
+    page = max(1, page)
+    limit = max(1, min(limit, MAX_BUSINESS_PAGE))
+    
+    businesses, total = await business_stats.list_businesses(db, search, sort, order == "desc", page, limit)
+    now = datetime.now(timezone.utc)
     result = []
     
     for b in businesses:
-        # Datetime dönüşümleri
-        if isinstance(b.get('created_at'), str):
-            b['created_at'] = datetime.fromisoformat(b['created_at'])
-        if isinstance(b.get('subscription_expires'), str):
-            b['subscription_expires'] = datetime.fromisoformat(b['subscription_expires'])
-        if isinstance(b.get('last_login'), str):
-            b['last_login'] = datetime.fromisoformat(b['last_login'])
-        
-        # Kalan gün hesapla
-        days_remaining = (b['subscription_expires'] - datetime.now(timezone.utc)).days
-        
-        # Detaylı istatistikler
-        staff_count = await db.staff.count_documents({"business_id": b['id']})
-        service_count = await db.services.count_documents({"business_id": b['id']})
-        appointment_count = await db.appointments.count_documents({"business_id": b['id']})
-        
-        business_detail = BusinessDetail(
+        result.append(BusinessDetail(
             id=b['id'],
             name=b['name'],
             owner_email=b.get('owner_email', 'N/A'),
             created_at=b['created_at'],
             last_login=b.get('last_login'),
-            staff_count=staff_count,
-            service_count=service_count,
-            appointment_count=appointment_count,
+            staff_count=b['staff_count'],
+            service_count=b['service_count'],
+            appointment_count=b['appointment_count'],
             subscription_plan=b.get('subscription_plan', 'baslangic'),
             subscription_expires=b['subscription_expires'],
-            days_remaining=days_remaining,
+            days_remaining=(as_utc(b['subscription_expires']) - now).days,
             is_active=b.get('is_active', True)
-        )
-        
-        result.append(business_detail)
+        ))
     
-    return result
+    return BusinessDetailPage(businesses=result, total=total, page=page, limit=limit)
 
 @api_router.patch("/superadmin/business/{business_id}/suspend")
 async def suspend_business(business_id: str, suspend: bool, current_user: dict = Depends(get_super_admin)):
@@ -915,6 +1973,8 @@ async def suspend_business(business_id: str, suspend: bool, current_user: dict =
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="İşletme bulunamadı")
     
+    await invalidate_business_cache(business_id)
+    
     await create_log(
         "suspend_business" if suspend else "activate_business",
         current_user['email'],
@@ -939,13 +1999,15 @@ async def update_subscription(
         {"id": business_id},
         {"$set": {
             "subscription_plan": subscription_data.subscription_plan,
-            "subscription_expires": subscription_data.subscription_expires.isoformat()
+            "subscription_expires": as_utc(subscription_data.subscription_expires)
         }}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="İşletme bulunamadı")
     
+    await invalidate_business_cache(business_id)
+    
     await create_log(
         "update_subscription",
         current_user['email'],
@@ -979,12 +2041,18 @@ async def delete_business(business_id: str, current_user: dict = Depends(get_sup
     await db.services.delete_many({"business_id": business_id})
     await db.staff.delete_many({"business_id": business_id})
     await db.appointments.delete_many({"business_id": business_id})
+    await db.slot_locks.delete_many({"business_id": business_id})
+    await db.report_rollups.delete_many({"business_id": business_id})
+    await db.report_customers.delete_many({"business_id": business_id})
     
     # İşletme sahibinin business_id'sini temizle
     await db.users.delete_many({"business_id": business_id})
     
     # İşletmeyi sil
     await db.users.delete_many({"business_id": business_id})
+    principal_cache.invalidate_business(business_id)
+    await invalidate_business_cache(business_id, business['slug'])
+    await public_cache.invalidate(services_cache_key(business_id), staff_cache_key(business_id))
     
     await create_log(
         "delete_business",
@@ -999,23 +2067,124 @@ async def delete_business(business_id: str, current_user: dict = Depends(get_sup
         "business_name": business.get('name', 'N/A')
     }
 
+LOG_PAGE_KEY = ("timestamp", "id")
+MAX_LOG_PAGE = 500
+
+def log_moment(value: str, end: bool = False) -> datetime:
+    """ISO tarih veya zaman; sadece tarih verilmiş bitiş o günün sonunu kapsar"""
+    moment = as_utc(value)
+    if end and len(value) == 10:
+        moment += timedelta(days=1)
+    return moment
+
 @api_router.get("/superadmin/logs")
 async def get_logs(
     limit: int = 100,
-    log_type: str = None,
+    log_type: Optional[str] = None,
+    action: Optional[str] = None,
+    user_email: Optional[str] = None,
+    business_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_super_admin)
 ):
-    """Son logları getir"""
-    filter_query = {}
-    if log_type:
-        filter_query["type"] = log_type
+    """
+    Logları yeniden eskiye sayfa sayfa getir. Filtreler index'li alanlardadır;
+    sonraki sayfa için dönen next_cursor, cursor parametresiyle gönderilir.
+    """
+    limit = max(1, min(limit, MAX_LOG_PAGE))
+    query = {}
+    for field, value in (("type", log_type), ("action", action), ("user_email", user_email), ("business_id", business_id)):
+        if value:
+            query[field] = value
+    time_filter = {}
+    try:
+        if date_from:
+            time_filter["$gte"] = log_moment(date_from)
+        if date_to:
+            time_filter["$lt" if len(date_to) == 10 else "$lte"] = log_moment(date_to, end=True)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih formatı (ISO 8601)")
+    if time_filter:
+        query["timestamp"] = time_filter
+    
+    if cursor:
+        try:
+            after = decode_cursor(cursor, len(LOG_PAGE_KEY))
+            after[0] = as_utc(after[0])
+        except (InvalidCursor, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Geçersiz cursor")
+        query = {"$and": [query, keyset_filter(LOG_PAGE_KEY, after, descending=True)]}
+    
+    logs = await db.logs.find(query, {"_id": 0}).sort(
+        keyset_sort(LOG_PAGE_KEY, descending=True)
+    ).limit(limit + 1).to_list(limit + 1)
+    return {"logs": logs[:limit], "next_cursor": page_cursor(logs, LOG_PAGE_KEY, limit)}
+
+@api_router.get("/superadmin/logs/metrics")
+async def get_log_metrics(current_user: dict = Depends(get_super_admin)):
+    """Log tamponunun bekleyen / yazılan / düşürülen kayıt sayaçları"""
+    return audit_log.metrics()
+
+@api_router.get("/superadmin/notifications/metrics")
+async def get_notification_metrics(current_user: dict = Depends(get_super_admin)):
+    """Bildirim kuyruğu derinliği ve gönderim süreleri"""
+    return await notification_outbox.metrics(db)
+
+@api_router.get("/superadmin/cache/metrics")
+async def get_cache_metrics(current_user: dict = Depends(get_super_admin)):
+    """Herkese açık okuma önbelleğinin isabet / kaçırma sayaçları"""
+    return public_cache.metrics()
+
+@api_router.get("/superadmin/profiles")
+async def list_profiles(current_user: dict = Depends(get_super_admin)):
+    """Halka tampondaki profillerin özetleri (yeniden eskiye)"""
+    return {"profiles": request_profiler.list(), **request_profiler.metrics()}
+
+@api_router.get("/superadmin/profiles/{profile_id}")
+async def get_profile(profile_id: str, current_user: dict = Depends(get_super_admin)):
+    """Tek profil: kategori dağılımı ve en pahalı fonksiyonlar"""
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    return profile
+
+@api_router.delete("/superadmin/profiles")
+async def clear_profiles(current_user: dict = Depends(get_super_admin)):
+    request_profiler.clear()
+    return {"message": "Profiller temizlendi"}
+
+@api_router.post("/superadmin/reports/rebuild")
+async def rebuild_reports(business_id: Optional[str] = None, current_user: dict = Depends(get_super_admin)):
+    """Rapor sayaçlarını randevulardan yeniden oluştur (tek işletme veya tümü)"""
+    result = await rebuild_rollups(db, business_id)
+    
+    await create_log(
+        "rebuild_reports",
+        current_user['email'],
+        {"business_id": business_id, **result},
+        "admin"
+    )
     
-    logs = await db.logs.find(filter_query, {"_id": 0}).sort("timestamp", -1).limit(limit).to_list(limit)
-    return logs
+    return {"message": "Rapor sayaçları yeniden oluşturuldu", **result}
+
+MAX_MIGRATION_BATCH = 5000
 
 @api_router.post("/superadmin/migrate")
-async def migrate_existing_businesses(current_user: dict = Depends(get_super_admin)):
-    """Mevcut işletmelere varsayılan abonelik bilgileri ekle"""
+async def migrate_existing_businesses(
+    batch_size: int = 500,
+    max_batches: int = 200,
+    current_user: dict = Depends(get_super_admin)
+):
+    """
+    Mevcut işletmelere varsayılan abonelik bilgileri ekle ve string tarih
+    alanlarını BSON datetime'a çevir. Tarih dönüşümü çağrı başına en fazla
+    max_batches parti işler; "complete" false ise tekrar çağırın, kaldığı
+    yerden devam eder.
+    """
+    batch_size = max(1, min(batch_size, MAX_MIGRATION_BATCH))
+    max_batches = max(1, max_batches)
     
     businesses = await db.businesses.find({}, {"_id": 0}).to_list(1000)
     updated_count = 0
@@ -1027,7 +2196,7 @@ async def migrate_existing_businesses(current_user: dict = Depends(get_super_adm
             
             update_fields = {
                 "subscription_plan": "baslangic",
-                "subscription_expires": default_expires.isoformat(),
+                "subscription_expires": default_expires,
                 "is_active": True,
                 "total_appointments": 0,
                 "total_staff": 0,
@@ -1046,12 +2215,32 @@ async def migrate_existing_businesses(current_user: dict = Depends(get_super_adm
             
             updated_count += 1
     
+    time_fields = await migrate_time_fields(db, batch_size=batch_size, max_batches=max_batches)
+    
+    # Bugünden itibaren randevular için slot kilitlerini doldur (geçmiş günler rezervasyona kapalı)
+    today = datetime.now(timezone.utc).date().isoformat()
+    slot_lock_days = await rebuild_slot_locks(db, since_date=today)
+    await public_cache.clear()
+    
     return {
         "message": f"{updated_count} işletme güncellendi",
         "total_businesses": len(businesses),
-        "updated": updated_count
+        "updated": updated_count,
+        "slot_lock_days": slot_lock_days,
+        "time_fields": time_fields
     }
 
+# ==================== METRICS ====================
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Prometheus text formatında metrikler (METRICS_TOKEN tanımlıysa Bearer ile)"""
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get('authorization', ''), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Yetkisiz erişim")
+    return Response(app_metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 # ==================== APP SETUP ====================
 
 app.include_router(api_router)
@@ -1063,6 +2252,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# En dışta: CORS dahil tüm işlem süresi ölçülür
+app.add_middleware(MetricsMiddleware, metrics=app_metrics)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -1070,6 +2261,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_indexes():
+    await ensure_indexes(db)
+    # off: kontrol yok, warn: COLLSCAN loglanır, strict: uygulama açılmaz
+    index_verify = os.environ.get('INDEX_VERIFY', 'warn')
+    if index_verify != 'off':
+        await verify_query_plans(db, strict=index_verify == 'strict')
+
+@app.on_event("startup")
+async def startup_slot_locks():
+    # Eski randevular için bugünden itibaren kilitleri doldur
+    today = datetime.now(timezone.utc).date().isoformat()
+    await rebuild_slot_locks(db, since_date=today)
+
+@app.on_event("startup")
+async def start_notification_workers():
+    await whatsapp_gateway.start()
+    notification_outbox.start(db)
+
+@app.on_event("startup")
+async def start_last_login_tracker():
+    last_login_tracker.start(db)
+
+@app.on_event("startup")
+async def start_event_broker():
+    event_broker.start(db)
+
+@app.on_event("startup")
+async def start_platform_stats():
+    platform_stats.start(db)
+
+@app.on_event("startup")
+async def start_audit_log():
+    await ensure_log_retention(db, LOG_RETENTION_DAYS)
+    audit_log.start(db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await event_broker.stop()
+    await platform_stats.stop()
+    await last_login_tracker.stop()
+    await audit_log.stop()
+    await notification_outbox.stop()
+    await whatsapp_gateway.close()
+    await public_cache.backend.close()
+    password_hasher.shutdown()
     client.close()
\ No newline at end of file
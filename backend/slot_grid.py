@@ -0,0 +1,123 @@
+"""Personel / gün doluluk bitmap'i
+
+Gün 5 dakikalık 288 hücreye bölünür; hücre i = [5i, 5i + 5) dakika. Bir
+randevu dokunduğu tüm hücreleri doldurur (başlangıç aşağı, bitiş yukarı
+yuvarlanır). Slot kilitleri çakışmayı da hücre biriminde kontrol ettiği
+için aynı personel-günün randevu maskeleri ayrıktır; bu sayede bitmap
+slot_locks dokümanında $inc ile (atomik olarak) güncellenebilir.
+
+Mongo'da bitmap int64'e sığan 48 bitlik kelimeler halinde tutulur:
+{"0": w0, ..., "5": w5} (kelime i = 4 saatlik dilim, sıfır kelimeler yazılmaz).
+Python'da tek bir tamsayıdır; boşluk ve çakışma sorguları bit işlemleridir.
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from availability import (
+    SLOT_STEP_MINUTES,
+    Interval,
+    compute_availability,
+    day_window,
+    merge_staff_availability,
+    minutes_to_time,
+    staff_offers,
+    staff_works_on,
+)
+
+CELL_MINUTES = 5
+CELLS_PER_DAY = 24 * 60 // CELL_MINUTES
+WORD_BITS = 48
+WORD_MASK = (1 << WORD_BITS) - 1
+WORD_COUNT = -(-CELLS_PER_DAY // WORD_BITS)
+
+Grids = Dict[Tuple[str, str], int]
+
+
+def cell_span(start: int, end: int) -> Tuple[int, int]:
+    """[start, end) dakika aralığının kapladığı hücreler [ilk, son)"""
+    return max(0, start // CELL_MINUTES), min(CELLS_PER_DAY, -(-end // CELL_MINUTES))
+
+
+def span_mask(first: int, last: int) -> int:
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def interval_mask(start: int, end: int) -> int:
+    return span_mask(*cell_span(start, end))
+
+
+def to_words(mask: int) -> Dict[str, int]:
+    """Bitmap'i Mongo'da tutulan kelimelere böl (sıfır olanlar atlanır)"""
+    words = {}
+    for index in range(WORD_COUNT):
+        word = (mask >> (index * WORD_BITS)) & WORD_MASK
+        if word:
+            words[str(index)] = word
+    return words
+
+
+def from_words(words: Optional[dict]) -> int:
+    grid = 0
+    for index, word in (words or {}).items():
+        grid |= int(word) << (int(index) * WORD_BITS)
+    return grid
+
+
+def is_free(grid: int, start: int, end: int) -> bool:
+    return not grid & interval_mask(start, end)
+
+
+def free_starts(grid: int, window: Interval, duration: int, step: int = SLOT_STEP_MINUTES) -> List[int]:
+    """Pencere içinde `duration` dakikalık hizmetin başlayabileceği saatler (dakika)"""
+    open_at, close_at = window
+    return [
+        start
+        for start in range(open_at, close_at - duration + 1, step)
+        if not grid & interval_mask(start, start + duration)
+    ]
+
+
+def grid_availability(
+    business: dict,
+    staff_list: List[dict],
+    grids: Grids,
+    days: List[date],
+    duration: int,
+    service_id: Optional[str] = None,
+    step: int = SLOT_STEP_MINUTES,
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    İşletmenin tüm personeli için günler boyunca boş saatler, tek çağrıda.
+    grids: {(staff_id, tarih): bitmap}; kaydı olmayan gün boştur.
+    Çıktı availability_by_staff ile aynıdır: boş saati olmayan günler yazılmaz.
+    """
+    working_hours = business.get('working_hours') or {}
+    windows = [(day, day.isoformat(), day_window(working_hours, day)) for day in days]
+    result = {}
+    for staff in staff_list:
+        free = {}
+        if staff_offers(staff, service_id):
+            for day, day_str, window in windows:
+                if window is None or not staff_works_on(staff, day):
+                    continue
+                slots = free_starts(grids.get((staff['id'], day_str), 0), window, duration, step)
+                if slots:
+                    free[day_str] = [minutes_to_time(m) for m in slots]
+        result[staff['id']] = free
+    return result
+
+
+def grid_days(
+    business: dict,
+    staff_list: List[dict],
+    grids: Grids,
+    days: List[date],
+    duration: int,
+    service_id: Optional[str] = None,
+    step: int = SLOT_STEP_MINUTES,
+) -> List[dict]:
+    """compute_availability'nin bitmap karşılığı: her gün için en az bir personelin boş olduğu saatler"""
+    if not staff_list:
+        return compute_availability(business, [], [], days, duration, service_id, step)
+    merged = merge_staff_availability(grid_availability(business, staff_list, grids, days, duration, service_id, step))
+    return [{"date": day.isoformat(), "slots": merged.get(day.isoformat(), [])} for day in days]
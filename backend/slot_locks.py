@@ -0,0 +1,336 @@
+"""Personel / gün bazlı slot kilitleri
+
+Her (staff_id, date) için tek bir doküman tutulur ve dolu aralıklar
+`intervals` dizisinde saklanır. (staff_id, date) üzerindeki unique index ve
+"çakışan aralık yoksa ekle" koşullu upsert'i sayesinde çakışma kontrolü
+veritabanında tek round trip ile ve atomik olarak yapılır.
+
+Doküman ayrıca günün 5 dakikalık doluluk bitmap'ini (`cells`, bkz.
+slot_grid) taşır. Çakışma hücre biriminde kontrol edildiği için kilitlenen
+aralıkların maskeleri ayrıktır; tekil kilitleme / bırakma bitmap'i aynı
+güncellemede $inc ile değiştirir. Toplu yollar ($addToSet / $pull) bitmap'i
+ardından aralıklardan yeniden hesaplar (refresh_cells).
+"""
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from availability import appointment_interval, group_by_staff_day, time_to_minutes
+from slot_grid import Grids, cell_span, from_words, interval_mask, to_words
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "slot_locks"
+WRITE_CHUNK = 1000
+REFRESH_ATTEMPTS = 3
+
+
+def _interval(appointment_id: str, start: int, end: int, time_slot: str, duration: int) -> dict:
+    cell_start, cell_end = cell_span(start, end)
+    return {
+        "appointment_id": appointment_id,
+        "start": start,
+        "end": end,
+        "time_slot": time_slot,
+        "duration": duration,
+        "cell_start": cell_start,
+        "cell_end": cell_end
+    }
+
+
+def _cells_inc(start: int, end: int, sign: int = 1) -> dict:
+    words = to_words(interval_mask(start, end))
+    return {"$inc": {f"cells.{index}": sign * word for index, word in words.items()}} if words else {}
+
+
+def _no_overlap_filter(staff_id: str, day: str, start: int, end: int) -> dict:
+    cell_start, cell_end = cell_span(start, end)
+    return {
+        "staff_id": staff_id,
+        "date": day,
+        # Hücre alanı olmayan (eski) aralıklar dakika ile kontrol edilir
+        "$nor": [
+            {"intervals": {"$elemMatch": {"start": {"$lt": end}, "end": {"$gt": start}}}},
+            {"intervals": {"$elemMatch": {"cell_start": {"$lt": cell_end}, "cell_end": {"$gt": cell_start}}}},
+        ]
+    }
+
+
+def _reserve_update(business_id: str, interval: dict) -> dict:
+    return {
+        "$push": {"intervals": interval},
+        "$setOnInsert": {"business_id": business_id},
+        **_cells_inc(interval['start'], interval['end'])
+    }
+
+
+def _overlaps(existing: dict, start: int, end: int) -> bool:
+    if existing['start'] < end and existing['end'] > start:
+        return True
+    cell_start, cell_end = cell_span(start, end)
+    existing_start, existing_end = cell_span(existing['start'], existing['end'])
+    return existing_start < cell_end and existing_end > cell_start
+
+
+async def reserve_slot(
+    db,
+    business_id: str,
+    staff_id: str,
+    day: str,
+    appointment_id: str,
+    time_slot: str,
+    duration: int,
+) -> Optional[dict]:
+    """
+    Aralığı kilitle. Başarılıysa None, çakışma varsa çakışan aralığı döndürür.
+    Doküman varsa ama filtre eşleşmiyorsa upsert unique index'e takılır;
+    bu durum çakışma demektir. İlk dokümanı iki istek aynı anda oluşturmaya
+    çalışırsa kaybeden upsert'siz bir kez daha dener.
+    """
+    start = time_to_minutes(time_slot)
+    end = start + duration
+    update = _reserve_update(business_id, _interval(appointment_id, start, end, time_slot, duration))
+    slot_filter = _no_overlap_filter(staff_id, day, start, end)
+
+    try:
+        await db[COLLECTION].update_one(slot_filter, update, upsert=True)
+        return None
+    except DuplicateKeyError:
+        pass
+
+    result = await db[COLLECTION].update_one(slot_filter, update)
+    if result.matched_count:
+        return None
+
+    lock = await db[COLLECTION].find_one({"staff_id": staff_id, "date": day}, {"_id": 0, "intervals": 1})
+    for existing in (lock or {}).get('intervals', []):
+        if _overlaps(existing, start, end):
+            return existing
+    return {"start": start, "end": end, "time_slot": time_slot, "duration": duration}
+
+
+async def reserve_slots(db, business_id: str, staff_id: str, appointments: List[dict]) -> List[int]:
+    """
+    Aynı personelin birden çok randevusunu tek bulk_write ile kilitle.
+    Kilitlenemeyen (çakışan) randevuların indekslerini döndürür. Upsert'i
+    unique index'e takılanlar ilk doküman yarışı da olabileceği için
+    reserve_slot ile tek tek bir kez daha denenir.
+    """
+    operations = []
+    for a in appointments:
+        start, end = appointment_interval(a)
+        operations.append(UpdateOne(
+            _no_overlap_filter(staff_id, a['appointment_date'], start, end),
+            _reserve_update(business_id, _interval(a['id'], start, end, a['time_slot'], a['duration'])),
+            upsert=True
+        ))
+    if not operations:
+        return []
+    try:
+        await db[COLLECTION].bulk_write(operations, ordered=False)
+        return []
+    except BulkWriteError as e:
+        failed = sorted(error['index'] for error in e.details.get('writeErrors', []))
+
+    conflicts = []
+    for index in failed:
+        a = appointments[index]
+        if await reserve_slot(db, business_id, staff_id, a['appointment_date'], a['id'], a['time_slot'], a['duration']):
+            conflicts.append(index)
+    return conflicts
+
+
+async def release_slot(
+    db,
+    staff_id: str,
+    day: str,
+    appointment_id: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    """
+    Randevunun kilidini bırak. Aralık (start, end) verilirse bitmap aynı
+    güncellemede düşülür; verilmezse ya da kayıtlı aralık farklıysa bitmap
+    yeniden hesaplanır.
+    """
+    if start is not None:
+        cell_start, cell_end = cell_span(start, end)
+        result = await db[COLLECTION].update_one(
+            {
+                "staff_id": staff_id,
+                "date": day,
+                "intervals": {"$elemMatch": {"appointment_id": appointment_id, "cell_start": cell_start, "cell_end": cell_end}},
+                "overlapping": {"$ne": True}
+            },
+            {"$pull": {"intervals": {"appointment_id": appointment_id}}, **_cells_inc(start, end, -1)}
+        )
+        if result.matched_count:
+            return
+    result = await db[COLLECTION].update_one(
+        {"staff_id": staff_id, "date": day, "intervals.appointment_id": appointment_id},
+        {"$pull": {"intervals": {"appointment_id": appointment_id}}}
+    )
+    if result.matched_count:
+        await refresh_cells(db, [(staff_id, day)])
+
+
+def _normalized(intervals: List[dict]) -> dict:
+    """
+    Aralıkları güncel biçime getir (randevu başına tek kayıt) ve bitmap'i hesapla.
+    Toplu içe aktarma çakışma kontrolü yapmadığı için maskeler örtüşebilir;
+    o zaman overlapping işaretlenir ve bırakmalar $inc yerine yeniden hesaplar.
+    """
+    seen = {}
+    grid = 0
+    overlapping = False
+    for existing in intervals:
+        if existing['appointment_id'] in seen:
+            continue
+        interval = _interval(
+            existing['appointment_id'], existing['start'], existing['end'], existing['time_slot'], existing['duration']
+        )
+        seen[existing['appointment_id']] = interval
+        mask = interval_mask(interval['start'], interval['end'])
+        overlapping = overlapping or bool(grid & mask)
+        grid |= mask
+    return {"intervals": list(seen.values()), "cells": to_words(grid), "overlapping": overlapping}
+
+
+async def refresh_cells(db, keys: Iterable[Tuple[str, str]]):
+    """
+    (staff_id, date) dokümanlarının bitmap'ini aralıklardan yeniden hesapla.
+    Yazma, okunan aralık dizisi değişmediyse yapılır (iyimser eşzamanlılık);
+    arada kilitleme olduysa yeniden okunup tekrar denenir.
+    """
+    keys = list(dict.fromkeys(keys))
+    for chunk_start in range(0, len(keys), WRITE_CHUNK):
+        chunk = keys[chunk_start:chunk_start + WRITE_CHUNK]
+        for _ in range(REFRESH_ATTEMPTS):
+            docs = await db[COLLECTION].find(
+                {"$or": [{"staff_id": staff_id, "date": day} for staff_id, day in chunk]},
+                {"_id": 0, "staff_id": 1, "date": 1, "intervals": 1}
+            ).to_list(None)
+            if not docs:
+                break
+            operations = [
+                UpdateOne(
+                    {"staff_id": doc['staff_id'], "date": doc['date'], "intervals": doc.get('intervals', [])},
+                    {"$set": _normalized(doc.get('intervals', []))}
+                )
+                for doc in docs
+            ]
+            result = await db[COLLECTION].bulk_write(operations, ordered=False)
+            # Yeniden hesaplama idempotent: eşleşmeyen varsa tüm parça tekrar okunur
+            if result.matched_count == len(operations):
+                break
+        else:
+            logger.warning(f"Slot bitmap'i güncellenemedi (eşzamanlı değişiklik): {len(chunk)} personel-gün")
+
+
+async def rebuild_slot_locks(db, since_date: Optional[str] = None) -> int:
+    """
+    Kilit dokümanlarını mevcut randevulardan doldur (eski kayıtlar için).
+    $addToSet kullanıldığı için tekrar çalıştırmak güvenlidir. Randevular
+    cursor ile WRITE_CHUNK'lık gruplar halinde okunur; bellek kullanımı
+    randevu sayısıyla büyümez. Kilitlenen personel-gün sayısını döndürür.
+    """
+    query = {"staff_id": {"$ne": None}, "status": {"$ne": "cancelled"}}
+    if since_date:
+        query["appointment_date"] = {"$gte": since_date}
+
+    cursor = db.appointments.find(
+        query,
+        {"_id": 0, "id": 1, "business_id": 1, "staff_id": 1, "appointment_date": 1, "time_slot": 1, "duration": 1,
+         "start_minute": 1, "end_minute": 1},
+        batch_size=WRITE_CHUNK
+    )
+    days = set()
+    batch = []
+    async for appointment in cursor:
+        batch.append(appointment)
+        if len(batch) >= WRITE_CHUNK:
+            days.update(await lock_appointments(db, batch))
+            batch = []
+    if batch:
+        days.update(await lock_appointments(db, batch))
+    return len(days)
+
+
+async def lock_appointments(db, appointments: List[dict]) -> List[Tuple[str, str]]:
+    """Randevuların aralıklarını (staff_id, date) kilitlerine ekle; kilitlenen (staff_id, date)'leri döndür"""
+    grouped = group_by_staff_day(a for a in appointments if a.get('staff_id'))
+    operations = []
+    for (staff_id, day), items in grouped.items():
+        intervals = []
+        for a in items:
+            start, end = appointment_interval(a)
+            intervals.append(_interval(a['id'], start, end, a['time_slot'], a['duration']))
+        operations.append(UpdateOne(
+            {"staff_id": staff_id, "date": day},
+            {
+                "$addToSet": {"intervals": {"$each": intervals}},
+                "$setOnInsert": {"business_id": items[0]['business_id']}
+            },
+            upsert=True
+        ))
+    for start in range(0, len(operations), WRITE_CHUNK):
+        await db[COLLECTION].bulk_write(operations[start:start + WRITE_CHUNK], ordered=False)
+    await refresh_cells(db, grouped.keys())
+    return list(grouped)
+
+
+async def release_appointments(db, appointments: List[dict]):
+    """
+    Birden çok randevunun kilidini bırak: randevu başına aralığı ve bitmap'i
+    birlikte düşen koşullu güncelleme. Eşleşmeyenler olursa (eski kayıt,
+    aralık farkı) ilgili günler $pull edilip bitmap'leri yeniden hesaplanır.
+    """
+    grouped = group_by_staff_day(a for a in appointments if a.get('staff_id'))
+    operations = []
+    for (staff_id, day), items in grouped.items():
+        for a in items:
+            start, end = appointment_interval(a)
+            cell_start, cell_end = cell_span(start, end)
+            operations.append(UpdateOne(
+                {
+                    "staff_id": staff_id,
+                    "date": day,
+                    "intervals": {"$elemMatch": {"appointment_id": a['id'], "cell_start": cell_start, "cell_end": cell_end}},
+                    "overlapping": {"$ne": True}
+                },
+                {"$pull": {"intervals": {"appointment_id": a['id']}}, **_cells_inc(start, end, -1)}
+            ))
+    matched = 0
+    for start in range(0, len(operations), WRITE_CHUNK):
+        result = await db[COLLECTION].bulk_write(operations[start:start + WRITE_CHUNK], ordered=False)
+        matched += result.matched_count
+    if matched == len(operations):
+        return
+
+    fallback = [
+        UpdateOne(
+            {"staff_id": staff_id, "date": day},
+            {"$pull": {"intervals": {"appointment_id": {"$in": [a['id'] for a in items]}}}}
+        )
+        for (staff_id, day), items in grouped.items()
+    ]
+    for start in range(0, len(fallback), WRITE_CHUNK):
+        await db[COLLECTION].bulk_write(fallback[start:start + WRITE_CHUNK], ordered=False)
+    await refresh_cells(db, grouped.keys())
+
+
+async def load_grids(
+    db,
+    business_id: str,
+    date_from: str,
+    date_to: str,
+    staff_id: Optional[str] = None,
+) -> Grids:
+    """İşletmenin tarih aralığındaki tüm personel-gün bitmap'leri tek sorguda: {(staff_id, tarih): bitmap}"""
+    query: Dict[str, object] = {"business_id": business_id, "date": {"$gte": date_from, "$lte": date_to}}
+    if staff_id:
+        query["staff_id"] = staff_id
+    locks = await db[COLLECTION].find(query, {"_id": 0, "staff_id": 1, "date": 1, "cells": 1}).to_list(None)
+    return {(lock['staff_id'], lock['date']): from_words(lock.get('cells')) for lock in locks}
@@ -0,0 +1,132 @@
+"""Tarih/saat alanları
+
+Zaman damgaları (created_at, subscription_expires, last_login, log
+timestamp, bildirim kuyruğu zamanları) BSON datetime olarak saklanır. Mongo istemcisi tz_aware=True
+ile açıldığı için okunan değerler zaten UTC aware datetime'dır; uçlarda
+doküman başına dönüşüm gerekmez. Randevulara ayrıca dakika cinsinden
+start_minute / end_minute yazılır.
+
+Eski ISO string kayıtlar migrate_time_fields ile partiler halinde
+dönüştürülür. Kaldığı yer `migrations` koleksiyonunda tutulduğu için
+işlem uygulama çalışırken ve parça parça yürütülebilir. Dönüşüm
+bitene kadar aralık sorguları since_filter / until_filter ile iki biçimi
+de eşler.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from availability import time_to_minutes
+
+TIME_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "users": ("created_at", "last_login"),
+    "businesses": ("created_at", "subscription_expires", "last_login"),
+    "services": ("created_at",),
+    "staff": ("created_at",),
+    "appointments": ("created_at",),
+    "logs": ("timestamp",),
+    "notification_outbox": ("created_at", "next_attempt_at", "locked_until", "sent_at"),
+}
+MIGRATIONS = "migrations"
+MIGRATION_ID = "native_time_fields"
+
+
+def as_utc(value) -> Optional[datetime]:
+    """datetime veya eski ISO string'i UTC aware datetime'a çevir"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def since_filter(field: str, moment: datetime) -> dict:
+    """field >= moment; dönüştürülmemiş string kayıtlar da eşlenir"""
+    return {"$or": [
+        {field: {"$gte": moment}},
+        {field: {"$type": "string", "$gte": moment.astimezone(timezone.utc).isoformat()}},
+    ]}
+
+
+def until_filter(field: str, moment: datetime) -> dict:
+    """field <= moment; dönüştürülmemiş string kayıtlar da eşlenir"""
+    return {"$or": [
+        {field: {"$lte": moment}},
+        {field: {"$type": "string", "$lte": moment.astimezone(timezone.utc).isoformat()}},
+    ]}
+
+
+def appointment_minutes(time_slot: str, duration: int) -> dict:
+    start = time_to_minutes(time_slot)
+    return {"start_minute": start, "end_minute": start + int(duration)}
+
+
+def document_updates(collection: str, doc: dict) -> list:
+    """
+    Tek dokümanın dönüşüm işlemleri. Her alan kendi eski değeriyle
+    koşullanır; arada yazılmış yeni (datetime) değer ezilmez.
+    """
+    ops = []
+    for field in TIME_FIELDS[collection]:
+        value = doc.get(field)
+        if isinstance(value, str):
+            ops.append(UpdateOne(
+                {"_id": doc['_id'], field: value},
+                {"$set": {field: as_utc(value) if value else None}}
+            ))
+    if collection == "appointments" and "start_minute" not in doc and doc.get('time_slot'):
+        ops.append(UpdateOne(
+            {"_id": doc['_id'], "start_minute": {"$exists": False}, "time_slot": doc['time_slot']},
+            {"$set": appointment_minutes(doc['time_slot'], doc.get('duration') or 0)}
+        ))
+    return ops
+
+
+async def migrate_time_fields(db, batch_size: int = 500, max_batches: Optional[int] = None) -> dict:
+    """
+    Koleksiyonları _id sırasıyla partiler halinde dönüştür.
+    max_batches dolunca durur; tekrar çağrıldığında kaldığı yerden devam eder.
+    """
+    state = await db[MIGRATIONS].find_one({"_id": MIGRATION_ID}) or {"collections": {}}
+    progress = state.get('collections', {})
+    batches = 0
+
+    for collection, fields in TIME_FIELDS.items():
+        entry = progress.setdefault(collection, {"last_id": None, "scanned": 0, "updated": 0, "done": False})
+        if entry['done']:
+            continue
+        projection = {field: 1 for field in fields}
+        if collection == "appointments":
+            projection.update({"time_slot": 1, "duration": 1, "start_minute": 1})
+
+        while max_batches is None or batches < max_batches:
+            query = {"_id": {"$gt": entry['last_id']}} if entry['last_id'] is not None else {}
+            docs = await db[collection].find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            batches += 1
+            if not docs:
+                entry['done'] = True
+            else:
+                ops = [op for doc in docs for op in document_updates(collection, doc)]
+                if ops:
+                    result = await db[collection].bulk_write(ops, ordered=False)
+                    entry['updated'] += result.modified_count
+                entry['scanned'] += len(docs)
+                entry['last_id'] = docs[-1]['_id']
+            await db[MIGRATIONS].update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {f"collections.{collection}": entry, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+            if entry['done']:
+                break
+
+    complete = all(progress.get(collection, {}).get('done') for collection in TIME_FIELDS)
+    return {
+        "complete": complete,
+        "collections": {
+            name: {k: v for k, v in entry.items() if k != 'last_id'} for name, entry in progress.items()
+        }
+    }
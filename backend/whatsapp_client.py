@@ -0,0 +1,133 @@
+"""WhatsApp gateway istemcisi
+
+Uygulama boyunca tek bir bağlantı havuzlu httpx.AsyncClient kullanılır
+(keep-alive açık). Startup'ta oluşturulur, shutdown'da kapatılır.
+Hatırlatma gibi toplu gönderimler için gateway'in /send-bulk ucu kullanılır.
+Gateway toplu mesajları sırayla gönderdiği için okuma süresi mesaj sayısıyla
+ölçeklenir. Mesajlar (tekli gönderim dahil) id'siyle (outbox id) gider ve
+gateway aynı id'yi ikinci kez göndermez. İstek gittikten sonra yanıt
+beklerken zaman aşımı olursa sonuç "bilinmiyor" (None) döner,
+"gönderilemedi" sayılmaz.
+observer verilirse her çağrının yolu, sonucu (HTTP durum kodu ya da
+"error") ve süresi bildirilir.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# (başarılı_mı, hata); başarılı_mı None ise mesajın gidip gitmediği bilinmiyor
+SendResult = Tuple[Optional[bool], Optional[str]]
+Observer = Callable[[str, str, float], None]
+
+
+class WhatsAppGateway:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:3001",
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_connections_per_host: int = 10,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        bulk_message_timeout: float = 2.0,
+        observer: Optional[Observer] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.bulk_message_timeout = bulk_message_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.observer = observer
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, path: str, payload: dict, timeout: Optional[httpx.Timeout] = None) -> httpx.Response:
+        # Startup çalışmadıysa (testler, script'ler) ilk kullanımda oluştur
+        if self._client is None:
+            await self.start()
+
+        url = f"{self.base_url}{path}"
+        host = urlsplit(url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_connections_per_host))
+        async with limit:
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                response = await self._client.post(url, json=payload, timeout=timeout or self.timeout)
+                outcome = str(response.status_code)
+                return response
+            finally:
+                if self.observer is not None:
+                    self.observer(path, outcome, time.perf_counter() - started)
+
+    async def send(self, phone: str, message: str, message_id: Optional[str] = None) -> Optional[bool]:
+        """Tek mesaj gönder; yanıt zaman aşımına uğradıysa sonuç bilinmiyor (None)"""
+        try:
+            response = await self._post(
+                "/api/whatsapp/send", {"id": message_id, "phone": phone, "message": message}
+            )
+            if response.status_code == 200:
+                logger.info(f"WhatsApp mesajı gönderildi: {phone}")
+                return True
+            logger.warning(f"WhatsApp mesajı gönderilemedi: {phone} - {response.text}")
+            return False
+        except (httpx.ReadTimeout, httpx.WriteTimeout) as e:
+            # İstek gateway'e ulaştı, mesaj gönderilmiş olabilir
+            logger.warning(f"WhatsApp yanıtı alınamadı: {phone} - {str(e)}")
+            return None
+        except Exception as e:
+            logger.warning(f"WhatsApp hatası (numara kayıtlı olmayabilir): {phone} - {str(e)}")
+            return False
+
+    async def send_bulk(self, messages: List[dict]) -> List[SendResult]:
+        """
+        Birden fazla mesajı tek istekle gönder
+        messages: [{"id": "...", "phone": "...", "message": "..."}, ...]
+        Sonuç sırası girişle aynıdır: [(başarılı_mı, hata), ...]
+        """
+        if not messages:
+            return []
+        payload = {"messages": [
+            {"id": m.get("id"), "phone": m["phone"], "message": m["message"]} for m in messages
+        ]}
+        timeout = httpx.Timeout(
+            self.timeout.read + self.bulk_message_timeout * len(messages), connect=self.timeout.connect
+        )
+        try:
+            response = await self._post("/api/whatsapp/send-bulk", payload, timeout)
+        except (httpx.ReadTimeout, httpx.WriteTimeout) as e:
+            # İstek gateway'e ulaştı, mesajlar gönderilmiş olabilir
+            logger.warning(f"WhatsApp toplu gönderim yanıtı alınamadı: {str(e)}")
+            return [(None, f"Yanıt zaman aşımı: {str(e)}")] * len(messages)
+        except Exception as e:
+            logger.warning(f"WhatsApp toplu gönderim hatası: {str(e)}")
+            return [(False, str(e))] * len(messages)
+
+        if response.status_code != 200:
+            logger.warning(f"WhatsApp toplu gönderim başarısız: {response.text}")
+            return [(False, response.text)] * len(messages)
+
+        results = response.json().get("results", [])
+        if len(results) != len(messages):
+            return [(False, "Gateway eksik sonuç döndürdü")] * len(messages)
+        return [(bool(r.get("success")), r.get("error")) for r in results]
@@ -3,39 +3,69 @@ import axios from 'axios';
 import { Card } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
-import { Calendar, Clock, User, Phone, DollarSign, RefreshCw } from 'lucide-react';
+import { Calendar, Clock, User, Phone, DollarSign, RefreshCw, Download } from 'lucide-react';
 import { toast } from 'sonner';
 import { format } from 'date-fns';
 import { tr } from 'date-fns/locale';
+import { useBusinessEvents } from '@/hooks/use-business-events';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const PAGE_SIZE = 50;
+
+// Sunucudaki sıralama ile aynı: (tarih, saat, id) azalan
+const compareAppointments = (a, b) =>
+  b.appointment_date.localeCompare(a.appointment_date) ||
+  b.time_slot.localeCompare(a.time_slot) ||
+  b.id.localeCompare(a.id);
 
 const AppointmentsView = ({ businessId }) => {
   const [appointments, setAppointments] = useState([]);
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all');
   const [lastRefresh, setLastRefresh] = useState(new Date());
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const matchesFilter = (appointment) => filter === 'all' || appointment.status === filter;
 
   useEffect(() => {
     loadAppointments();
-  }, [businessId]);
+  }, [businessId, filter]);
 
-  useEffect(() => {
-    const interval = setInterval(() => {
-      loadAppointments(true);
+  // Randevu değişiklikleri sunucudan push edilir; listeyi yerinde güncelle
+  useBusinessEvents(businessId, {
+    onReconnect: () => loadAppointments(true),
+    onEvent: (type, data) => {
+      if (type === 'appointment.created') {
+        if (!matchesFilter(data)) return;
+        setAppointments((prev) => [data, ...prev.filter((a) => a.id !== data.id)].sort(compareAppointments));
+      } else if (type === 'appointment.status') {
+        setAppointments((prev) => prev
+          .map((a) => (a.id === data.id ? { ...a, status: data.status } : a))
+          .filter(matchesFilter));
+      } else if (type === 'resync') {
+        loadAppointments(true);
+      }
       setLastRefresh(new Date());
-    }, 30000);
+    }
+  });
 
-    return () => clearInterval(interval);
-  }, [businessId]);
+  const fetchPage = (cursor) => axios.get(`${API}/appointments/${businessId}`, {
+    params: {
+      limit: PAGE_SIZE,
+      status: filter === 'all' ? undefined : filter,
+      cursor: cursor || undefined
+    }
+  });
 
   const loadAppointments = async (silent = false) => {
     if (!silent) setLoading(true);
 
     try {
-      const response = await axios.get(`${API}/appointments/${businessId}`);
-      setAppointments(response.data);
+      const response = await fetchPage(null);
+      setAppointments(response.data.appointments);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       if (!silent) toast.error('Randevular yüklenemedi');
     } finally {
@@ -43,6 +73,40 @@ const AppointmentsView = ({ businessId }) => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await fetchPage(nextCursor);
+      setAppointments((prev) => [
+        ...prev,
+        ...response.data.appointments.filter((a) => !prev.some((p) => p.id === a.id))
+      ]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error('Randevular yüklenemedi');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Sunucu dosyayı akışla üretir; seçili durum filtresi uygulanır
+  const exportCsv = async () => {
+    try {
+      const response = await axios.get(`${API}/appointments/${businessId}/export`, {
+        params: { format: 'csv', status: filter === 'all' ? undefined : filter },
+        responseType: 'blob'
+      });
+      const url = URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `randevular-${format(new Date(), 'yyyy-MM-dd')}.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      toast.error('Randevular indirilemedi');
+    }
+  };
+
   const updateStatus = async (appointmentId, newStatus) => {
     try {
       await axios.patch(`${API}/appointments/${appointmentId}/status?status=${newStatus}`);
@@ -53,10 +117,8 @@ const AppointmentsView = ({ businessId }) => {
     }
   };
 
-  const filteredAppointments = appointments.filter(apt => {
-    if (filter === 'all') return true;
-    return apt.status === filter;
-  });
+  // Durum filtresi sunucuda uygulanır
+  const filteredAppointments = appointments;
 
   const getStatusColor = (status) => {
     switch (status) {
@@ -99,15 +161,26 @@ const AppointmentsView = ({ businessId }) => {
           </p>
         </div>
 
-        <Button
-          variant="outline"
-          size="sm"
-          onClick={() => loadAppointments()}
-          className="gap-2"
-        >
-          <RefreshCw className="h-4 w-4" />
-          Yenile
-        </Button>
+        <div className="flex gap-2">
+          <Button
+            variant="outline"
+            size="sm"
+            onClick={exportCsv}
+            className="gap-2"
+          >
+            <Download className="h-4 w-4" />
+            CSV indir
+          </Button>
+          <Button
+            variant="outline"
+            size="sm"
+            onClick={() => loadAppointments()}
+            className="gap-2"
+          >
+            <RefreshCw className="h-4 w-4" />
+            Yenile
+          </Button>
+        </div>
       </div>
 
       {/* FILTER BUTTONS */}
@@ -121,11 +194,6 @@ const AppointmentsView = ({ businessId }) => {
             className="text-xs sm:text-sm"
           >
             {status === 'all' ? 'Tümü' : getStatusText(status)}
-            {status !== 'all' && (
-              <Badge variant="secondary" className="ml-2">
-                {appointments.filter(a => a.status === status).length}
-              </Badge>
-            )}
           </Button>
         ))}
       </div>
@@ -247,6 +315,17 @@ const AppointmentsView = ({ businessId }) => {
               </div>
             </Card>
           ))}
+
+          {nextCursor && (
+            <Button
+              variant="outline"
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full"
+            >
+              {loadingMore ? 'Yükleniyor...' : 'Daha fazla göster'}
+            </Button>
+          )}
         </div>
       )}
     </div>
@@ -3,26 +3,38 @@ import axios from 'axios';
 import { Bell } from 'lucide-react';
 import { formatDistanceToNow } from 'date-fns';
 import { tr } from 'date-fns/locale';
+import { useBusinessEvents } from '@/hooks/use-business-events';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const NotificationBell = ({ businessId }) => {
     const [notifications, setNotifications] = useState([]);
-    const [unreadCount, setUnreadCount] = useState(0);
     const [isOpen, setIsOpen] = useState(false);
     const dropdownRef = useRef(null);
 
+    const unreadCount = notifications.length;
+
     useEffect(() => {
         if (businessId) {
             loadNotifications();
-
-            // Her 30 saniyede yenile
-            const interval = setInterval(loadNotifications, 30000);
-            return () => clearInterval(interval);
         }
     }, [businessId]);
 
+    // Yeni randevular sunucudan push edilir (polling yok)
+    useBusinessEvents(businessId, {
+        onReconnect: loadNotifications,
+        onEvent: (type, data) => {
+            if (type === 'appointment.created' && data.status === 'confirmed') {
+                setNotifications((prev) => [data, ...prev.filter((n) => n.id !== data.id)].slice(0, 100));
+            } else if (type === 'appointment.status' && data.status !== 'confirmed') {
+                setNotifications((prev) => prev.filter((n) => n.id !== data.id));
+            } else if (type === 'resync') {
+                loadNotifications();
+            }
+        }
+    });
+
     // Dışarı tıklamayı dinle
     useEffect(() => {
         const handleClickOutside = (event) => {
@@ -42,7 +54,6 @@ const NotificationBell = ({ businessId }) => {
                 headers: { Authorization: `Bearer ${token}` }
             });
             setNotifications(response.data);
-            setUnreadCount(response.data.length);
         } catch (error) {
             console.error('Bildirim yüklenemedi:', error);
         }
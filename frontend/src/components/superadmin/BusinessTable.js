@@ -1,9 +1,20 @@
 import React from 'react';
 import { Card } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
-import { Building2 } from 'lucide-react';
+import { Input } from '@/components/ui/input';
+import { Building2, Search } from 'lucide-react';
 
-const BusinessTable = ({ businesses, onSuspend, onUpdateSubscription, onDelete }) => {
+const SORT_OPTIONS = [
+    { value: 'created_at', label: 'Kayıt tarihi' },
+    { value: 'name', label: 'İşletme adı' },
+    { value: 'subscription_expires', label: 'Abonelik bitişi' },
+    { value: 'last_login', label: 'Son giriş' },
+    { value: 'appointment_count', label: 'Randevu sayısı' },
+    { value: 'staff_count', label: 'Personel sayısı' },
+    { value: 'service_count', label: 'Hizmet sayısı' }
+];
+
+const BusinessTable = ({ businesses, total, pageSize, query, onQueryChange, onSuspend, onUpdateSubscription, onDelete }) => {
     if (!businesses) {
         return (
             <Card className="overflow-hidden">
@@ -20,8 +31,36 @@ const BusinessTable = ({ businesses, onSuspend, onUpdateSubscription, onDelete }
             <div className="px-6 py-4 border-b border-slate-200 bg-white">
                 <h2 className="text-lg font-semibold text-slate-900">Tüm İşletmeler</h2>
                 <p className="text-sm text-slate-600 mt-1">
-                    Sistemdeki tüm işletmeleri yönetin ({businesses.length} işletme)
+                    Sistemdeki tüm işletmeleri yönetin ({total} işletme)
                 </p>
+
+                {/* ARAMA + SIRALAMA */}
+                <div className="flex flex-col sm:flex-row gap-2 mt-4">
+                    <div className="relative flex-1">
+                        <Search className="h-4 w-4 text-slate-400 absolute left-3 top-1/2 -translate-y-1/2" />
+                        <Input
+                            value={query.search}
+                            onChange={(e) => onQueryChange({ search: e.target.value })}
+                            placeholder="İşletme adı, URL veya e-posta ara..."
+                            className="pl-9"
+                        />
+                    </div>
+                    <select
+                        value={query.sort}
+                        onChange={(e) => onQueryChange({ sort: e.target.value })}
+                        className="h-10 rounded-md border border-slate-200 bg-white px-3 text-sm"
+                    >
+                        {SORT_OPTIONS.map((option) => (
+                            <option key={option.value} value={option.value}>{option.label}</option>
+                        ))}
+                    </select>
+                    <Button
+                        variant="outline"
+                        onClick={() => onQueryChange({ order: query.order === 'desc' ? 'asc' : 'desc' })}
+                    >
+                        {query.order === 'desc' ? '↓ Azalan' : '↑ Artan'}
+                    </Button>
+                </div>
             </div>
 
             <div className="overflow-x-auto">
@@ -175,6 +214,33 @@ const BusinessTable = ({ businesses, onSuspend, onUpdateSubscription, onDelete }
                 </table>
             </div>
 
+            {/* SAYFALAMA */}
+            {total > pageSize && (
+                <div className="flex items-center justify-between px-6 py-4 border-t border-slate-200">
+                    <p className="text-sm text-slate-600">
+                        Sayfa {query.page} / {Math.ceil(total / pageSize)}
+                    </p>
+                    <div className="flex gap-2">
+                        <Button
+                            size="sm"
+                            variant="outline"
+                            disabled={query.page <= 1}
+                            onClick={() => onQueryChange({ page: query.page - 1 })}
+                        >
+                            Önceki
+                        </Button>
+                        <Button
+                            size="sm"
+                            variant="outline"
+                            disabled={query.page * pageSize >= total}
+                            onClick={() => onQueryChange({ page: query.page + 1 })}
+                        >
+                            Sonraki
+                        </Button>
+                    </div>
+                </div>
+            )}
+
             {/* BOŞ DURUM */}
             {businesses.length === 0 && (
                 <div className="text-center py-12">
@@ -88,6 +88,11 @@ const Dashboard = ({ stats }) => {
                             ₺{stats.monthly_revenue?.toFixed(2) || '0.00'}
                         </p>
                         <p className="text-xs text-slate-500 mt-1">Bu ay</p>
+                        {stats.computed_at && (
+                            <p className="text-xs text-slate-400">
+                                Güncellendi: {new Date(stats.computed_at).toLocaleTimeString('tr-TR', { hour: '2-digit', minute: '2-digit' })}
+                            </p>
+                        )}
                     </div>
                     <div className="h-12 w-12 bg-amber-100 rounded-lg flex items-center justify-center">
                         <DollarSign className="h-6 w-6 text-amber-600" />
@@ -9,22 +9,33 @@ const API = `${BACKEND_URL}/api`;
 
 const Logs = () => {
     const [logs, setLogs] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [filter, setFilter] = useState('all'); // all, admin, info, error
 
     useEffect(() => {
         loadLogs();
     }, [filter]);
 
+    const fetchLogs = async (cursor) => {
+        const token = localStorage.getItem('token');
+        const params = {};
+        if (filter !== 'all') params.log_type = filter;
+        if (cursor) params.cursor = cursor;
+        const response = await axios.get(`${API}/superadmin/logs`, {
+            params,
+            headers: { Authorization: `Bearer ${token}` }
+        });
+        return response.data;
+    };
+
     const loadLogs = async () => {
         setLoading(true);
         try {
-            const token = localStorage.getItem('token');
-            const params = filter !== 'all' ? `?log_type=${filter}` : '';
-            const response = await axios.get(`${API}/superadmin/logs${params}`, {
-                headers: { Authorization: `Bearer ${token}` }
-            });
-            setLogs(response.data);
+            const data = await fetchLogs(null);
+            setLogs(data.logs);
+            setNextCursor(data.next_cursor);
         } catch (error) {
             console.error('Log yükleme hatası:', error);
         } finally {
@@ -32,6 +43,19 @@ const Logs = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const data = await fetchLogs(nextCursor);
+            setLogs((current) => [...current, ...data.logs]);
+            setNextCursor(data.next_cursor);
+        } catch (error) {
+            console.error('Log yükleme hatası:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const getTypeIcon = (type) => {
         switch (type) {
             case 'admin':
@@ -186,6 +210,14 @@ const Logs = () => {
                     </table>
                 </div>
 
+                {nextCursor && (
+                    <div className="px-6 py-4 border-t border-slate-200 text-center">
+                        <Button size="sm" variant="outline" onClick={loadMore} disabled={loadingMore}>
+                            {loadingMore ? 'Yükleniyor...' : 'Daha fazla yükle'}
+                        </Button>
+                    </div>
+                )}
+
                 {/* EMPTY STATE */}
                 {logs.length === 0 && (
                     <div className="text-center py-12">
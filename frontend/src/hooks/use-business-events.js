@@ -0,0 +1,33 @@
+import { useEffect, useRef } from 'react';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+const EVENT_TYPES = ['appointment.created', 'appointment.status', 'resync'];
+
+// İşletmenin randevu olaylarını SSE ile dinler (polling yerine).
+// Bağlantı koptuktan sonra yeniden açılınca kaçırılan olaylar için onReconnect çağrılır.
+export function useBusinessEvents(businessId, { onEvent, onReconnect }) {
+  const handlers = useRef({ onEvent, onReconnect });
+  handlers.current = { onEvent, onReconnect };
+
+  useEffect(() => {
+    const token = localStorage.getItem('token');
+    if (!businessId || !token) return;
+
+    const source = new EventSource(`${API}/events/${businessId}?token=${encodeURIComponent(token)}`);
+    let opened = false;
+
+    source.onopen = () => {
+      if (opened) handlers.current.onReconnect?.();
+      opened = true;
+    };
+
+    const handleEvent = (event) => {
+      handlers.current.onEvent?.(event.type, JSON.parse(event.data));
+    };
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, handleEvent));
+
+    return () => source.close();
+  }, [businessId]);
+}
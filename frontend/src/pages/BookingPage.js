@@ -25,6 +25,7 @@ const BookingPage = () => {
   const [business, setBusiness] = useState(null);
   const [services, setServices] = useState([]);
   const [staff, setStaff] = useState([]);
+  const [availability, setAvailability] = useState(null);
   const [loading, setLoading] = useState(true);
 
   const [step, setStep] = useState(1);
@@ -43,27 +44,35 @@ const BookingPage = () => {
     loadBusinessData();
   }, [slug]);
 
+  // Boş saatler seçilen hizmetin süresine göre hesaplanır; hizmet değişince yeniden al
+  useEffect(() => {
+    if (selectedService && availability && availability.service_id !== selectedService.id) {
+      loadAvailability(selectedService.id);
+    }
+  }, [selectedService]);
+
   useEffect(() => {
     if (selectedStaff && selectedDate) {
       checkBookedSlots();
     }
-  }, [selectedStaff, selectedDate]);
+  }, [selectedStaff, selectedDate, availability]);
+
+  // İşletme, hizmetler, personel ve 14 günlük boş saatler tek istekte gelir
+  const fetchBooking = (serviceId) => axios.get(`${API}/booking/${slug}`, {
+    params: {
+      days: 14,
+      date_from: format(new Date(), 'yyyy-MM-dd'),
+      service_id: serviceId || undefined
+    }
+  });
 
   const loadBusinessData = async () => {
     try {
-      const [businessRes, servicesRes, staffRes] = await Promise.all([
-        axios.get(`${API}/businesses/${slug}`),
-        axios.get(`${API}/businesses/${slug}`).then(res =>
-          axios.get(`${API}/services/${res.data.id}`)
-        ),
-        axios.get(`${API}/businesses/${slug}`).then(res =>
-          axios.get(`${API}/staff/${res.data.id}`)
-        )
-      ]);
-
-      setBusiness(businessRes.data);
-      setServices(servicesRes.data);
-      setStaff(staffRes.data);
+      const response = await fetchBooking(null);
+      setBusiness(response.data.business);
+      setServices(response.data.services);
+      setStaff(response.data.staff);
+      setAvailability(response.data.availability);
     } catch (error) {
       toast.error('İşletme bilgileri yüklenemedi');
     } finally {
@@ -71,26 +80,23 @@ const BookingPage = () => {
     }
   };
 
-  const checkBookedSlots = async () => {
-    if (!selectedStaff || !selectedDate) return;
-
+  const loadAvailability = async (serviceId) => {
     try {
-      const dateStr = format(selectedDate, 'yyyy-MM-dd');
-      const response = await axios.get(`${API}/appointments/${business.id}`);
-
-      const staffBookings = response.data.filter(apt =>
-        apt.staff_id === selectedStaff.id &&
-        apt.appointment_date === dateStr &&
-        apt.status !== 'cancelled'
-      );
-
-      const booked = staffBookings.map(apt => apt.time_slot);
-      setBookedSlots(booked);
+      const response = await fetchBooking(serviceId);
+      setAvailability(response.data.availability);
     } catch (error) {
-      console.error('Dolu saatler kontrol edilemedi:', error);
+      console.error('Boş saatler yüklenemedi:', error);
     }
   };
 
+  const checkBookedSlots = () => {
+    if (!selectedStaff || !selectedDate || !availability) return;
+
+    const dateStr = format(selectedDate, 'yyyy-MM-dd');
+    const freeSlots = availability.staff[selectedStaff.id]?.[dateStr] || [];
+    setBookedSlots(TIME_SLOTS.filter(slot => !freeSlots.includes(slot)));
+  };
+
   const generateAvailableDates = () => {
     const dates = [];
     for (let i = 0; i < 14; i++) {
@@ -150,6 +156,8 @@ const BookingPage = () => {
       toast.success('Randevu başarıyla oluşturuldu!');
     } catch (error) {
       toast.error(error.response?.data?.detail || 'Randevu oluşturulamadı');
+      // Saat bu arada dolmuş olabilir; boş saatleri tazele
+      loadAvailability(selectedService.id);
     } finally {
       setSubmitting(false);
     }
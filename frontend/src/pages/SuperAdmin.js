@@ -12,12 +12,15 @@ import Logs from '@/components/superadmin/Logs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const BUSINESS_PAGE_SIZE = 50;
 
 const SuperAdmin = () => {
     const { user, logout } = useAuth();
     const navigate = useNavigate();
     const [stats, setStats] = useState(null);
     const [businesses, setBusinesses] = useState([]);
+    const [businessTotal, setBusinessTotal] = useState(0);
+    const [businessQuery, setBusinessQuery] = useState({ search: '', sort: 'created_at', order: 'desc', page: 1 });
     const [loading, setLoading] = useState(true);
 
     // Dialog State
@@ -29,9 +32,18 @@ const SuperAdmin = () => {
 
     useEffect(() => {
         checkSuperAdminAccess();
-        loadData();
     }, []);
 
+    // İlk açılışta hemen; arama / sıralama / sayfa değişince listeyi gecikmeli al (her tuşta değil)
+    useEffect(() => {
+        if (loading) {
+            loadData();
+            return;
+        }
+        const timeout = setTimeout(loadBusinesses, 300);
+        return () => clearTimeout(timeout);
+    }, [businessQuery]);
+
     const checkSuperAdminAccess = async () => {
         try {
             const token = localStorage.getItem('token');
@@ -49,13 +61,12 @@ const SuperAdmin = () => {
             const token = localStorage.getItem('token');
             const headers = { Authorization: `Bearer ${token}` };
 
-            const [statsRes, businessesRes] = await Promise.all([
+            const [statsRes] = await Promise.all([
                 axios.get(`${API}/superadmin/stats`, { headers }),
-                axios.get(`${API}/superadmin/businesses`, { headers })
+                loadBusinesses()
             ]);
 
             setStats(statsRes.data);
-            setBusinesses(businessesRes.data);
         } catch (error) {
             console.error('Veri yükleme hatası:', error);
             toast.error('Veriler yüklenemedi!');
@@ -64,6 +75,27 @@ const SuperAdmin = () => {
         }
     };
 
+    const loadBusinesses = async () => {
+        try {
+            const token = localStorage.getItem('token');
+            const response = await axios.get(`${API}/superadmin/businesses`, {
+                headers: { Authorization: `Bearer ${token}` },
+                params: {
+                    search: businessQuery.search || undefined,
+                    sort: businessQuery.sort,
+                    order: businessQuery.order,
+                    page: businessQuery.page,
+                    limit: BUSINESS_PAGE_SIZE
+                }
+            });
+            setBusinesses(response.data.businesses);
+            setBusinessTotal(response.data.total);
+        } catch (error) {
+            console.error('İşletme listesi yüklenemedi:', error);
+            toast.error('İşletmeler yüklenemedi!');
+        }
+    };
+
     const handleSuspend = async (businessId, currentStatus) => {
         try {
             const token = localStorage.getItem('token');
@@ -221,6 +253,10 @@ const SuperAdmin = () => {
                         <Dashboard stats={stats} />
                         <BusinessTable
                             businesses={businesses}
+                            total={businessTotal}
+                            pageSize={BUSINESS_PAGE_SIZE}
+                            query={businessQuery}
+                            onQueryChange={(changes) => setBusinessQuery((prev) => ({ ...prev, page: 1, ...changes }))}
                             onSuspend={handleSuspend}
                             onUpdateSubscription={handleUpdateSubscription}
                             onDelete={handleDelete}
@@ -0,0 +1,377 @@
+"""
+API yük testi ve gecikme benchmark'ı
+
+FastAPI uygulaması süreç içinde (httpx.ASGITransport) ve yerel bir Mongo
+yerine mongomock ile çalıştırılır; uzak sunucuya gerek yoktur. Gerçekçi bir
+istek karışımı (booking sayfası, müsaitlik, randevu oluşturma, panel
+yoklaması, raporlar) verilen eşzamanlılıkla sürülür. Her istek için
+gecikme ve yaptığı veritabanı çağrısı sayısı ölçülür; p50/p95/p99,
+throughput ve istek başına DB işlemi raporlanır.
+
+Sonuçlar saklanan baseline ile karşılaştırılır; gecikme, throughput veya
+istek başına DB işlemi toleransın ötesinde kötüleşirse çıkış kodu 1 olur.
+DB işlemi sayısı makineden bağımsızdır, gecikme eşiği bu yüzden geniştir.
+Her veritabanı çağrısına BENCH_RTT_MS kadar ağ gecikmesi eklenir.
+
+Kullanım:
+  python tests/bench_load.py [--requests 1000] [--concurrency 20]
+      [--mix booking_bootstrap=35,create_appointment=15,...]
+      [--baseline tests/bench_load_baseline.json] [--update-baseline]
+      [--latency-tolerance 1.0] [--ops-tolerance 0.1]
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from indexes import ensure_indexes  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("bench_load_baseline.json")
+DEFAULT_MIX = {
+    "booking_bootstrap": 35,
+    "availability": 20,
+    "create_appointment": 15,
+    "admin_poll": 15,
+    "admin_list": 10,
+    "reports": 5,
+}
+# Senaryo başına az örnek olduğundan p99 sadece toplamda karşılaştırılır
+LATENCY_METRICS = ("p50", "p95")
+# Bu kadar ms'nin altındaki gecikme farkları gürültü sayılır
+LATENCY_NOISE_MS = 1.0
+
+_request_ops = contextvars.ContextVar("request_ops", default=None)
+
+
+class OpStats:
+    def __init__(self, rtt_seconds: float):
+        self.rtt_seconds = rtt_seconds
+        self.background = 0
+
+    async def trip(self):
+        ops = _request_ops.get()
+        if ops is None:
+            self.background += 1
+        else:
+            ops[0] += 1
+        # rtt 0 olsa da event loop'a dönülür; eşzamanlı istekler araya girebilsin
+        await asyncio.sleep(self.rtt_seconds)
+
+
+class CountingDb:
+    """Her veritabanı çağrısını (ve cursor okumasını) o anki isteğe yazan proxy"""
+
+    def __init__(self, inner, stats: OpStats):
+        self._inner = inner
+        self._stats = stats
+
+    def __getitem__(self, name):
+        return CountingDb(self._inner[name], self._stats)
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if hasattr(attr, "find_one"):
+            return CountingDb(attr, self._stats)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                return self._after_trip(result)
+            if hasattr(result, "to_list") or hasattr(result, "__aiter__"):
+                return CountingDb(result, self._stats)
+            return result
+
+        return call
+
+    async def _after_trip(self, coro):
+        await self._stats.trip()
+        return await coro
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._stats.trip()
+        async for item in self._inner:
+            yield item
+
+
+async def seed(db, business_count: int, appointments_per_business: int):
+    rng = random.Random(42)
+    today = datetime.now(timezone.utc).date()
+    businesses = []
+    for n in range(business_count):
+        business_id = f"load-{n:03d}"
+        staff = [
+            {"id": f"{business_id}-st{i}", "business_id": business_id, "name": f"Personel {i}",
+             "services": [], "working_days": [0, 1, 2, 3, 4, 5, 6]}
+            for i in range(4)
+        ]
+        services = [
+            {"id": f"{business_id}-s{i}", "business_id": business_id, "name": f"Hizmet {i}",
+             "duration": 30 * (1 + i % 2), "price": 100.0 + 50 * i}
+            for i in range(4)
+        ]
+        await db.businesses.insert_one({
+            "id": business_id, "name": f"İşletme {n}", "slug": f"isletme-{n}", "is_active": True,
+            "owner_email": f"owner{n}@example.com", "subscription_plan": "profesyonel",
+            "subscription_expires": datetime.now(timezone.utc) + timedelta(days=365),
+            "created_at": datetime.now(timezone.utc), "working_hours": {}
+        })
+        await db.users.insert_one({"id": f"owner-{n}", "email": f"owner{n}@example.com", "business_id": business_id})
+        await db.staff.insert_many(staff)
+        await db.services.insert_many(services)
+        appointments = []
+        for _ in range(appointments_per_business):
+            service = rng.choice(services)
+            start = rng.randrange(540, 1080, 30)
+            day = today + timedelta(days=rng.randrange(-30, 14))
+            appointments.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "business_id": business_id,
+                "customer_name": "Müşteri", "customer_phone": f"05{rng.randrange(10 ** 9):09d}",
+                "service_id": service["id"], "service_name": service["name"],
+                "staff_id": rng.choice(staff)["id"], "staff_name": None,
+                "appointment_date": day.isoformat(), "time_slot": f"{start // 60:02d}:{start % 60:02d}",
+                "duration": service["duration"], "price": service["price"],
+                "start_minute": start, "end_minute": start + service["duration"],
+                "status": rng.choice(["confirmed", "confirmed", "completed", "cancelled"]),
+                "created_at": datetime.now(timezone.utc) - timedelta(hours=rng.randrange(72)),
+            })
+        await db.appointments.insert_many(appointments)
+        businesses.append({"id": business_id, "slug": f"isletme-{n}", "owner": f"owner-{n}",
+                           "staff": [s["id"] for s in staff], "services": [s["id"] for s in services]})
+    return businesses
+
+
+def percentile(values, fraction: float) -> float:
+    """En yakın sıra yöntemiyle yüzdelik"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples) -> dict:
+    latencies = [s["ms"] for s in samples]
+    return {
+        "count": len(samples),
+        "p50": round(percentile(latencies, 0.50), 3),
+        "p95": round(percentile(latencies, 0.95), 3),
+        "p99": round(percentile(latencies, 0.99), 3),
+        "db_ops": round(sum(s["ops"] for s in samples) / len(samples), 3),
+        "errors": sum(1 for s in samples if s["status"] >= 500),
+    }
+
+
+def build_scenarios(server, businesses, today: date):
+    tokens = {b["id"]: server.create_access_token({"sub": b["owner"]}) for b in businesses}
+
+    def owner_headers(business):
+        return {"Authorization": f"Bearer {tokens[business['id']]}"}
+
+    async def booking_bootstrap(client, rng, business):
+        return await client.get(f"/api/booking/{business['slug']}", params={"days": 7})
+
+    async def availability(client, rng, business):
+        return await client.get("/api/appointments/availability", params={
+            "business_id": business["id"], "service_id": rng.choice(business["services"]),
+            "appointment_date": (today + timedelta(days=rng.randrange(14))).isoformat()
+        })
+
+    async def create_appointment(client, rng, business):
+        start = rng.randrange(540, 1050, 15)
+        body = {
+            "customer_name": "Yük Testi", "customer_phone": f"05{rng.randrange(10 ** 9):09d}",
+            "service_id": rng.choice(business["services"]),
+            "appointment_date": (today + timedelta(days=rng.randrange(1, 14))).isoformat(),
+            "time_slot": f"{start // 60:02d}:{start % 60:02d}",
+        }
+        if rng.random() < 0.5:
+            body["staff_id"] = rng.choice(business["staff"])
+        return await client.post(f"/api/appointments/{business['id']}", json=body)
+
+    async def admin_poll(client, rng, business):
+        return await client.get(f"/api/appointments/{business['id']}/notifications", headers=owner_headers(business))
+
+    async def admin_list(client, rng, business):
+        return await client.get(f"/api/appointments/{business['id']}", params={"limit": 50}, headers=owner_headers(business))
+
+    async def reports(client, rng, business):
+        return await client.get(f"/api/reports/overview/{business['id']}")
+
+    return {
+        "booking_bootstrap": booking_bootstrap,
+        "availability": availability,
+        "create_appointment": create_appointment,
+        "admin_poll": admin_poll,
+        "admin_list": admin_list,
+        "reports": reports,
+    }
+
+
+async def drive(client, scenarios, plan, businesses, concurrency: int, seed_value: int):
+    """plan'daki senaryoları concurrency işçiyle sırayla çalıştır"""
+    queue = asyncio.Queue()
+    for index, name in enumerate(plan):
+        queue.put_nowait((index, name))
+    samples = []
+
+    async def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while True:
+            try:
+                index, name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            ops = [0]
+            token = _request_ops.set(ops)
+            started = time.perf_counter()
+            try:
+                response = await scenarios[name](client, rng, businesses[index % len(businesses)])
+                status = response.status_code
+            except Exception:
+                status = 599
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                _request_ops.reset(token)
+            samples.append({"scenario": name, "ms": elapsed, "ops": ops[0], "status": status})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def compare(current: dict, baseline: dict, latency_tolerance: float, ops_tolerance: float):
+    """Baseline'a göre kötüleşen metrikler: (metrik, baseline, şimdiki) listesi"""
+    regressions = []
+    for name, metrics in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric in LATENCY_METRICS:
+            limit = base[metric] * (1 + latency_tolerance)
+            if metrics[metric] > limit and metrics[metric] - base[metric] > LATENCY_NOISE_MS:
+                regressions.append((f"{name}.{metric}", base[metric], metrics[metric]))
+        if metrics["db_ops"] > base["db_ops"] * (1 + ops_tolerance) + 0.05:
+            regressions.append((f"{name}.db_ops", base["db_ops"], metrics["db_ops"]))
+    overall, base_overall = current["overall"], baseline.get("overall", {})
+    if base_overall.get("p99") and overall["p99"] > base_overall["p99"] * (1 + latency_tolerance):
+        regressions.append(("overall.p99", base_overall["p99"], overall["p99"]))
+    base_throughput = base_overall.get("throughput")
+    if base_throughput and overall["throughput"] < base_throughput / (1 + latency_tolerance):
+        regressions.append(("overall.throughput", base_throughput, overall["throughput"]))
+    return regressions
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Bilinmeyen senaryo: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+async def run(args) -> int:
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "randevu_load")
+    import server
+    from mongomock_motor import AsyncMongoMockClient
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    raw_db = AsyncMongoMockClient(tz_aware=True)[f"load_{uuid.uuid4().hex[:8]}"]
+    await ensure_indexes(raw_db)
+    businesses = await seed(raw_db, args.businesses, args.appointments)
+
+    stats = OpStats(args.rtt_ms / 1000)
+    db = CountingDb(raw_db, stats)
+    server.db = db
+    server.audit_log.start(db)
+
+    rng = random.Random(args.seed)
+    names, weights = zip(*args.mix.items())
+    plan = rng.choices(names, weights=weights, k=args.warmup + args.requests)
+    scenarios = build_scenarios(server, businesses, datetime.now(timezone.utc).date())
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        await drive(client, scenarios, plan[:args.warmup], businesses, args.concurrency, args.seed)
+        samples, elapsed = await drive(client, scenarios, plan[args.warmup:], businesses, args.concurrency, args.seed + 1)
+    await server.audit_log.stop()
+
+    result = {
+        "config": {
+            "requests": args.requests, "concurrency": args.concurrency, "rtt_ms": args.rtt_ms,
+            "businesses": args.businesses, "appointments": args.appointments, "mix": args.mix,
+        },
+        "overall": {**summarize(samples), "throughput": round(len(samples) / elapsed, 1)},
+        "scenarios": {
+            name: summarize([s for s in samples if s["scenario"] == name])
+            for name in args.mix if any(s["scenario"] == name for s in samples)
+        },
+    }
+
+    print(f"{args.requests} istek, eşzamanlılık {args.concurrency}, RTT {args.rtt_ms} ms, "
+          f"{args.businesses} işletme x {args.appointments} randevu")
+    print(f"{'Senaryo':<20}{'adet':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'DB işl./istek':>15}{'5xx':>6}")
+    for name, metrics in [*result["scenarios"].items(), ("TOPLAM", result["overall"])]:
+        print(f"{name:<20}{metrics['count']:>7}{metrics['p50']:>9.2f}{metrics['p95']:>9.2f}"
+              f"{metrics['p99']:>9.2f}{metrics['db_ops']:>15.2f}{metrics['errors']:>6}")
+    print(f"Throughput: {result['overall']['throughput']} istek/sn, arka plan DB işlemi: {stats.background}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n")
+        print(f"Baseline yazıldı: {args.baseline}")
+        return 0
+
+    failed = result["overall"]["errors"] > 0
+    if failed:
+        print(f"HATA: {result['overall']['errors']} istek 5xx döndü")
+    if not args.baseline.exists():
+        print("Baseline yok, karşılaştırma atlandı (--update-baseline ile oluşturun)")
+        return 1 if failed else 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != result["config"]:
+        print("UYARI: baseline farklı ayarlarla alınmış, karşılaştırma yanıltıcı olabilir")
+    regressions = compare(result, baseline, args.latency_tolerance, args.ops_tolerance)
+    for metric, before, after in regressions:
+        print(f"GERİLEME {metric}: {before} -> {after}")
+    if not regressions:
+        print("Baseline'a göre gerileme yok")
+    return 1 if failed or regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Süreç içi API yük testi")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--businesses", type=int, default=10)
+    parser.add_argument("--appointments", type=int, default=300, help="işletme başına randevu")
+    parser.add_argument("--rtt-ms", type=float, default=float(os.environ.get("BENCH_RTT_MS", 0.5)))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--latency-tolerance", type=float, default=1.0, help="gecikme ve throughput için oran")
+    parser.add_argument("--ops-tolerance", type=float, default=0.1, help="istek başına DB işlemi için oran")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Login fırtınası sırasında event loop gecikmesi benchmark'ı
+
+Eşzamanlı login istekleri atılırken ilgisiz bir uca (hizmet listesi) düzenli
+istek gönderilir ve gecikmesi ölçülür. bcrypt'in istek içinde senkron
+çalıştığı eski yol ile thread havuzlu PasswordHasher karşılaştırılır.
+
+Kullanım: python tests/bench_login_storm.py [login_sayısı]
+"""
+import asyncio
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+
+
+class InlineHasher:
+    """Eski davranış: bcrypt doğrudan event loop üzerinde"""
+
+    def __init__(self, context):
+        self.context = context
+
+    async def hash(self, password):
+        return self.context.hash(password)
+
+    async def verify(self, plain_password, hashed_password):
+        return self.context.verify(plain_password, hashed_password)
+
+    def shutdown(self):
+        pass
+
+
+async def probe(client, stop, latencies, interval=0.01):
+    """
+    Gecikme, isteğin planlanan başlangıç anından ölçülür; böylece event loop
+    bloklandığı için geç başlayan istekler de gecikmeye dahil olur.
+    """
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        await client.get("/api/services/bench-business")
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        scheduled += interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+
+
+async def scenario(name, hasher, logins):
+    server.password_hasher = hasher
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, baseline))
+        await asyncio.sleep(0.5)
+        stop.set()
+        await task
+
+        latencies = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, latencies))
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/api/auth/login", json={"email": "bench@example.com", "password": "Bench123!"})
+            for _ in range(logins)
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+
+    assert all(r.status_code == 200 for r in responses), {r.status_code for r in responses}
+    latencies.sort()
+    return (
+        name,
+        statistics.median(baseline),
+        statistics.median(latencies),
+        latencies[min(len(latencies) - 1, math.ceil(len(latencies) * 0.95) - 1)],
+        latencies[-1],
+        logins / elapsed,
+    )
+
+
+async def main(logins):
+    server.db = AsyncMongoMockClient()["bench"]
+    server.login_email_limiter.max_attempts = 10 ** 9
+    server.login_ip_limiter.max_attempts = 10 ** 9
+
+    await server.db.users.insert_one({
+        "id": "bench-user",
+        "email": "bench@example.com",
+        "name": "Bench",
+        "password_hash": server.pwd_context.hash("Bench123!"),
+        "created_at": "2030-01-01T00:00:00+00:00",
+    })
+    await server.db.services.insert_one({
+        "id": "bench-service", "business_id": "bench-business", "name": "Kesim",
+        "duration": 30, "price": 100.0, "created_at": "2030-01-01T00:00:00+00:00",
+    })
+    # Login log kaydı benchmark'ı etkilemesin
+    server.create_log = lambda *args, **kwargs: asyncio.sleep(0)
+
+    pooled = PasswordHasher(server.pwd_context, max_workers=4)
+    rows = [
+        await scenario("Senkron bcrypt (eski)", InlineHasher(server.pwd_context), logins),
+        await scenario("Thread havuzu (4 worker)", pooled, logins),
+    ]
+    pooled.shutdown()
+
+    print(f"{logins} eşzamanlı login sırasında /api/services gecikmesi (ms)")
+    print(f"{'Yöntem':<28}{'boşta p50':>11}{'p50':>9}{'p95':>9}{'max':>9}{'login/s':>9}")
+    for name, idle, p50, p95, worst, throughput in rows:
+        print(f"{name:<28}{idle:>11.1f}{p50:>9.1f}{p95:>9.1f}{worst:>9.1f}{throughput:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 40))
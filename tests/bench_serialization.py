@@ -0,0 +1,145 @@
+"""
+Liste uçları serileştirme benchmark'ı (10k satır)
+
+Aynı dokümanlar için yanıt gövdesi üretme maliyeti:
+  1. Eski yol: doküman başına Pydantic modeli + response_model doğrulaması
+     + jsonable_encoder + json.dumps (FastAPI'nin serialize_response'u)
+  2. Hızlı yol, standart json: DocumentShaper + serialization._default
+  3. Hızlı yol, orjson: DocumentShaper + serialization.dumps
+
+Ayrıca veritabanından okuma: tüm doküman ({"_id": 0}) ve model_projection.
+Dokümanlara modelde olmayan alanlar eklenir (eski/iç alanlar); projeksiyon
+bunları okumaz. BENCH_MONGO_URL tanımlıysa gerçek mongod, değilse mongomock
+kullanılır (mongomock'ta okuma süreleri sadece kabaca fikir verir).
+
+Kullanım: python tests/bench_serialization.py [satır_sayısı] [tekrar]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import serialization  # noqa: E402
+from server import Appointment, Business, Staff  # noqa: E402
+
+BUSINESS_ID = "bench-business"
+EXTRA = {"internal_notes": "x" * 200, "legacy_flags": list(range(20))}
+
+
+def make_rows(count):
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    appointments = [
+        {
+            "id": str(uuid.uuid4()), "business_id": BUSINESS_ID, "customer_name": "Müşteri Adı",
+            "customer_phone": "05551112233", "service_id": "s1", "service_name": "Saç Kesimi",
+            "staff_id": "st1", "staff_name": "Ayşe Yılmaz", "appointment_date": "2030-01-07",
+            "time_slot": "10:30", "duration": 45, "price": 350.0, "status": "confirmed", "notes": None,
+            "start_minute": 630, "end_minute": 675, "series_id": None, "series_exception": False,
+            "created_at": base + timedelta(seconds=n), **EXTRA,
+        }
+        for n in range(count)
+    ]
+    staff = [
+        {
+            "id": str(uuid.uuid4()), "business_id": BUSINESS_ID, "name": f"Personel {n}", "phone": "05320000000",
+            "email": None, "services": ["s1", "s2", "s3"], "working_days": [1, 2, 3, 4, 5],
+            "created_at": base, **EXTRA,
+        }
+        for n in range(count)
+    ]
+    businesses = [
+        {
+            "id": str(uuid.uuid4()), "name": f"İşletme {n}", "slug": f"isletme-{n}", "description": None,
+            "logo_url": None, "phone": "02120000000", "address": "Adres", "working_hours": {"0": None},
+            "created_at": base, "owner_email": f"owner{n}@example.com", "subscription_plan": "profesyonel",
+            "subscription_expires": base + timedelta(days=30), "is_active": True, "last_login": base,
+            "total_appointments": n, "total_staff": 3, "total_services": 8, **EXTRA,
+        }
+        for n in range(count)
+    ]
+    return {"appointments": (Appointment, appointments), "staff": (Staff, staff), "businesses": (Business, businesses)}
+
+
+async def model_path(model, docs):
+    """Eski yol: doküman başına model, ardından response_model ile serileştirme"""
+    field = create_response_field(name="Response", type_=List[model])
+    content = await serialize_response(field=field, response_content=[model(**doc) for doc in docs])
+    return JSONResponse(content).body
+
+
+def json_path(model, docs):
+    shape = serialization.DocumentShaper(model)
+    rows = shape.many(dict(doc) for doc in docs)
+    return json.dumps(
+        rows, default=serialization._default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def orjson_path(model, docs):
+    shape = serialization.DocumentShaper(model)
+    return serialization.json_response(shape.many(dict(doc) for doc in docs)).body
+
+
+async def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            result = await result
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(result)
+
+
+async def main(count, repeat):
+    rows = make_rows(count)
+    print(f"{count} satır, {repeat} tekrar (medyan), orjson {'var' if serialization.orjson else 'yok'}")
+    print(f"{'Model':<14}{'Yol':<34}{'süre (ms)':>12}{'bayt':>12}{'hızlanma':>10}")
+    for name, (model, docs) in rows.items():
+        trimmed = [{k: v for k, v in doc.items() if k not in EXTRA} for doc in docs]
+        baseline, size = await timed(lambda: model_path(model, trimmed), repeat)
+        print(f"{name:<14}{'Pydantic model + response_model':<34}{baseline:>12.1f}{size:>12}{'1.0x':>10}")
+        for label, fn in (("DocumentShaper + json", json_path), ("DocumentShaper + orjson", orjson_path)):
+            if fn is orjson_path and not serialization.orjson:
+                continue
+            elapsed, size = await timed(lambda: fn(model, trimmed), repeat)
+            print(f"{'':<14}{label:<34}{elapsed:>12.1f}{size:>12}{baseline / elapsed:>9.1f}x")
+
+    mongo_url = os.environ.get("BENCH_MONGO_URL")
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient(tz_aware=True)
+    db = client[f"bench_serialization_{uuid.uuid4().hex[:8]}"]
+    await db.appointments.insert_many([dict(doc) for doc in rows["appointments"][1]])
+    query = {"business_id": BUSINESS_ID}
+    full, _ = await timed(lambda: db.appointments.find(query, {"_id": 0}).to_list(None), repeat)
+    projected, _ = await timed(
+        lambda: db.appointments.find(query, serialization.model_projection(Appointment)).to_list(None), repeat
+    )
+    print(f"\nOkuma ({'mongod' if mongo_url else 'mongomock'}): tüm doküman {full:.1f} ms, projeksiyon {projected:.1f} ms")
+    if mongo_url:
+        await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    ))
@@ -0,0 +1,126 @@
+"""
+Haftalık boş saat hesabı benchmark'ı: aralık taraması vs slot bitmap'i
+
+İşletmenin tüm personeli için 7 günlük boş saatler:
+  1. Aralık yolu: randevular okunur, availability_by_staff (sıralama +
+     birleştirme + slot başına tarama)
+  2. Bitmap yolu: slot_locks'tan load_grids, grid_availability (bit işlemleri)
+
+Hesaplama süreleri ayrı, okuma + hesaplama toplamı ayrı ölçülür.
+BENCH_MONGO_URL tanımlıysa gerçek mongod, değilse mongomock kullanılır.
+
+Kullanım: python tests/bench_slot_grid.py [personel_sayısı] [tekrar]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from availability import availability_by_staff, date_range, minutes_to_time  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from slot_grid import grid_availability  # noqa: E402
+from slot_locks import load_grids, lock_appointments  # noqa: E402
+
+BUSINESS_ID = "bench-business"
+BUSINESS = {"id": BUSINESS_ID, "working_hours": {"0": None}}
+DAYS = date_range(date(2030, 1, 7), date(2030, 1, 13))
+APPOINTMENT_PROJECTION = {"_id": 0, "staff_id": 1, "appointment_date": 1, "time_slot": 1, "duration": 1,
+                          "start_minute": 1, "end_minute": 1}
+
+
+def make_data(staff_count):
+    rng = random.Random(25)
+    staff_list = [{"id": f"st-{n}", "services": [], "working_days": [1, 2, 3, 4, 5, 6]} for n in range(staff_count)]
+    appointments = []
+    for staff in staff_list:
+        for day in DAYS:
+            start = 9 * 60
+            while start < 18 * 60:
+                start += rng.choice((0, 0, 15, 30))
+                duration = rng.choice((15, 30, 45, 60))
+                appointments.append({
+                    "id": str(uuid.uuid4()), "business_id": BUSINESS_ID, "staff_id": staff['id'],
+                    "appointment_date": day.isoformat(), "time_slot": minutes_to_time(start), "duration": duration,
+                    "start_minute": start, "end_minute": start + duration, "status": "confirmed",
+                })
+                start += duration
+    return staff_list, appointments
+
+
+async def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            result = await result
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+async def main(staff_count, repeat):
+    staff_list, appointments = make_data(staff_count)
+    mongo_url = os.environ.get("BENCH_MONGO_URL")
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient(tz_aware=True)
+    db = client[f"bench_slot_grid_{uuid.uuid4().hex[:8]}"]
+    await ensure_indexes(db)
+    await db.appointments.insert_many([dict(a) for a in appointments])
+    await lock_appointments(db, appointments)
+
+    date_from, date_to = DAYS[0].isoformat(), DAYS[-1].isoformat()
+
+    async def read_appointments():
+        return await db.appointments.find(
+            {"business_id": BUSINESS_ID, "appointment_date": {"$gte": date_from, "$lte": date_to},
+             "status": {"$ne": "cancelled"}},
+            APPOINTMENT_PROJECTION
+        ).to_list(None)
+
+    grids = await load_grids(db, BUSINESS_ID, date_from, date_to)
+    print(f"{staff_count} personel, {len(appointments)} randevu, {len(grids)} personel-gün, {repeat} tekrar (medyan)")
+    print(f"{'Yol':<30}{'hesaplama (ms)':>16}{'okuma+hesap (ms)':>18}")
+    for duration in (30, 60):
+        scan, expected = await timed(
+            lambda: availability_by_staff(BUSINESS, staff_list, appointments, DAYS, duration), repeat
+        )
+        bitmap, result = await timed(lambda: grid_availability(BUSINESS, staff_list, grids, DAYS, duration), repeat)
+        assert result == expected
+        scan_total, _ = await timed(
+            lambda: _scan_from_db(read_appointments, staff_list, duration), repeat
+        )
+        bitmap_total, _ = await timed(
+            lambda: _grid_from_db(db, date_from, date_to, staff_list, duration), repeat
+        )
+        print(f"{f'aralık taraması ({duration} dk)':<30}{scan:>16.1f}{scan_total:>18.1f}")
+        print(f"{f'bitmap ({duration} dk)':<30}{bitmap:>16.1f}{bitmap_total:>18.1f}"
+              f"  ({scan / bitmap:.1f}x / {scan_total / bitmap_total:.1f}x)")
+    if mongo_url:
+        await client.drop_database(db.name)
+
+
+async def _scan_from_db(read_appointments, staff_list, duration):
+    return availability_by_staff(BUSINESS, staff_list, await read_appointments(), DAYS, duration)
+
+
+async def _grid_from_db(db, date_from, date_to, staff_list, duration):
+    grids = await load_grids(db, BUSINESS_ID, date_from, date_to)
+    return grid_availability(BUSINESS, staff_list, grids, DAYS, duration)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    ))
@@ -0,0 +1,146 @@
+"""
+Otomatik personel ataması benchmark'ı (50 personel)
+
+Aday değerlendirmesinin maliyetini ölçer:
+  1. Personel başına ayrı randevu sorgusu (naif yol)
+  2. assignment.eligible_candidates: işletmenin o günkü randevuları tek sorguda
+  3. Sadece bellek içi değerlendirme + politika (sorgu hariç CPU maliyeti)
+
+Her veritabanı çağrısı bir round trip sayılır; mongomock ile çalışırken ağ
+gecikmesi BENCH_RTT_MS ile eklenir. BENCH_MONGO_URL tanımlıysa gerçek
+mongod kullanılır.
+
+Kullanım: python tests/bench_staff_assignment.py [personel_sayısı] [atama_sayısı]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from assignment import POLICIES, eligible_candidates  # noqa: E402
+from availability import busy_intervals, is_free, staff_offers, staff_works_on  # noqa: E402
+from bench_superadmin_businesses import Network, Remote  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+BUSINESS_ID = "bench-business"
+DAY = date(2030, 1, 7)
+PROJECTION = {"_id": 0, "staff_id": 1, "time_slot": 1, "duration": 1, "start_minute": 1, "end_minute": 1}
+
+
+async def seed(db, staff_count):
+    rng = random.Random(42)
+    services = [f"s{n}" for n in range(10)]
+    staff = [
+        {
+            "id": f"st{n:03d}", "business_id": BUSINESS_ID, "name": f"Personel {n}",
+            "services": rng.sample(services, rng.randint(0, 6)),
+            "working_days": sorted(rng.sample(range(7), rng.randint(3, 6))),
+        }
+        for n in range(staff_count)
+    ]
+    await db.staff.insert_many(staff)
+    appointments = []
+    for member in staff:
+        for start in range(540, 1080, 30):
+            if rng.random() < 0.6:
+                appointments.append({
+                    "id": str(uuid.uuid4()), "business_id": BUSINESS_ID, "staff_id": member["id"],
+                    "appointment_date": DAY.isoformat(), "time_slot": f"{start // 60:02d}:{start % 60:02d}",
+                    "duration": 30, "start_minute": start, "end_minute": start + 30, "status": "confirmed",
+                })
+    await db.appointments.insert_many(appointments)
+    return len(appointments)
+
+
+async def per_staff_queries(db, service_id, start, end):
+    """Naif yol: uygun her personel için o günkü randevularını ayrı sorgula"""
+    staff_list = await db.staff.find({"business_id": BUSINESS_ID}, {"_id": 0}).to_list(None)
+    free = []
+    for staff in staff_list:
+        if not staff_works_on(staff, DAY) or not staff_offers(staff, service_id):
+            continue
+        booked = await db.appointments.find({
+            "business_id": BUSINESS_ID, "staff_id": staff["id"],
+            "appointment_date": DAY.isoformat(), "status": {"$ne": "cancelled"}
+        }, PROJECTION).to_list(None)
+        if is_free(busy_intervals(booked), start, end):
+            free.append(staff)
+    return free
+
+
+async def single_query(db, service_id, start, end):
+    staff_list, appointments = await asyncio.gather(
+        db.staff.find({"business_id": BUSINESS_ID}, {"_id": 0}).to_list(None),
+        db.appointments.find(
+            {"business_id": BUSINESS_ID, "appointment_date": DAY.isoformat(), "status": {"$ne": "cancelled"}},
+            PROJECTION
+        ).to_list(None)
+    )
+    return POLICIES["least_loaded"](eligible_candidates(staff_list, appointments, DAY, start, end, service_id), 0)
+
+
+async def measure(name, network, requests, fn):
+    before = network.round_trips
+    timings = []
+    for service_id, start in requests:
+        started = time.perf_counter()
+        await fn(service_id, start, start + 30)
+        timings.append((time.perf_counter() - started) * 1000)
+    trips = (network.round_trips - before) / len(requests)
+    return name, statistics.mean(timings), sorted(timings)[int(len(timings) * 0.95) - 1], trips
+
+
+async def main(staff_count, assignments):
+    mongo_url = os.environ.get("BENCH_MONGO_URL")
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+        rtt_ms = float(os.environ.get("BENCH_RTT_MS", 0))
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+        rtt_ms = float(os.environ.get("BENCH_RTT_MS", 1))
+    raw_db = client[f"bench_assignment_{uuid.uuid4().hex[:8]}"]
+    await ensure_indexes(raw_db)
+    appointment_count = await seed(raw_db, staff_count)
+
+    rng = random.Random(7)
+    requests = [(f"s{rng.randrange(10)}", rng.choice(range(540, 1080, 15))) for _ in range(assignments)]
+    network = Network(rtt_ms / 1000)
+    db = Remote(raw_db, network)
+
+    staff_list = await raw_db.staff.find({"business_id": BUSINESS_ID}, {"_id": 0}).to_list(None)
+    day_appointments = await raw_db.appointments.find({"appointment_date": DAY.isoformat()}, PROJECTION).to_list(None)
+
+    async def in_memory(service_id, start, end):
+        for policy in POLICIES.values():
+            policy(eligible_candidates(staff_list, day_appointments, DAY, start, end, service_id), 1)
+
+    rows = [
+        await measure("Personel başına sorgu", network, requests, lambda *a: per_staff_queries(db, *a)),
+        await measure("Tek sorgu + eligible_candidates", network, requests, lambda *a: single_query(db, *a)),
+        await measure("Sadece değerlendirme (tüm politikalar)", network, requests, in_memory),
+    ]
+
+    if mongo_url:
+        await client.drop_database(raw_db.name)
+
+    print(f"{staff_count} personel / {appointment_count} randevu, "
+          f"{assignments} atama, RTT {rtt_ms} ms ({'mongod' if mongo_url else 'mongomock'})")
+    print(f"{'Yöntem':<42}{'ort (ms)':>10}{'p95 (ms)':>10}{'round trip':>12}")
+    for name, mean, p95, trips in rows:
+        print(f"{name:<42}{mean:>10.2f}{p95:>10.2f}{trips:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    ))
@@ -0,0 +1,171 @@
+"""
+Süper admin işletme listesi benchmark'ı
+
+Eski yol (işletme başına üç sıralı count_documents) ile business_stats'taki
+gruplanmış sayımları karşılaştırır. Her veritabanı çağrısı bir round trip
+sayılır; mongomock ile çalışırken ağ gecikmesi BENCH_RTT_MS ile eklenir.
+
+BENCH_MONGO_URL tanımlıysa gerçek mongod kullanılır (tam boyut için önerilir:
+5000 işletme / 1.000.000 randevu). mongomock sorguları Python'da tarar,
+bu yüzden onunla küçük boyutlarla çalıştırın.
+
+Kullanım: python tests/bench_superadmin_businesses.py [işletme_sayısı] [randevu_sayısı]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from business_stats import list_businesses  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+CHUNK = 10000
+
+
+class Network:
+    def __init__(self, rtt_seconds: float):
+        self.rtt_seconds = rtt_seconds
+        self.round_trips = 0
+
+    async def trip(self):
+        self.round_trips += 1
+        if self.rtt_seconds:
+            await asyncio.sleep(self.rtt_seconds)
+
+
+class Remote:
+    """Her veritabanı çağrısını (ve cursor okumasını) bir round trip olarak sayan proxy"""
+
+    def __init__(self, inner, network: Network):
+        self._inner = inner
+        self._network = network
+
+    def __getitem__(self, name):
+        return Remote(self._inner[name], self._network)
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if hasattr(attr, "find_one"):
+            return Remote(attr, self._network)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                return self._after_trip(result)
+            if hasattr(result, "to_list") or hasattr(result, "__aiter__"):
+                return Remote(result, self._network)
+            return result
+
+        return call
+
+    async def _after_trip(self, coro):
+        await self._network.trip()
+        return await coro
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._network.trip()
+        async for item in self._inner:
+            yield item
+
+
+async def legacy_business_details(db):
+    """Eski uç: tüm işletmeler + işletme başına 3 sıralı sayım"""
+    businesses = await db.businesses.find({}, {"_id": 0}).to_list(None)
+    for b in businesses:
+        b['staff_count'] = await db.staff.count_documents({"business_id": b['id']})
+        b['service_count'] = await db.services.count_documents({"business_id": b['id']})
+        b['appointment_count'] = await db.appointments.count_documents({"business_id": b['id']})
+    return businesses
+
+
+async def seed(db, business_count, appointment_count):
+    rng = random.Random(42)
+    business_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(business_count)]
+    await db.businesses.insert_many([
+        {
+            "id": business_id, "name": f"İşletme {n}", "slug": f"isletme-{n}",
+            "owner_email": f"owner{n}@example.com",
+            "created_at": f"2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}T10:00:00+00:00",
+            "subscription_plan": "baslangic", "subscription_expires": "2099-01-01T00:00:00+00:00",
+            "is_active": True,
+        }
+        for n, business_id in enumerate(business_ids)
+    ])
+    for collection, per_business in (("staff", 5), ("services", 8)):
+        docs = [
+            {"id": str(uuid.uuid4()), "business_id": business_id}
+            for business_id in business_ids for _ in range(rng.randint(0, per_business))
+        ]
+        for start in range(0, len(docs), CHUNK):
+            await db[collection].insert_many(docs[start:start + CHUNK])
+    for start in range(0, appointment_count, CHUNK):
+        await db.appointments.insert_many([
+            {
+                "id": str(uuid.uuid4()), "business_id": rng.choice(business_ids),
+                "appointment_date": "2030-01-01", "time_slot": "10:00", "status": "confirmed",
+            }
+            for _ in range(min(CHUNK, appointment_count - start))
+        ])
+
+
+async def measure(name, network, fn):
+    before = network.round_trips
+    started = time.perf_counter()
+    rows = await fn()
+    return name, (time.perf_counter() - started) * 1000, network.round_trips - before, len(rows)
+
+
+async def main(business_count, appointment_count):
+    mongo_url = os.environ.get("BENCH_MONGO_URL")
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+        rtt_ms = float(os.environ.get("BENCH_RTT_MS", 0))
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+        rtt_ms = float(os.environ.get("BENCH_RTT_MS", 1))
+    raw_db = client[f"bench_businesses_{uuid.uuid4().hex[:8]}"]
+
+    await ensure_indexes(raw_db)
+    await seed(raw_db, business_count, appointment_count)
+
+    network = Network(rtt_ms / 1000)
+    db = Remote(raw_db, network)
+    rows = [
+        await measure("Eski: işletme başına count (tümü)", network, lambda: legacy_business_details(db)),
+        await measure("Yeni: sayfa 1 (created_at)", network, lambda: _page(db, "created_at")),
+        await measure("Yeni: sayfa 1 (appointment_count)", network, lambda: _page(db, "appointment_count")),
+        await measure("Yeni: arama + sayfa 1", network, lambda: _page(db, "name", search="İşletme 42")),
+    ]
+
+    if mongo_url:
+        await client.drop_database(raw_db.name)
+
+    print(f"{business_count} işletme / {appointment_count} randevu, RTT {rtt_ms} ms "
+          f"({'mongod' if mongo_url else 'mongomock'})")
+    print(f"{'Yöntem':<38}{'süre (ms)':>12}{'round trip':>12}{'satır':>8}")
+    for name, elapsed, trips, count in rows:
+        print(f"{name:<38}{elapsed:>12.1f}{trips:>12}{count:>8}")
+
+
+async def _page(db, sort, search=None):
+    businesses, _ = await list_businesses(db, search=search, sort=sort, descending=True, page=1, limit=50)
+    return businesses
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000000,
+    ))
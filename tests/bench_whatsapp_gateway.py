@@ -0,0 +1,139 @@
+"""
+WhatsApp gateway bağlantı havuzu benchmark'ı
+
+Yerel bir stub gateway'e karşı üç yöntemi karşılaştırır:
+  1. Her mesajda yeni httpx.AsyncClient (eski davranış)
+  2. Paylaşılan, havuzlu WhatsAppGateway
+  3. WhatsAppGateway.send_bulk (tek istekte toplu gönderim)
+
+Kullanım: python tests/bench_whatsapp_gateway.py [mesaj_sayısı] [eşzamanlılık]
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from whatsapp_client import WhatsAppGateway  # noqa: E402
+
+
+class StubGateway:
+    """Keep-alive destekleyen, açılan TCP bağlantılarını sayan minimal HTTP sunucusu"""
+
+    def __init__(self, latency: float = 0.001):
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def reset(self):
+        self.connections = 0
+        self.requests = 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    key, _, value = line.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+
+                path = request_line.split()[1].decode()
+                if path.endswith("/send-bulk"):
+                    messages = json.loads(body)["messages"]
+                    await asyncio.sleep(self.latency * (len(messages) - 1) / 10)
+                    payload = {"success": True, "results": [{"phone": m["phone"], "success": True} for m in messages]}
+                else:
+                    payload = {"success": True}
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def send_with_new_client(base_url, phone, message):
+    async with httpx.AsyncClient(timeout=3.0) as client:
+        response = await client.post(f"{base_url}/api/whatsapp/send", json={"phone": phone, "message": message}, timeout=10.0)
+        return response.status_code == 200
+
+
+async def run_bounded(concurrency, coros):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(bounded(c) for c in coros))
+
+
+async def main(total: int, concurrency: int):
+    stub = StubGateway()
+    await stub.start()
+    base_url = f"http://127.0.0.1:{stub.port}"
+    messages = [{"phone": f"90555{i:07d}", "message": f"Hatırlatma #{i}"} for i in range(total)]
+    rows = []
+
+    stub.reset()
+    started = time.perf_counter()
+    await run_bounded(concurrency, [send_with_new_client(base_url, m["phone"], m["message"]) for m in messages])
+    rows.append(("Mesaj başına yeni istemci", time.perf_counter() - started, stub.connections, stub.requests))
+
+    gateway = WhatsAppGateway(base_url=base_url, max_connections=concurrency, max_keepalive_connections=concurrency)
+    await gateway.start()
+
+    stub.reset()
+    started = time.perf_counter()
+    await run_bounded(concurrency, [gateway.send(m["phone"], m["message"]) for m in messages])
+    rows.append(("Paylaşılan havuzlu istemci", time.perf_counter() - started, stub.connections, stub.requests))
+
+    stub.reset()
+    started = time.perf_counter()
+    chunks = [messages[i:i + 50] for i in range(0, total, 50)]
+    await run_bounded(concurrency, [gateway.send_bulk(chunk) for chunk in chunks])
+    rows.append(("Toplu gönderim (50'lik)", time.perf_counter() - started, stub.connections, stub.requests))
+
+    await gateway.close()
+    await stub.stop()
+
+    print(f"{total} mesaj, eşzamanlılık {concurrency}")
+    print(f"{'Yöntem':<30}{'Süre (s)':>10}{'Mesaj/s':>10}{'TCP bağl.':>11}{'İstek':>8}")
+    for name, elapsed, connections, requests in rows:
+        print(f"{name:<30}{elapsed:>10.3f}{total / elapsed:>10.0f}{connections:>11}{requests:>8}")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(total, concurrency))
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class _RoundTrip:
+    """
+    mongomock_motor çağrıları event loop'a hiç geri dönmez; gerçek bir
+    sunucudaki gibi eşzamanlı isteklerin araya girebilmesi için her
+    veritabanı çağrısından önce bir kez yield eder.
+    """
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __getitem__(self, name):
+        return _RoundTrip(self._inner[name])
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if hasattr(attr, "find_one"):
+            return _RoundTrip(attr)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                return _yield_then(result)
+            if result is self._inner or hasattr(result, "to_list"):
+                return _RoundTrip(result)
+            return result
+
+        return call
+
+    def __aiter__(self):
+        return self._inner.__aiter__()
+
+
+async def _yield_then(coro):
+    await asyncio.sleep(0)
+    return await coro
+
+
+@pytest.fixture
+def make_db():
+    """
+    Test veritabanı üretici.
+    TEST_MONGO_URL tanımlıysa gerçek mongod, değilse mongomock_motor kullanılır.
+    Event loop test içinde açıldığı için istemci de orada oluşturulur.
+    """
+    test_url = os.environ.get("TEST_MONGO_URL")
+    if not test_url:
+        pytest.importorskip("mongomock_motor")
+
+    created = []
+
+    def factory():
+        if test_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client = AsyncIOMotorClient(test_url, tz_aware=True)
+        else:
+            from mongomock_motor import AsyncMongoMockClient
+            client = AsyncMongoMockClient(tz_aware=True)
+        db = client[f"randevu_test_{uuid.uuid4().hex[:8]}"]
+        created.append((client, db.name))
+        return db if test_url else _RoundTrip(db)
+
+    yield factory
+
+    for client, name in created:
+        if test_url:
+            import pymongo
+            pymongo.MongoClient(test_url).drop_database(name)
+        client.close()
+
+
+@pytest.fixture
+def server_module():
+    import server
+    return server
@@ -0,0 +1,90 @@
+import asyncio
+import random
+import uuid
+
+import httpx
+
+from indexes import ensure_indexes
+
+BUSINESS_ID = "page-business"
+STATUSES = ["confirmed", "completed", "cancelled"]
+
+
+async def seed(db, count=250):
+    await ensure_indexes(db)
+    rng = random.Random(3)
+    appointments = []
+    for n in range(count):
+        appointments.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "business_id": BUSINESS_ID,
+            "customer_name": f"Müşteri {n}",
+            "customer_phone": f"0555{n:07d}",
+            "service_id": "svc",
+            "service_name": "Kesim",
+            "staff_id": rng.choice(["st-1", "st-2"]),
+            "staff_name": None,
+            # Aynı gün + saatte birden fazla kayıt: id ile ayrışmalı
+            "appointment_date": f"2030-01-{rng.randint(1, 20):02d}",
+            "time_slot": rng.choice(["09:00", "10:30", "14:00"]),
+            "duration": 30,
+            "price": 100.0,
+            "status": rng.choice(STATUSES),
+            "notes": None,
+            "created_at": "2029-12-01T10:00:00+00:00",
+        })
+    await db.appointments.insert_many([dict(a) for a in appointments])
+    await db.appointments.insert_one(dict(appointments[0], id="other", business_id="other-business"))
+    return appointments
+
+
+async def walk(client, params):
+    seen, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = await client.get(f"/api/appointments/{BUSINESS_ID}", params=query)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["appointments"]) <= params["limit"]
+        seen.extend(body["appointments"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return seen, pages
+
+
+def key(a):
+    return (a["appointment_date"], a["time_slot"], a["id"])
+
+
+def test_cursor_pages_cover_every_row_once_in_order(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        appointments = await seed(db)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            seen, pages = await walk(client, {"limit": 37})
+            assert [key(a) for a in seen] == sorted((key(a) for a in appointments), reverse=True)
+            assert pages == -(-len(appointments) // 37)
+
+            seen, _ = await walk(client, {"limit": 50, "order": "asc"})
+            assert [key(a) for a in seen] == sorted(key(a) for a in appointments)
+
+            params = {"limit": 10, "date_from": "2030-01-05", "date_to": "2030-01-12", "staff_id": "st-2", "status": "completed"}
+            seen, _ = await walk(client, params)
+            expected = [
+                a for a in appointments
+                if "2030-01-05" <= a["appointment_date"] <= "2030-01-12"
+                and a["staff_id"] == "st-2" and a["status"] == "completed"
+            ]
+            assert expected
+            assert [key(a) for a in seen] == sorted((key(a) for a in expected), reverse=True)
+
+            response = await client.get(f"/api/appointments/{BUSINESS_ID}", params={"cursor": "bozuk"})
+            assert response.status_code == 400
+            response = await client.get(f"/api/appointments/{BUSINESS_ID}", params={"date_from": "17.10.2030"})
+            assert response.status_code == 400
+
+    asyncio.run(run())
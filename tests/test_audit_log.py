@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from audit_log import TTL_INDEX, AuditLogWriter, ensure_retention
+
+ADMIN_EMAIL = "root@example.com"
+
+
+class CountingLogs:
+    """insert_many çağrılarını sayan, istenirse ilk çağrılarda hata veren koleksiyon"""
+
+    def __init__(self, fail_first: int = 0):
+        self.calls = []
+        self.fail_first = fail_first
+
+    def __getitem__(self, name):
+        return self
+
+    async def insert_many(self, docs, ordered=True):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise ConnectionError("bağlantı yok")
+        self.calls.append(list(docs))
+
+
+def test_writer_batches_and_requeues_on_failure():
+    async def run():
+        db = CountingLogs(fail_first=1)
+        writer = AuditLogWriter(batch_size=500, max_buffer=1000)
+        for n in range(1200):
+            writer.record("login", f"user{n}@example.com", {"business_id": "b1"})
+        assert writer.dropped == 200 and writer.pending == 1000
+
+        assert await writer.flush(db) == 0
+        assert writer.pending == 1000
+        assert await writer.flush(db) == 1000
+        assert [len(call) for call in db.calls] == [500, 500]
+        assert db.calls[0][0]["user_email"] == "user200@example.com"
+        assert db.calls[0][0]["business_id"] == "b1"
+        assert writer.metrics() == {"pending": 0, "written": 1000, "dropped": 200, "flushes": 2}
+
+    asyncio.run(run())
+
+
+def test_background_loop_flushes_on_size_and_interval(make_db):
+    async def run():
+        db = make_db()
+        writer = AuditLogWriter(flush_interval=60, batch_size=5)
+        writer.start(db)
+        for n in range(5):
+            writer.record("create_staff", "owner@example.com")
+        await asyncio.sleep(0.05)
+        assert await db.logs.count_documents({}) == 5
+
+        writer.record("create_staff", "owner@example.com")
+        await writer.stop()
+        assert await db.logs.count_documents({}) == 6
+
+        await ensure_retention(db, 30)
+        assert (await db.logs.index_information())[TTL_INDEX]["expireAfterSeconds"] == 30 * 86400
+
+    asyncio.run(run())
+
+
+def test_logs_endpoint_filters_and_paginates(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "SUPER_ADMIN_EMAIL", ADMIN_EMAIL)
+        server_module.principal_cache.clear()
+        await db.users.insert_one({"id": "root", "email": ADMIN_EMAIL})
+        base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        await db.logs.insert_many([
+            {
+                "id": f"log{n:02d}", "timestamp": base + timedelta(hours=n // 2),
+                "action": "login" if n % 3 else "create_business", "user_email": f"u{n % 2}@example.com",
+                "business_id": "b1" if n % 2 else "b2", "details": {}, "type": "info"
+            }
+            for n in range(30)
+        ])
+        headers = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'root'})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            seen, cursor = [], None
+            while True:
+                params = {"business_id": "b1", "limit": 4, **({"cursor": cursor} if cursor else {})}
+                page = (await client.get("/api/superadmin/logs", params=params, headers=headers)).json()
+                seen.extend(log["id"] for log in page["logs"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            assert seen == [f"log{n:02d}" for n in range(29, 0, -2)]
+
+            page = (await client.get("/api/superadmin/logs", headers=headers, params={
+                "action": "create_business", "date_from": "2030-01-01T03:00:00+00:00", "date_to": "2030-01-01T06:00:00+00:00"
+            })).json()
+            assert [log["id"] for log in page["logs"]] == ["log12", "log09", "log06"]
+
+            whole_day = (await client.get("/api/superadmin/logs", headers=headers, params={"date_to": "2030-01-01", "limit": 500})).json()
+            assert len(whole_day["logs"]) == 30
+
+            bad = await client.get("/api/superadmin/logs", headers=headers, params={"cursor": "bozuk"})
+            assert bad.status_code == 400
+
+            # create_log isteği bekletmez; kayıt tampondan yazılır
+            await client.post("/api/superadmin/reports/rebuild", headers=headers, params={"business_id": "b9"})
+            assert server_module.audit_log.pending >= 1
+            await server_module.audit_log.flush(db)
+            assert await db.logs.count_documents({"action": "rebuild_reports", "business_id": "b9"}) == 1
+
+    asyncio.run(run())
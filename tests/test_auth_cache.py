@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from auth_cache import LastLoginTracker, PrincipalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_principal_cache_ttl_and_invalidation():
+    clock = FakeClock()
+    cache = PrincipalCache(ttl_seconds=60, max_size=2, clock=clock)
+
+    cache.set("u1", {"id": "u1", "business_id": "b1"})
+    assert cache.get("u1")["id"] == "u1"
+
+    clock.now = 61
+    assert cache.get("u1") is None
+
+    cache.set("u1", {"id": "u1", "business_id": "b1"})
+    cache.set("u2", {"id": "u2", "business_id": "b2"})
+    cache.invalidate_business("b1")
+    assert cache.get("u1") is None
+    assert cache.get("u2") is not None
+
+    cache.set("u3", {"id": "u3"})
+    cache.set("u4", {"id": "u4"})
+    assert cache.get("u2") is None
+
+
+def test_last_login_writes_are_coalesced(make_db):
+    async def run():
+        db = make_db()
+        await db.users.insert_one({"id": "u1", "email": "a@example.com"})
+        tracker = LastLoginTracker(resolution_minutes=5)
+        start = datetime(2030, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+        for minute in range(4):
+            tracker.touch("u1", None, now=start + timedelta(minutes=minute))
+        assert await tracker.flush(db) == 1
+        assert (await db.users.find_one({"id": "u1"}))["last_login"] == start
+
+        tracker.touch("u1", None, now=start + timedelta(minutes=4))
+        assert await tracker.flush(db) == 0
+
+        tracker.touch("u1", None, now=start + timedelta(minutes=6))
+        assert await tracker.flush(db) == 1
+
+    asyncio.run(run())
+
+
+def test_last_login_tracker_forgets_expired_entries():
+    tracker = LastLoginTracker(resolution_minutes=5, max_size=3)
+    start = datetime(2030, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+    for n in range(3):
+        tracker.touch(f"u{n}", None, now=start)
+    tracker.touch("u9", None, now=start + timedelta(minutes=6))
+    assert list(tracker._seen) == ["u9"]
+
+    for n in range(5):
+        tracker.touch(f"v{n}", None, now=start + timedelta(minutes=7))
+    assert len(tracker._seen) == 3
+
+def test_cached_principal_needs_no_db_calls(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        server_module.principal_cache.clear()
+        await db.users.insert_one({"id": "u1", "email": "a@example.com", "name": "A", "password_hash": "x"})
+        token = server_module.create_access_token({"sub": "u1", "email": "a@example.com"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        user = await server_module.get_current_user(credentials)
+        assert "password_hash" not in user
+
+        class NoDatabase:
+            def __getattr__(self, name):
+                raise AssertionError("önbellekteki kullanıcı için DB'ye gidilmemeli")
+
+        monkeypatch.setattr(server_module, "db", NoDatabase())
+        user = await server_module.get_current_user(credentials)
+        assert user["id"] == "u1"
+
+    asyncio.run(run())
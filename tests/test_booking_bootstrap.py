@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+
+from indexes import ensure_indexes
+from slot_locks import rebuild_slot_locks
+
+BUSINESS_ID = "boot-business"
+DAY = "2030-01-07"  # Pazartesi
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({
+        "id": BUSINESS_ID, "name": "Bootstrap Salon", "slug": "boot", "working_hours": {"0": None},
+        "owner_email": "gizli@example.com", "is_active": True,
+        "subscription_expires": "2099-01-01T00:00:00+00:00", "created_at": "2024-01-01T00:00:00+00:00"
+    })
+    await db.services.insert_many([
+        {"id": "svc-30", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 100.0},
+        {"id": "svc-90", "business_id": BUSINESS_ID, "name": "Boya", "duration": 90, "price": 300.0},
+    ])
+    await db.staff.insert_many([
+        {"id": "st-1", "business_id": BUSINESS_ID, "name": "Ayşe", "phone": "0555", "email": "a@example.com", "services": [],
+         "working_days": [1, 2, 3, 4, 5]},
+        {"id": "st-2", "business_id": BUSINESS_ID, "name": "Can", "phone": "0556", "services": ["svc-30"],
+         "working_days": [1, 3]},
+    ])
+    await db.appointments.insert_many([
+        {"id": "a1", "business_id": BUSINESS_ID, "staff_id": "st-1", "appointment_date": DAY,
+         "time_slot": "10:00", "duration": 60, "status": "confirmed"},
+        {"id": "a2", "business_id": BUSINESS_ID, "staff_id": "st-2", "appointment_date": DAY,
+         "time_slot": "09:00", "duration": 30, "status": "cancelled"},
+    ])
+    # Boş saatler slot kilitlerinin bitmap'inden okunur (açılıştaki gibi)
+    await rebuild_slot_locks(db)
+
+
+def test_bootstrap_matches_availability_endpoint(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for service_id in (None, "svc-30", "svc-90"):
+                params = {"date_from": DAY, "days": 7}
+                if service_id:
+                    params["service_id"] = service_id
+                response = await client.get("/api/booking/boot", params=params)
+                assert response.status_code == 200
+                body = response.json()
+
+                assert body["business"]["accepting_bookings"] is True
+                assert "owner_email" not in body["business"]
+                assert {s["id"] for s in body["services"]} == {"svc-30", "svc-90"}
+                assert all("email" not in s for s in body["staff"])
+                assert body["availability"]["date_to"] == "2030-01-13"
+
+                for staff_id in ("st-1", "st-2"):
+                    query = {"business_id": BUSINESS_ID, "staff_id": staff_id, "date_from": DAY, "date_to": "2030-01-13"}
+                    if service_id:
+                        query["service_id"] = service_id
+                    expected = (await client.get("/api/appointments/availability", params=query)).json()
+                    assert body["availability"]["staff"][staff_id] == {
+                        d["date"]: d["slots"] for d in expected["days"] if d["slots"]
+                    }
+
+                query = {"business_id": BUSINESS_ID, "date_from": DAY, "date_to": "2030-01-13"}
+                if service_id:
+                    query["service_id"] = service_id
+                expected = (await client.get("/api/appointments/availability", params=query)).json()
+                assert body["availability"]["any"] == {d["date"]: d["slots"] for d in expected["days"] if d["slots"]}
+
+            monday = (await client.get("/api/booking/boot", params={"date_from": DAY, "service_id": "svc-90"})).json()
+            assert "st-2" not in [s for s, days in monday["availability"]["staff"].items() if days]
+            assert "10:00" not in monday["availability"]["staff"]["st-1"][DAY]
+
+            assert (await client.get("/api/booking/yok")).status_code == 404
+            assert (await client.get("/api/booking/boot", params={"service_id": "yok"})).status_code == 404
+
+    asyncio.run(run())
+
+
+def test_availability_time_slot_and_duration_checks(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = "/api/appointments/availability"
+            query = {"business_id": BUSINESS_ID, "staff_id": "st-1", "appointment_date": DAY}
+            busy = (await client.get(url, params={**query, "time_slot": "10:00"})).json()
+            assert busy["available"] is False and [d["date"] for d in busy["days"]] == [DAY]
+            assert (await client.get(url, params={**query, "time_slot": "11:00"})).json()["available"] is True
+
+            for duration in (0, -30, 24 * 60 + 1):
+                response = await client.get(url, params={**query, "duration": duration})
+                assert response.status_code == 422
+            assert (await client.get(url, params={**query, "duration": 90})).json()["duration"] == 90
+
+    asyncio.run(run())
@@ -0,0 +1,172 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import httpx
+
+from indexes import ensure_indexes
+from reports import rebuild_rollups
+
+BUSINESS_ID = "bulk-business"
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({"id": BUSINESS_ID, "name": "Toplu", "slug": "toplu", "is_active": True})
+    await db.users.insert_many([
+        {"id": "owner", "email": "owner@example.com", "business_id": BUSINESS_ID},
+        {"id": "other", "email": "other@example.com", "business_id": "someone-else"},
+    ])
+    await db.services.insert_many([
+        {"id": "s30", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 100.0},
+        {"id": "s60", "business_id": BUSINESS_ID, "name": "Boya", "duration": 60, "price": 300.0},
+    ])
+    await db.staff.insert_many([
+        {"id": "st1", "business_id": BUSINESS_ID, "name": "Ayşe"},
+        {"id": "st2", "business_id": BUSINESS_ID, "name": "Mehmet"},
+    ])
+
+
+def auth(server_module, user_id):
+    return {"Authorization": f"Bearer {server_module.create_access_token({'sub': user_id})}"}
+
+
+def row(**fields):
+    base = {"customer_name": "Müşteri", "customer_phone": "0555", "service_id": "s30",
+            "staff_id": "st1", "appointment_date": "2030-02-01", "time_slot": "10:00"}
+    base.update(fields)
+    return base
+
+
+async def snapshot(db, collection):
+    docs = await db[collection].find({}, {"_id": 0}).to_list(None)
+    for doc in docs:
+        # Artımlı yol sıfırlanan sayaçları 0 olarak bırakır, rebuild hiç yazmaz
+        for field in ("counts", "revenue"):
+            if field in doc:
+                doc[field] = {k: v for k, v in doc[field].items() if v}
+    return sorted(docs, key=lambda d: json.dumps(d, sort_keys=True, default=str))
+
+
+async def assert_rollups_consistent(db):
+    incremental = await snapshot(db, "report_rollups"), await snapshot(db, "report_customers")
+    await rebuild_rollups(db, BUSINESS_ID)
+    assert incremental == (await snapshot(db, "report_rollups"), await snapshot(db, "report_customers"))
+
+
+def test_import_reports_row_errors_and_writes_valid_rows(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        server_module.principal_cache.clear()
+        await seed(db)
+        await db.appointments.insert_one({**row(time_slot="15:00"), "id": "existing", "business_id": BUSINESS_ID,
+                                          "duration": 30, "status": "confirmed", "price": 100.0,
+                                          "created_at": datetime(2030, 1, 1, tzinfo=timezone.utc)})
+
+        lines = [
+            json.dumps(row()),                                                    # 1 geçerli
+            json.dumps(row(time_slot="10:15", staff_id="st2")),                   # 2 geçerli (başka personel)
+            "{bozuk",                                                             # 3 geçersiz JSON
+            json.dumps(row(time_slot="10:15")),                                   # 4 dosyadaki 1. satırla çakışır
+            json.dumps(row(time_slot="14:45", service_id="s60")),                 # 5 mevcut randevuyla çakışır
+            json.dumps(row(service_id="yok")),                                    # 6 hizmet yok
+            json.dumps(row(time_slot="25:00")),                                   # 7 geçersiz saat
+            "",
+            json.dumps(row(staff_id="kimse")),                                    # 9 personel yok
+            json.dumps({"customer_name": "Eksik"}),                               # 10 zorunlu alanlar yok
+            json.dumps(row(time_slot="10:15", status="cancelled")),               # 11 iptal, yer tutmaz
+            json.dumps(row(appointment_date="2029-06-01", status="completed", customer_phone="0666",
+                           created_at="2029-06-01T10:00:00+03:00")),              # 12 geçmiş kayıt
+            json.dumps(row(status="bilinmiyor")),                                 # 13 geçersiz durum
+        ]
+        body = "\n".join(lines).encode()
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/appointments/{BUSINESS_ID}/import"
+            denied = await client.post(url, content=body, headers=auth(server_module, "other"))
+            assert denied.status_code == 403
+
+            dry = (await client.post(url, content=body, params={"dry_run": "true"}, headers=auth(server_module, "owner"))).json()
+            assert (dry["valid"], dry["inserted"]) == (4, 0)
+            assert await db.appointments.count_documents({}) == 1
+
+            result = (await client.post(url, content=body, headers=auth(server_module, "owner"))).json()
+            assert (result["valid"], result["inserted"], result["failed"]) == (4, 4, 8)
+            assert [e["row"] for e in result["errors"]] == [3, 4, 5, 6, 7, 9, 10, 13]
+            assert "Hizmet bulunamadı" in result["errors"][3]["error"]
+
+            csv_body = (
+                "customer_name,customer_phone,service_id,staff_id,appointment_date,time_slot,notes\n"
+                "Can,0777,s30,st2,2030-02-02,09:00,\n"
+                "Can,0777,s30,st2,2030-02-02,09:00,\n"
+            ).encode()
+            result = (await client.post(url, content=csv_body, headers={**auth(server_module, "owner"), "Content-Type": "text/csv"})).json()
+            assert (result["inserted"], result["errors"]) == (1, [{"row": 3, "error": result["errors"][0]["error"]}])
+
+        imported = await db.appointments.find({"id": {"$ne": "existing"}}, {"_id": 0}).to_list(None)
+        assert len(imported) == 5
+        historical = next(a for a in imported if a["status"] == "completed")
+        assert historical["created_at"] == datetime(2029, 6, 1, 7, 0, tzinfo=timezone.utc)
+        assert (historical["start_minute"], historical["end_minute"]) == (600, 630)
+
+        # Kilitler de yazıldı: aynı saate canlı rezervasyon reddedilir
+        lock = await db.slot_locks.find_one({"staff_id": "st1", "date": "2030-02-01"})
+        assert {i["start"] for i in lock["intervals"]} == {600}
+        assert (await db.businesses.find_one({"id": BUSINESS_ID}))["total_appointments"] == 5
+
+        # Sayaçlar tek tek kayıtla aynı
+        await db.appointments.delete_one({"id": "existing"})
+        await assert_rollups_consistent(db)
+
+    asyncio.run(run())
+
+
+def test_bulk_status_update(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        server_module.principal_cache.clear()
+        await seed(db)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            owner = auth(server_module, "owner")
+            lines = [json.dumps(row(appointment_date="2030-03-01", time_slot=f"{9 + n:02d}:00", staff_id=f"st{n % 2 + 1}"))
+                     for n in range(6)]
+            lines.append(json.dumps(row(appointment_date="2030-03-02", time_slot="09:00")))
+            await client.post(f"/api/appointments/{BUSINESS_ID}/import", content="\n".join(lines).encode(), headers=owner)
+            ids = {a["time_slot"] + a["appointment_date"]: a["id"] for a in await db.appointments.find({}, {"_id": 0}).to_list(None)}
+            url = f"/api/appointments/{BUSINESS_ID}/status/bulk"
+
+            assert (await client.post(url, json={"status": "completed"}, headers=owner)).status_code == 400
+            assert (await client.post(url, json={"status": "olmaz", "date_from": "2030-03-01"}, headers=owner)).status_code == 400
+            denied = await client.post(url, json={"status": "completed", "date_from": "2030-03-01"}, headers=auth(server_module, "other"))
+            assert denied.status_code == 403
+
+            # Günün onaylı randevularını tamamla
+            result = (await client.post(url, json={
+                "status": "completed", "date_from": "2030-03-01", "date_to": "2030-03-01", "current_status": "confirmed"
+            }, headers=owner)).json()
+            assert (result["matched"], result["updated"], result["failed"]) == (6, 6, 0)
+            assert await db.appointments.count_documents({"status": "completed"}) == 6
+
+            # İptal kilidi bırakır; yerine başka randevu alınınca geri açmak çakışır
+            target = ids["09:002030-03-02"]
+            result = (await client.post(url, json={"status": "cancelled", "ids": [target, "yok"]}, headers=owner)).json()
+            assert result["updated"] == 1
+            assert result["errors"] == [{"id": "yok", "error": "Randevu bulunamadı"}]
+            again = await client.post(f"/api/appointments/{BUSINESS_ID}/import",
+                                      content=json.dumps(row(appointment_date="2030-03-02", time_slot="09:00")).encode(), headers=owner)
+            assert again.json()["inserted"] == 1
+            result = (await client.post(url, json={"status": "confirmed", "ids": [target]}, headers=owner)).json()
+            assert result["updated"] == 0 and "çakışan" in result["errors"][0]["error"]
+
+            single = await client.patch(f"/api/appointments/{target}/status", params={"status": "pending"},
+                                        headers=auth(server_module, "other"))
+            assert single.status_code == 403
+
+        await assert_rollups_consistent(db)
+
+    asyncio.run(run())
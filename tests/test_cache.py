@@ -0,0 +1,166 @@
+import asyncio
+import fnmatch
+import uuid
+
+import httpx
+
+from cache import LocalBackend, ReadThroughCache, RedisBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """redis.asyncio istemcisinin önbelleğin kullandığı alt kümesi (TTL yok sayılır)"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match="*"):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+    async def aclose(self):
+        pass
+
+
+class NoDatabase:
+    def __getattr__(self, name):
+        raise AssertionError("önbellekteki yanıt için DB'ye gidilmemeli")
+
+
+def test_local_backend_ttl_and_lru():
+    async def run():
+        clock = FakeClock()
+        backend = LocalBackend(max_size=2, clock=clock)
+        await backend.set("a", ("e", b"1"), ttl=10)
+        assert await backend.get("a") == ("e", b"1")
+        clock.now = 11
+        assert await backend.get("a") is None
+
+        await backend.set("a", ("e", b"1"), ttl=10)
+        await backend.set("b", ("e", b"2"), ttl=10)
+        await backend.get("a")
+        await backend.set("c", ("e", b"3"), ttl=10)
+        assert await backend.get("b") is None
+        assert await backend.get("a") is not None
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_share_one_load_and_invalidation_wins():
+    async def run():
+        cache = ReadThroughCache(RedisBackend(FakeRedis()), ttl_seconds=60)
+        loads = 0
+        release = asyncio.Event()
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await release.wait()
+            return b'{"v":1}'
+
+        waiters = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(50)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        assert loads == 1
+        assert {body for _, body in results} == {b'{"v":1}'}
+        assert (await cache.get_or_load("k", loader))[1] == b'{"v":1}'
+        assert cache.hits == 1
+
+        # Yükleme sürerken gelen invalidate'ten sonra eski değer yazılmamalı
+        await cache.invalidate("k")
+        release.clear()
+        stale = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        await cache.invalidate("k")
+        release.set()
+        await stale
+        assert await cache.backend.get("k") is None
+
+        await cache.get_or_load("k", loader)
+        await cache.clear()
+        assert cache.backend.client.data == {}
+
+    asyncio.run(run())
+
+
+def test_public_endpoints_are_cached_with_etags_and_invalidated(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "public_cache", ReadThroughCache(LocalBackend(), ttl_seconds=60))
+        server_module.principal_cache.clear()
+
+        business_id = "cache-business"
+        await db.businesses.insert_one({
+            "id": business_id, "name": "Önbellek Salon", "slug": "onbellek", "working_hours": {},
+            "created_at": "2024-01-01T00:00:00+00:00", "subscription_expires": "2099-01-01T00:00:00+00:00"
+        })
+        await db.services.insert_one({
+            "id": "svc", "business_id": business_id, "name": "Kesim", "duration": 30, "price": 100.0,
+            "created_at": "2024-01-01T00:00:00+00:00"
+        })
+        user_id = str(uuid.uuid4())
+        await db.users.insert_one({"id": user_id, "email": "o@example.com", "business_id": business_id})
+        auth = {"Authorization": f"Bearer {server_module.create_access_token({'sub': user_id})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get("/api/businesses/onbellek")
+            assert first.status_code == 200
+            assert first.json()["name"] == "Önbellek Salon"
+            services = await client.get(f"/api/services/{business_id}")
+            assert [s["name"] for s in services.json()] == ["Kesim"]
+            assert (await client.get("/api/businesses/yok")).status_code == 404
+
+            # İsabetli istekler veritabanına gitmez; aynı ETag ile 304 döner
+            monkeypatch.setattr(server_module, "db", NoDatabase())
+            again = await client.get("/api/businesses/onbellek")
+            assert again.content == first.content
+            not_modified = await client.get(
+                f"/api/services/{business_id}", headers={"If-None-Match": services.headers["etag"]}
+            )
+            assert not_modified.status_code == 304
+            assert not_modified.content == b""
+            monkeypatch.setattr(server_module, "db", db)
+
+            response = await client.put("/api/services/svc", headers=auth, json={
+                "name": "Sakal", "duration": 30, "price": 80.0
+            })
+            assert response.status_code == 200
+            refreshed = await client.get(
+                f"/api/services/{business_id}", headers={"If-None-Match": services.headers["etag"]}
+            )
+            assert refreshed.status_code == 200
+            assert [s["name"] for s in refreshed.json()] == ["Sakal"]
+
+            response = await client.put(f"/api/businesses/{business_id}", headers=auth, json={
+                "name": "Yeni Salon", "slug": "yeni-salon"
+            })
+            assert response.status_code == 200
+            assert (await client.get("/api/businesses/onbellek")).status_code == 404
+            assert (await client.get("/api/businesses/yeni-salon")).json()["name"] == "Yeni Salon"
+
+            metrics = server_module.public_cache.metrics()
+            assert metrics["hits"] >= 2
+            assert metrics["misses"] >= 4
+
+    asyncio.run(run())
@@ -0,0 +1,172 @@
+import asyncio
+import random
+
+import httpx
+
+from availability import time_to_minutes
+from indexes import ensure_indexes
+from slot_grid import from_words
+
+BUSINESS_ID = "stress-business"
+STAFF_ID = "stress-staff"
+DAY = "2030-01-07"
+CONCURRENT_BOOKINGS = 300
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({
+        "id": BUSINESS_ID,
+        "name": "Stress Salon",
+        "slug": "stress-salon",
+        "working_hours": {},
+        "is_active": True,
+        "subscription_expires": "2099-01-01T00:00:00+00:00"
+    })
+    await db.services.insert_many([
+        {"id": "svc-30", "business_id": BUSINESS_ID, "name": "Kısa", "duration": 30, "price": 100.0},
+        {"id": "svc-60", "business_id": BUSINESS_ID, "name": "Uzun", "duration": 60, "price": 200.0},
+    ])
+    await db.staff.insert_one({
+        "id": STAFF_ID,
+        "business_id": BUSINESS_ID,
+        "name": "Stres Personel",
+        "services": [],
+        "working_days": [0, 1, 2, 3, 4, 5, 6]
+    })
+
+
+def booking(time_slot, service_id, n):
+    return {
+        "customer_name": f"Müşteri {n}",
+        "customer_phone": f"0555{n:07d}",
+        "service_id": service_id,
+        "staff_id": STAFF_ID,
+        "appointment_date": DAY,
+        "time_slot": time_slot,
+    }
+
+
+async def fire(server, payloads):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post(f"/api/appointments/{BUSINESS_ID}", json=p) for p in payloads
+        ))
+
+
+def assert_no_overlap(appointments):
+    intervals = sorted(
+        (time_to_minutes(a['time_slot']), time_to_minutes(a['time_slot']) + a['duration'])
+        for a in appointments
+    )
+    for (_, prev_end), (start, _) in zip(intervals, intervals[1:]):
+        assert start >= prev_end
+
+
+def test_same_slot_only_one_wins(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        responses = await fire(server_module, [
+            booking("10:00", "svc-30", n) for n in range(CONCURRENT_BOOKINGS)
+        ])
+        codes = [r.status_code for r in responses]
+        assert codes.count(200) == 1
+        assert codes.count(400) == CONCURRENT_BOOKINGS - 1
+        assert await db.appointments.count_documents({"staff_id": STAFF_ID}) == 1
+
+    asyncio.run(run())
+
+
+def test_random_overlapping_bookings_never_double_book(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        rng = random.Random(42)
+        slots = [f"{h:02d}:{m:02d}" for h in range(9, 18) for m in (0, 15, 30, 45)]
+        payloads = [
+            booking(rng.choice(slots), rng.choice(["svc-30", "svc-60"]), n)
+            for n in range(CONCURRENT_BOOKINGS)
+        ]
+        responses = await fire(server_module, payloads)
+        assert all(r.status_code in (200, 400) for r in responses)
+
+        stored = await db.appointments.find({"staff_id": STAFF_ID}, {"_id": 0}).to_list(None)
+        assert len(stored) == sum(r.status_code == 200 for r in responses)
+        assert_no_overlap(stored)
+
+        lock = await db.slot_locks.find_one({"staff_id": STAFF_ID, "date": DAY})
+        assert sorted(i['appointment_id'] for i in lock['intervals']) == sorted(a['id'] for a in stored)
+
+    asyncio.run(run())
+
+
+def test_cancel_releases_slot(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        first = (await fire(server_module, [booking("11:00", "svc-60", 1)]))[0]
+        assert first.status_code == 200
+        assert (await fire(server_module, [booking("11:30", "svc-30", 2)]))[0].status_code == 400
+
+        await server_module.update_appointment_status(first.json()["id"], "cancelled", {"business_id": BUSINESS_ID})
+        assert (await fire(server_module, [booking("11:30", "svc-30", 3)]))[0].status_code == 200
+
+    asyncio.run(run())
+
+
+def test_failed_reactivation_releases_slot(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        first = (await fire(server_module, [booking("11:00", "svc-60", 1)]))[0]
+        appointment_id = first.json()["id"]
+        user = {"business_id": BUSINESS_ID}
+        await server_module.update_appointment_status(appointment_id, "cancelled", user)
+
+        reserve_slot = server_module.reserve_slot
+
+        async def reserve_then_race(*args):
+            conflict = await reserve_slot(*args)
+            # Kilit alındıktan sonra başka bir istek randevuyu değiştirir
+            await db.appointments.update_one({"id": appointment_id}, {"$set": {"status": "pending"}})
+            return conflict
+
+        monkeypatch.setattr(server_module, "reserve_slot", reserve_then_race)
+        try:
+            await server_module.update_appointment_status(appointment_id, "confirmed", user)
+            raise AssertionError("404 bekleniyordu")
+        except server_module.HTTPException as e:
+            assert e.status_code == 404
+
+        lock = await db.slot_locks.find_one({"staff_id": STAFF_ID, "date": DAY})
+        assert lock['intervals'] == [] and from_words(lock.get('cells')) == 0
+
+    asyncio.run(run())
+
+
+def test_invalid_slot_or_date_is_rejected(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        bad_slot, bad_date = booking("25:00", "svc-30", 1), booking("10:00", "svc-30", 2)
+        bad_date["appointment_date"] = "2030-13-40"
+        responses = await fire(server_module, [bad_slot, booking("10:0", "svc-30", 3), bad_date])
+        assert [r.status_code for r in responses] == [400, 400, 400]
+        assert responses[0].json()["detail"] == "Geçersiz saat formatı (SS:DD)"
+        assert responses[2].json()["detail"] == "Geçersiz tarih formatı (YYYY-AA-GG)"
+        assert await db.appointments.count_documents({}) == 0
+        assert await db.slot_locks.count_documents({}) == 0
+
+    asyncio.run(run())
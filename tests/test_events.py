@@ -0,0 +1,134 @@
+import asyncio
+import uuid
+
+import httpx
+
+from events import APPOINTMENT_CREATED, APPOINTMENT_STATUS, RESYNC, EventBroker, event_from_change, sse_stream
+from indexes import ensure_indexes
+
+BUSINESS_ID = "events-business"
+
+
+async def seed(db, server):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({
+        "id": BUSINESS_ID, "name": "Olay Salon", "slug": "olay-salon", "working_hours": {},
+        "is_active": True, "subscription_expires": "2099-01-01T00:00:00+00:00"
+    })
+    await db.services.insert_one({"id": "svc", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 100.0})
+    user_id = str(uuid.uuid4())
+    await db.users.insert_one({
+        "id": user_id, "email": "owner@example.com", "full_name": "Sahip",
+        "business_id": BUSINESS_ID, "password_hash": "x", "created_at": "2024-01-01T00:00:00+00:00"
+    })
+    return server.create_access_token({"sub": user_id})
+
+
+def test_broker_fans_out_per_business_and_resyncs_slow_clients():
+    async def run():
+        broker = EventBroker(max_queue=3)
+        mine = broker.subscribe("a")
+        other = broker.subscribe("b")
+
+        broker.publish("a", APPOINTMENT_STATUS, {"id": "1", "status": "completed"})
+        assert (await mine.get(0.1))["data"] == {"id": "1", "status": "completed"}
+        assert await other.get(0.01) is None
+
+        for n in range(10):
+            broker.publish("a", APPOINTMENT_STATUS, {"id": str(n), "status": "completed"})
+        events = [await mine.get(0.01) for _ in range(3)]
+        assert RESYNC in [e["type"] for e in events if e]
+        assert broker.dropped > 0
+
+        mine.close()
+        other.close()
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+def test_sse_stream_formats_events_and_heartbeats():
+    async def run():
+        broker = EventBroker()
+        subscription = broker.subscribe("a")
+        checks = iter([False, False, True])
+
+        async def is_disconnected():
+            return next(checks)
+
+        broker.publish("a", APPOINTMENT_STATUS, {"id": "1", "status": "cancelled"})
+        chunks = [chunk async for chunk in sse_stream(subscription, is_disconnected, heartbeat_seconds=0.01)]
+        assert chunks[0].startswith("retry:")
+        assert chunks[1] == 'event: appointment.status\ndata: {"id": "1", "status": "cancelled"}\n\n'
+        assert chunks[2] == ": ping\n\n"
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+def test_change_stream_records_map_to_events():
+    doc = {"_id": "oid", "id": "1", "business_id": "a", "status": "cancelled"}
+    assert event_from_change({"operationType": "insert", "fullDocument": doc}) == (
+        "a", {"type": APPOINTMENT_CREATED, "data": {"id": "1", "business_id": "a", "status": "cancelled"}}
+    )
+    assert event_from_change({
+        "operationType": "update", "fullDocument": doc,
+        "updateDescription": {"updatedFields": {"status": "cancelled"}}
+    }) == ("a", {"type": APPOINTMENT_STATUS, "data": {"id": "1", "status": "cancelled"}})
+    assert event_from_change({
+        "operationType": "update", "fullDocument": doc,
+        "updateDescription": {"updatedFields": {"notes": "x"}}
+    }) == (None, None)
+    assert event_from_change({
+        "operationType": "update", "fullDocument": doc,
+        "updateDescription": {"updatedFields": {"appointment_date": "2030-01-08", "time_slot": "11:00"}}
+    }) == ("a", {"type": RESYNC, "data": {}})
+
+
+def test_changestream_mode_still_publishes_resync():
+    broker = EventBroker(source="changestream")
+    subscription = broker.subscribe("a")
+    broker.publish("a", APPOINTMENT_STATUS, {"id": "1", "status": "cancelled"})
+    broker.publish("a", RESYNC, {})
+    assert subscription.queue.qsize() == 1
+    assert subscription.queue.get_nowait() == {"type": RESYNC, "data": {}}
+
+
+def test_booking_and_status_change_are_pushed_to_dashboard(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        broker = EventBroker()
+        monkeypatch.setattr(server_module, "event_broker", broker)
+        token = await seed(db, server_module)
+        subscription = broker.subscribe(BUSINESS_ID)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(f"/api/appointments/{BUSINESS_ID}", json={
+                "customer_name": "Ali", "customer_phone": "05551112233", "service_id": "svc",
+                "appointment_date": "2030-01-07", "time_slot": "10:00"
+            })
+            assert response.status_code == 200
+            appointment_id = response.json()["id"]
+
+            created = await subscription.get(0.1)
+            assert created["type"] == APPOINTMENT_CREATED
+            assert created["data"]["id"] == appointment_id
+            assert "_id" not in created["data"]
+
+            response = await client.patch(
+                f"/api/appointments/{appointment_id}/status?status=completed",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 200
+            assert await subscription.get(0.1) == {
+                "type": APPOINTMENT_STATUS, "data": {"id": appointment_id, "status": "completed"}
+            }
+
+            response = await client.get(f"/api/events/other-business?token={token}")
+            assert response.status_code == 403
+            response = await client.get(f"/api/events/{BUSINESS_ID}?token=bozuk")
+            assert response.status_code == 401
+
+    asyncio.run(run())
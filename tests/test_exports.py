@@ -0,0 +1,127 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import httpx
+
+import exports
+
+ADMIN_EMAIL = "root@example.com"
+
+
+async def seed(db):
+    await db.users.insert_many([
+        {"id": "owner", "email": "owner@example.com", "business_id": "b1"},
+        {"id": "other", "email": "other@example.com", "business_id": "b2"},
+        {"id": "root", "email": ADMIN_EMAIL},
+    ])
+    docs = []
+    for business_id in ("b1", "b2"):
+        for n in range(40):
+            docs.append({
+                "id": f"{business_id}-{n:03d}", "business_id": business_id,
+                "appointment_date": f"2030-01-{n % 20 + 1:02d}", "time_slot": f"{9 + n % 8:02d}:00",
+                "duration": 30, "status": "completed" if n % 4 == 0 else "confirmed",
+                "customer_name": "Şule, \"Çağ\"", "customer_phone": "05550000000",
+                "service_id": "s1", "service_name": "Saç", "staff_id": None, "staff_name": None,
+                "price": 150.0, "notes": None,
+                "created_at": datetime(2029, 12, 1, 10, 0, tzinfo=timezone.utc),
+            })
+    await db.appointments.insert_many(docs)
+    return docs
+
+
+def read_csv(body: bytes):
+    text = body.decode("utf-8")
+    assert text.startswith("﻿")
+    return list(csv.DictReader(io.StringIO(text[1:])))
+
+
+def test_business_export_streams_filtered_csv_and_gzip_ndjson(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "SUPER_ADMIN_EMAIL", ADMIN_EMAIL)
+        monkeypatch.setattr(exports, "FLUSH_BYTES", 256)
+        server_module.principal_cache.clear()
+        docs = await seed(db)
+
+        def auth(user_id):
+            return {"Authorization": f"Bearer {server_module.create_access_token({'sub': user_id})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            params = {"date_from": "2030-01-05", "date_to": "2030-01-10", "batch_size": 3}
+            response = await client.get("/api/appointments/b1/export", headers=auth("owner"), params=params)
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/csv")
+            assert 'filename="randevular-b1.csv"' in response.headers["content-disposition"]
+            rows = read_csv(response.content)
+            expected = sorted(
+                (d for d in docs if d["business_id"] == "b1" and "2030-01-05" <= d["appointment_date"] <= "2030-01-10"),
+                key=lambda d: (d["appointment_date"], d["time_slot"], d["id"])
+            )
+            assert [r["id"] for r in rows] == [d["id"] for d in expected]
+            assert rows[0]["customer_name"] == "Şule, \"Çağ\""
+            assert rows[0]["staff_id"] == ""
+            assert rows[0]["created_at"] == "2029-12-01T10:00:00+00:00"
+
+            response = await client.get(
+                "/api/appointments/b1/export", headers=auth("owner"),
+                params={"format": "ndjson", "gzip": "true", "status": "completed"}
+            )
+            assert response.headers["content-type"] == "application/gzip"
+            lines = [json.loads(line) for line in gzip.decompress(response.content).decode().splitlines()]
+            assert len(lines) == 10
+            assert {line["status"] for line in lines} == {"completed"}
+            assert set(lines[0]) == set(exports.APPOINTMENT_FIELDS)
+
+            assert (await client.get("/api/appointments/b1/export", headers=auth("other"))).status_code == 403
+            bad = await client.get("/api/appointments/b1/export", headers=auth("owner"), params={"format": "xml"})
+            assert bad.status_code == 400
+
+            response = await client.get("/api/superadmin/export/appointments", headers=auth("root"))
+            assert len(read_csv(response.content)) == len(docs)
+            assert (await client.get("/api/superadmin/export/appointments", headers=auth("owner"))).status_code == 403
+
+    asyncio.run(run())
+
+
+class FakeCursor:
+    def __init__(self, count):
+        self.remaining = count
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.remaining == 0:
+            raise StopAsyncIteration
+        self.remaining -= 1
+        return {"id": str(self.remaining), "price": 1.5}
+
+    async def close(self):
+        self.closed = True
+
+
+def test_export_emits_bounded_chunks_and_closes_cursor_early(monkeypatch):
+    async def run():
+        monkeypatch.setattr(exports, "FLUSH_BYTES", 1024)
+        cursor = FakeCursor(20000)
+        sizes = [len(chunk) async for chunk in exports.export_stream(cursor, "csv", fields=("id", "price"))]
+        assert len(sizes) > 100
+        assert max(sizes) < 1024 + 64
+        assert cursor.closed
+
+        # İstemci yarıda keserse cursor kapatılır
+        cursor = FakeCursor(20000)
+        stream = exports.export_stream(cursor, "ndjson", fields=("id",), compress=True)
+        await stream.__anext__()
+        await stream.aclose()
+        assert cursor.closed and cursor.remaining > 0
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+import pytest
+
+from indexes import INDEXES, IndexRegressionError, ensure_indexes, has_collscan, verify_query_plans
+
+
+def test_ensure_indexes_is_idempotent(make_db):
+    async def run():
+        db = make_db()
+        await ensure_indexes(db)
+        await ensure_indexes(db)
+
+        for collection, models in INDEXES.items():
+            info = await db[collection].index_information()
+            for model in models:
+                spec = model.document
+                assert spec["name"] in info
+                assert info[spec["name"]].get("unique", False) == spec.get("unique", False)
+
+    asyncio.run(run())
+
+
+def test_has_collscan_walks_nested_plans():
+    ixscan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "slug_1"}}
+    assert not has_collscan(ixscan)
+    assert has_collscan({"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}})
+    assert has_collscan({"stage": "OR", "inputStages": [ixscan, {"stage": "COLLSCAN"}]})
+    assert has_collscan({"shards": [{"winningPlan": {"queryPlan": {"stage": "COLLSCAN"}}}]})
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_MONGO_URL"), reason="explain() gerçek mongod gerektirir")
+def test_registered_query_shapes_use_indexes(make_db):
+    async def run():
+        db = make_db()
+        for collection in INDEXES:
+            await db[collection].insert_one({"_seed": True})
+
+        with pytest.raises(IndexRegressionError):
+            await verify_query_plans(db, strict=True)
+
+        await ensure_indexes(db)
+        assert await verify_query_plans(db, strict=True) == []
+
+    asyncio.run(run())
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import httpx
+
+from metrics import AppMetrics, MetricsRegistry, RequestStats, current_request
+from whatsapp_client import WhatsAppGateway
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "İşler", ("kind",))
+    histogram = registry.histogram("job_seconds", "Süre", ("kind",), buckets=(0.1, 1))
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, kind="x")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE jobs_total counter" in lines
+    assert 'jobs_total{kind="a\\"b"} 3' in lines
+    assert 'job_seconds_bucket{kind="x",le="0.1"} 2' in lines
+    assert 'job_seconds_bucket{kind="x",le="1"} 3' in lines
+    assert 'job_seconds_bucket{kind="x",le="+Inf"} 4' in lines
+    assert 'job_seconds_sum{kind="x"} 3.65' in lines
+    assert 'job_seconds_count{kind="x"} 4' in lines
+
+
+def test_command_listener_attributes_commands_to_current_request():
+    metrics = AppMetrics()
+    listener = metrics.command_listener
+    listener.succeeded(SimpleNamespace(command_name="find", duration_micros=2000))
+
+    stats = RequestStats()
+    token = current_request.set(stats)
+    try:
+        listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+        listener.failed(SimpleNamespace(command_name="insert", duration_micros=500))
+    finally:
+        current_request.reset(token)
+
+    assert (stats.db_commands, stats.db_failures) == (2, 1)
+    assert abs(stats.db_seconds - 0.002) < 1e-9
+    assert metrics.db_commands.value(command="find", outcome="ok") == 2
+    assert metrics.db_commands.value(command="insert", outcome="error") == 1
+
+
+def test_whatsapp_gateway_reports_timings():
+    async def run():
+        metrics = AppMetrics()
+        gateway = WhatsAppGateway(base_url="http://gateway", observer=metrics.observe_whatsapp)
+
+        def handler(request):
+            if request.url.path.endswith("send-bulk"):
+                raise httpx.ConnectError("bağlantı yok")
+            return httpx.Response(200, json={"success": True})
+
+        gateway._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        assert await gateway.send("905550000000", "merhaba")
+        assert await gateway.send_bulk([{"phone": "1", "message": "m"}]) == [(False, "bağlantı yok")]
+        await gateway.close()
+
+        assert metrics.whatsapp_requests.value(endpoint="/api/whatsapp/send", outcome="200") == 1
+        assert metrics.whatsapp_requests.value(endpoint="/api/whatsapp/send-bulk", outcome="error") == 1
+        assert metrics.whatsapp_latency.count(endpoint="/api/whatsapp/send") == 1
+
+    asyncio.run(run())
+
+
+def test_middleware_records_routes_and_logs_slow_requests(make_db, server_module, monkeypatch, caplog):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        metrics = server_module.app_metrics
+        monkeypatch.setattr(metrics, "slow_request_ms", 1e-6)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = metrics.requests.value(method="GET", route="/api/booking/{slug}", status=404)
+            with caplog.at_level(logging.WARNING, logger="metrics"):
+                assert (await client.get("/api/booking/yok")).status_code == 404
+            await client.get("/bilinmeyen-yol")
+            assert metrics.requests.value(method="GET", route="/api/booking/{slug}", status=404) == before + 1
+            assert metrics.requests.value(method="GET", route="unmatched", status=404) >= 1
+            assert any("Yavaş istek: GET /api/booking/{slug} 404" in r.getMessage() for r in caplog.records)
+            assert metrics.in_flight.value() == 0
+
+            body = (await client.get("/metrics")).text
+            assert 'http_request_duration_seconds_count{method="GET",route="/api/booking/{slug}"}' in body
+            assert "# TYPE mongodb_command_duration_seconds histogram" in body
+
+            monkeypatch.setattr(server_module, "METRICS_TOKEN", "gizli")
+            assert (await client.get("/metrics")).status_code == 401
+            ok = await client.get("/metrics", headers={"Authorization": "Bearer gizli"})
+            assert ok.status_code == 200 and ok.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    asyncio.run(run())
@@ -0,0 +1,257 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from notification_queue import COLLECTION, NotificationOutbox
+from timefields import migrate_time_fields
+from whatsapp_client import WhatsAppGateway
+
+
+def make_outbox(sender, **kwargs):
+    kwargs.setdefault("base_backoff_seconds", 0)
+    return NotificationOutbox(sender, workers=1, batch_size=10, max_attempts=3, **kwargs)
+
+
+def test_sent_notifications_are_marked_and_measured(make_db):
+    async def run():
+        db = make_db()
+        sent = []
+
+        async def sender(phone, message, message_id=None):
+            sent.append(phone)
+            return True
+
+        outbox = make_outbox(sender)
+        await outbox.enqueue(db, [
+            {"phone": "905551112233", "message": "Müşteri"},
+            {"phone": "905554445566", "message": "Personel"},
+        ])
+
+        assert await outbox.process_batch(db) == 2
+        assert sorted(sent) == ["905551112233", "905554445566"]
+        assert await db[COLLECTION].count_documents({"status": "sent"}) == 2
+
+        metrics = await outbox.metrics(db)
+        assert metrics["queue_depth"] == 0
+        assert metrics["counters"]["sent"] == 2
+
+    asyncio.run(run())
+
+
+def test_failed_sends_retry_then_dead_letter(make_db):
+    async def run():
+        db = make_db()
+        calls = []
+
+        async def sender(phone, message, message_id=None):
+            calls.append(phone)
+            raise RuntimeError("gateway kapalı")
+
+        outbox = make_outbox(sender)
+        await outbox.enqueue(db, [{"phone": "905550000000", "message": "x"}])
+
+        for _ in range(3):
+            assert await outbox.process_batch(db) == 1
+
+        doc = await db[COLLECTION].find_one({}, {"_id": 0})
+        assert len(calls) == 3
+        assert doc["status"] == "dead"
+        assert doc["last_error"] == "gateway kapalı"
+        assert await outbox.process_batch(db) == 0
+
+    asyncio.run(run())
+
+
+def test_backoff_delays_next_attempt(make_db):
+    async def run():
+        db = make_db()
+
+        async def sender(phone, message, message_id=None):
+            return False
+
+        outbox = make_outbox(sender, base_backoff_seconds=60)
+        await outbox.enqueue(db, [{"phone": "905550000000", "message": "x"}])
+
+        assert await outbox.process_batch(db) == 1
+        assert await outbox.process_batch(db) == 0
+        doc = await db[COLLECTION].find_one({}, {"_id": 0})
+        assert doc["status"] == "pending"
+        assert doc["attempts"] == 1
+
+    asyncio.run(run())
+
+
+def test_batches_use_bulk_sender(make_db):
+    async def run():
+        db = make_db()
+        bulk_calls = []
+
+        async def sender(phone, message, message_id=None):
+            raise AssertionError("tekli gönderim kullanılmamalı")
+
+        async def bulk_sender(docs):
+            bulk_calls.append([d["phone"] for d in docs])
+            return [(True, None), (False, "kayıtlı değil")]
+
+        outbox = make_outbox(sender, bulk_sender=bulk_sender)
+        await outbox.enqueue(db, [
+            {"phone": "905551112233", "message": "a"},
+            {"phone": "905554445566", "message": "b"},
+        ])
+
+        assert await outbox.process_batch(db) == 2
+        assert len(bulk_calls) == 1
+        assert await db[COLLECTION].count_documents({"status": "sent"}) == 1
+        failed = await db[COLLECTION].find_one({"status": "pending"}, {"_id": 0})
+        assert failed["last_error"] == "kayıtlı değil"
+
+    asyncio.run(run())
+
+
+def test_unanswered_bulk_send_is_retried_with_same_ids(make_db):
+    async def run():
+        db = make_db()
+        requests = []
+
+        def handler(request):
+            payload = json.loads(request.content)
+            requests.append((payload, request.extensions["timeout"]["read"]))
+            raise httpx.ReadTimeout("yanıt yok", request=request)
+
+        gateway = WhatsAppGateway(base_url="http://gateway", timeout=10, bulk_message_timeout=2)
+        gateway._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        async def sender(phone, message, message_id=None):
+            raise AssertionError("tekli gönderim kullanılmamalı")
+
+        outbox = make_outbox(sender, bulk_sender=gateway.send_bulk)
+        await outbox.enqueue(db, [
+            {"phone": "905551112233", "message": "a"},
+            {"phone": "905554445566", "message": "b"},
+        ])
+        ids = sorted([d["id"] async for d in db[COLLECTION].find({}, {"_id": 0, "id": 1})])
+
+        for _ in range(3):
+            assert await outbox.process_batch(db) == 2
+        await gateway.close()
+
+        # Okuma süresi mesaj sayısıyla ölçeklenir; her denemede aynı id'ler gider
+        assert requests[0][1] == 14
+        assert all(sorted(m["id"] for m in payload["messages"]) == ids for payload, _ in requests)
+        # Mesaj ulaşmış olabilir: dead sayılmaz
+        assert await db[COLLECTION].count_documents({"status": "unconfirmed"}) == 2
+        assert outbox._counters["dead"] == 0
+
+    asyncio.run(run())
+
+
+def test_single_message_timeout_keeps_outbox_id(make_db):
+    async def run():
+        db = make_db()
+        payloads = []
+
+        def handler(request):
+            payloads.append(json.loads(request.content))
+            raise httpx.ReadTimeout("yanıt yok", request=request)
+
+        gateway = WhatsAppGateway(base_url="http://gateway", timeout=10)
+        gateway._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        bulk_calls = []
+
+        async def bulk_sender(docs):
+            bulk_calls.append(len(docs))
+            return [(True, None)] * len(docs)
+
+        # Toplu uç varken tek mesaj da oradan gider
+        outbox = make_outbox(gateway.send, bulk_sender=bulk_sender)
+        await outbox.enqueue(db, [{"phone": "905551112233", "message": "a"}])
+        assert await outbox.process_batch(db) == 1
+        assert bulk_calls == [1] and payloads == []
+
+        # Tekli gönderimde zaman aşımı bilinmeyen sonuçtur: aynı id ile tekrar, sonunda unconfirmed
+        outbox = make_outbox(gateway.send)
+        await outbox.enqueue(db, [{"phone": "905554445566", "message": "b"}])
+        doc = await db[COLLECTION].find_one({"status": "pending"}, {"_id": 0})
+        for _ in range(3):
+            assert await outbox.process_batch(db) == 1
+        await gateway.close()
+
+        assert len(payloads) == 3 and all(p["id"] == doc["id"] for p in payloads)
+        assert (await db[COLLECTION].find_one({"id": doc["id"]}))["status"] == "unconfirmed"
+        assert outbox._counters["dead"] == 0
+
+    asyncio.run(run())
+
+
+def test_concurrent_claims_split_batches(make_db):
+    async def run():
+        db = make_db()
+
+        async def sender(phone, message, message_id=None):
+            return True
+
+        outbox = make_outbox(sender)
+        await outbox.enqueue(db, [{"phone": f"9055500000{n:02d}", "message": "x"} for n in range(25)])
+
+        batches = await asyncio.gather(*(outbox._claim_batch(db) for _ in range(4)))
+        claimed = [doc["id"] for batch in batches for doc in batch]
+        assert all(len(batch) <= 10 for batch in batches)
+        assert len(claimed) == len(set(claimed)) == 25
+        assert await db[COLLECTION].count_documents({"status": "processing"}) == 25
+
+    asyncio.run(run())
+
+
+def test_legacy_string_timestamps_are_claimed_and_migrated(make_db):
+    async def run():
+        db = make_db()
+        past = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+        await db[COLLECTION].insert_one({
+            "id": "eski", "phone": "905550000000", "message": "x", "status": "pending", "attempts": 0,
+            "created_at": past, "next_attempt_at": past, "locked_until": None, "last_error": None
+        })
+
+        async def sender(phone, message, message_id=None):
+            return True
+
+        outbox = make_outbox(sender)
+        await outbox.enqueue(db, [{"phone": "905551112233", "message": "y"}])
+        assert isinstance((await db[COLLECTION].find_one({"id": {"$ne": "eski"}}))["next_attempt_at"], datetime)
+
+        assert await outbox.process_batch(db) == 2
+        legacy = await db[COLLECTION].find_one({"id": "eski"})
+        assert legacy["status"] == "sent" and isinstance(legacy["sent_at"], datetime)
+
+        await db[COLLECTION].update_one({"id": "eski"}, {"$set": {"created_at": past}})
+        await migrate_time_fields(db)
+        assert await db[COLLECTION].count_documents({"created_at": {"$type": "string"}}) == 0
+
+    asyncio.run(run())
+
+
+def test_results_are_not_written_after_lease_is_lost(make_db):
+    async def run():
+        db = make_db()
+
+        async def slow_sender(docs):
+            # Gönderim lease'i aştı: kayıtları başka worker aldı ve birini gönderdi
+            await db[COLLECTION].update_many({}, {"$set": {"lease_token": "diger-worker"}})
+            await db[COLLECTION].update_one({"id": docs[0]["id"]}, {"$set": {"status": "sent", "attempts": 1}})
+            return [(False, "zaman aşımı"), (True, None)]
+
+        outbox = make_outbox(None, bulk_sender=slow_sender)
+        await outbox.enqueue(db, [
+            {"phone": "905551112233", "message": "a"},
+            {"phone": "905554445566", "message": "b"},
+        ])
+
+        assert await outbox.process_batch(db) == 2
+        assert await db[COLLECTION].count_documents({"status": "sent", "attempts": 1}) == 1
+        assert await db[COLLECTION].count_documents({"status": "processing", "lease_token": "diger-worker"}) == 1
+        assert outbox._counters == {"sent": 0, "retried": 0, "dead": 0, "unconfirmed": 0}
+        # Toplu istek tek gönderim süresi örneği üretir
+        assert len(outbox._send_latencies) == 1
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+import asyncio
+
+from passlib.context import CryptContext
+from starlette.requests import Request
+
+from passwords import LoginRateLimiter, PasswordHasher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hasher_round_trip_off_loop():
+    async def run():
+        hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], deprecated="auto"), max_workers=2)
+        hashed = await hasher.hash("Gizli123!")
+        assert await hasher.verify("Gizli123!", hashed)
+        assert not await hasher.verify("yanlis", hashed)
+        hasher.shutdown()
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_sliding_window():
+    clock = FakeClock()
+    limiter = LoginRateLimiter(max_attempts=3, window_seconds=60, clock=clock)
+
+    for _ in range(3):
+        assert limiter.retry_after("a@example.com") == 0
+        limiter.hit("a@example.com")
+        clock.now += 10
+
+    assert limiter.retry_after("a@example.com") == 31
+    assert limiter.retry_after("b@example.com") == 0
+
+    clock.now = 61
+    assert limiter.retry_after("a@example.com") == 0
+
+    limiter.hit("a@example.com")
+    limiter.reset("a@example.com")
+    assert limiter.retry_after("a@example.com") == 0
+
+
+def test_client_ip_ignores_spoofed_forwarded_for(server_module, monkeypatch):
+    def request(forwarded):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "headers": headers, "client": ("10.0.0.5", 1234)})
+
+    monkeypatch.setattr(server_module, "TRUSTED_PROXY_HOPS", 0)
+    assert server_module.client_ip(request("1.1.1.1")) == "10.0.0.5"
+
+    monkeypatch.setattr(server_module, "TRUSTED_PROXY_HOPS", 1)
+    # İstemcinin yazdığı girdi atlanır, proxy'nin eklediği kullanılır
+    assert server_module.client_ip(request("1.1.1.1, 203.0.113.7")) == "203.0.113.7"
+    assert server_module.client_ip(request(None)) == "10.0.0.5"
+
+    monkeypatch.setattr(server_module, "TRUSTED_PROXY_HOPS", 2)
+    assert server_module.client_ip(request("1.1.1.1, 203.0.113.7, 10.0.0.2")) == "203.0.113.7"
+    assert server_module.client_ip(request("203.0.113.7")) == "10.0.0.5"
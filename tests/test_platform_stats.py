@@ -0,0 +1,74 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import httpx
+
+from platform_stats import PlatformStatsSnapshot, compute_platform_stats, month_bounds
+
+ADMIN_EMAIL = "root@example.com"
+
+
+def test_month_bounds_rolls_over_year():
+    assert month_bounds(date(2030, 1, 17)) == ("2030-01-01", "2030-02-01")
+    assert month_bounds(date(2030, 12, 31)) == ("2030-12-01", "2031-01-01")
+
+
+def test_monthly_revenue_counts_every_completed_appointment(make_db):
+    async def run():
+        db = make_db()
+        now = datetime(2030, 3, 15, 12, 0, tzinfo=timezone.utc)
+        docs = [
+            {"id": f"ap{n}", "appointment_date": f"2030-03-{n % 28 + 1:02d}", "status": "completed", "price": 10}
+            for n in range(10050)
+        ]
+        docs += [
+            {"id": "other-month", "appointment_date": "2030-04-01", "status": "completed", "price": 999},
+            {"id": "pending", "appointment_date": "2030-03-15", "status": "pending", "price": 999},
+        ]
+        await db.appointments.insert_many(docs)
+        await db.businesses.insert_many([
+            {"id": "b1", "is_active": True}, {"id": "b2", "is_active": False}
+        ])
+
+        stats = await compute_platform_stats(db, now)
+        assert stats["monthly_revenue"] == 100500.0
+        assert stats["total_appointments"] == 10052
+        assert stats["today_appointments"] == len([d for d in docs if d["appointment_date"] == "2030-03-15"])
+        assert (stats["total_businesses"], stats["active_businesses"], stats["inactive_businesses"]) == (2, 1, 1)
+        assert stats["computed_at"] == now
+
+    asyncio.run(run())
+
+
+def test_stats_endpoint_serves_snapshot_until_refresh(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "SUPER_ADMIN_EMAIL", ADMIN_EMAIL)
+        monkeypatch.setattr(server_module, "platform_stats", PlatformStatsSnapshot(interval=3600))
+        server_module.principal_cache.clear()
+        await db.users.insert_one({"id": "root", "email": ADMIN_EMAIL})
+        await db.businesses.insert_one({"id": "b1", "is_active": True})
+        headers = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'root'})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = (await client.get("/api/superadmin/stats", headers=headers)).json()
+            assert first["total_businesses"] == 1
+            assert first["computed_at"]
+
+            await db.businesses.insert_one({"id": "b2", "is_active": False})
+            cached = (await client.get("/api/superadmin/stats", headers=headers)).json()
+            assert cached == first
+
+            refreshed = (await client.get("/api/superadmin/stats", headers=headers, params={"refresh": "true"})).json()
+            assert (refreshed["total_businesses"], refreshed["inactive_businesses"]) == (2, 1)
+            assert refreshed["computed_at"] >= first["computed_at"]
+
+        # Snapshot kalıcı: yeni bir süreç hesaplamadan son değeri okur
+        restarted = PlatformStatsSnapshot(interval=3600)
+        loaded = await restarted.load(db)
+        assert loaded["total_businesses"] == 2
+        assert restarted.age_seconds() < 60
+
+    asyncio.run(run())
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from profiling import RequestProfiler, categorize
+
+ADMIN_EMAIL = "root@example.com"
+BUSINESS_ID = "profile-business"
+
+
+def test_categories_and_single_active_profile():
+    assert categorize("~", "<built-in method fromisoformat>") == "datetime_parse"
+    assert categorize("~", "<method 'poll' of 'select.epoll' objects>") == "io_wait"
+    assert categorize("/x/site-packages/pydantic/main.py", "__init__") == "pydantic"
+
+    async def run():
+        profiler = RequestProfiler(capacity=2)
+        async with profiler.profile("GET", "/a", "header") as outer:
+            async with profiler.profile("GET", "/b", "sample") as inner:
+                assert inner is None
+            sorted(datetime.fromisoformat("2030-01-01") for _ in range(10))
+        assert outer and profiler.skipped == 1
+        for route in ("/c", "/d"):
+            async with profiler.profile("GET", route, "sample"):
+                pass
+        # Halka tampon: en eski profil düşer
+        assert [p["route"] for p in profiler.list()] == ["/d", "/c"]
+        assert profiler.get(outer) is None
+
+    asyncio.run(run())
+
+
+def test_admin_header_and_sampling_capture_profiles(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "SUPER_ADMIN_EMAIL", ADMIN_EMAIL)
+        server_module.principal_cache.clear()
+        server_module.request_profiler.clear()
+        await db.users.insert_many([{"id": "root", "email": ADMIN_EMAIL}, {"id": "owner", "email": "owner@example.com"}])
+        await db.businesses.insert_one({
+            "id": BUSINESS_ID, "name": "Profil", "slug": "profil", "is_active": True,
+            "subscription_expires": datetime.now(timezone.utc) + timedelta(days=30)
+        })
+        await db.services.insert_one({"id": "s1", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 100.0})
+        admin = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'root'})}"}
+        owner = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'owner'})}"}
+        booking = {"customer_name": "Müşteri", "customer_phone": "0555", "service_id": "s1",
+                   "appointment_date": "2030-01-07", "time_slot": "10:00"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/appointments/{BUSINESS_ID}"
+            created = await client.post(url, json=booking, headers={**admin, "X-Profile": "1"})
+            assert created.status_code == 200
+            profile_id = created.headers["X-Profile-Id"]
+
+            # Süper admin olmayan başlık yok sayılır
+            other = await client.post(url, json={**booking, "time_slot": "11:00"}, headers={**owner, "X-Profile": "1"})
+            assert other.status_code == 200 and "X-Profile-Id" not in other.headers
+
+            monkeypatch.setattr(server_module.request_profiler, "sample_rate", 1.0)
+            report = await client.get(f"/api/reports/overview/{BUSINESS_ID}")
+            assert "X-Profile-Id" in report.headers
+
+            listing = (await client.get("/api/superadmin/profiles", headers=admin)).json()
+            assert [(p["route"], p["trigger"]) for p in listing["profiles"]] == [
+                ("/api/reports/overview/{business_id}", "sample"),
+                ("/api/appointments/{business_id}", "header"),
+            ]
+            assert "functions" not in listing["profiles"][0]
+
+            detail = (await client.get(f"/api/superadmin/profiles/{profile_id}", headers=admin)).json()
+            assert detail["wall_ms"] > 0 and detail["functions"]
+            assert "pydantic" in detail["categories"]
+            assert any(row["function"] == "create_appointment" for row in detail["functions"])
+
+            assert (await client.get(f"/api/superadmin/profiles/{profile_id}", headers=owner)).status_code == 403
+            await client.delete("/api/superadmin/profiles", headers=admin)
+            assert (await client.get(f"/api/superadmin/profiles/{profile_id}", headers=admin)).status_code == 404
+
+    asyncio.run(run())
@@ -0,0 +1,206 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from indexes import ensure_indexes
+from recurrence import occurrence_dates, series_conflicts
+
+BUSINESS_ID = "series-business"
+
+
+def test_occurrence_dates():
+    assert occurrence_dates(date(2030, 1, 31), "monthly", count=3) == [
+        date(2030, 1, 31), date(2030, 3, 31), date(2030, 5, 31)
+    ]
+    assert occurrence_dates(date(2030, 1, 1), "biweekly", until=date(2030, 2, 12)) == [
+        date(2030, 1, 1), date(2030, 1, 15), date(2030, 1, 29), date(2030, 2, 12)
+    ]
+    with pytest.raises(ValueError):
+        occurrence_dates(date(2030, 1, 1), "weekly", until=date(2040, 1, 1))
+    with pytest.raises(ValueError):
+        occurrence_dates(date(2030, 1, 1), "weekly", until=date(2030, 2, 1), count=2)
+
+
+def test_series_conflicts_single_pass():
+    existing = [
+        {"appointment_date": "2030-01-08", "time_slot": "10:15", "duration": 30},
+        {"appointment_date": "2030-01-15", "time_slot": "10:30", "duration": 30},
+        {"appointment_date": "2030-01-22", "time_slot": "09:30", "duration": 30},
+    ]
+    days = ["2030-01-01", "2030-01-08", "2030-01-15", "2030-01-22"]
+    assert set(series_conflicts(existing, days, 600, 630)) == {"2030-01-08"}
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({
+        "id": BUSINESS_ID, "name": "Seri", "slug": "seri", "is_active": True,
+        "subscription_expires": datetime.now(timezone.utc) + timedelta(days=30)
+    })
+    await db.users.insert_many([
+        {"id": "owner", "email": "owner@example.com", "business_id": BUSINESS_ID},
+        {"id": "other", "email": "other@example.com", "business_id": "someone-else"},
+    ])
+    await db.services.insert_one({"id": "s30", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 100.0})
+    await db.staff.insert_one({"id": "st1", "business_id": BUSINESS_ID, "name": "Ayşe"})
+
+
+def test_series_lifecycle(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        server_module.principal_cache.clear()
+        await seed(db)
+
+        def auth(user_id):
+            return {"Authorization": f"Bearer {server_module.create_access_token({'sub': user_id})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            owner = auth("owner")
+            # Üçüncü haftada personelin başka randevusu var
+            taken = await client.post(f"/api/appointments/{BUSINESS_ID}", json={
+                "customer_name": "Başka", "customer_phone": "0500", "service_id": "s30",
+                "staff_id": "st1", "appointment_date": "2030-01-15", "time_slot": "10:15"
+            })
+            assert taken.status_code == 200
+
+            url = f"/api/appointments/{BUSINESS_ID}/series"
+            body = {
+                "customer_name": "Düzenli", "customer_phone": "0555", "service_id": "s30", "staff_id": "st1",
+                "appointment_date": "2030-01-01", "time_slot": "10:00",
+                "recurrence": {"frequency": "weekly", "count": 4}
+            }
+            assert (await client.post(url, json=body, headers=auth("other"))).status_code == 403
+            bad = await client.post(url, json={**body, "recurrence": {"frequency": "daily", "count": 4}}, headers=owner)
+            assert bad.status_code == 400
+
+            rejected = await client.post(url, json=body, headers=owner)
+            assert rejected.status_code == 400 and "2030-01-15" in rejected.json()["detail"]
+            assert await db.appointments.count_documents({}) == 1
+            assert await db.slot_locks.count_documents({}) == 1
+
+            created = (await client.post(url, json={**body, "skip_conflicts": True}, headers=owner)).json()
+            assert created["skipped_dates"] == ["2030-01-15"]
+            assert [a["appointment_date"] for a in created["appointments"]] == ["2030-01-01", "2030-01-08", "2030-01-22"]
+            series_id = created["series"]["id"]
+            assert await db.slot_locks.count_documents({}) == 4
+            assert (await db.businesses.find_one({"id": BUSINESS_ID}))["total_appointments"] == 4
+            assert await db.notification_outbox.count_documents({"message": {"$regex": "Toplam: 3 randevu"}}) == 1
+
+            # Seri oluşumları da tek randevu gibi slotu tutar
+            clash = await client.post(f"/api/appointments/{BUSINESS_ID}", json={**body, "appointment_date": "2030-01-08"})
+            assert clash.status_code == 400
+
+            # Tek oluşumu aynı gün içinde kaydır (istisna)
+            second = created["appointments"][1]["id"]
+            occurrence_url = f"{url}/{series_id}/occurrences/{second}"
+            moved = await client.patch(occurrence_url, json={"appointment_date": "2030-01-08", "time_slot": "10:15"}, headers=owner)
+            assert moved.status_code == 200
+            doc = await db.appointments.find_one({"id": second})
+            assert (doc["time_slot"], doc["start_minute"], doc["series_exception"]) == ("10:15", 615, True)
+            conflict = await client.patch(occurrence_url, json={"appointment_date": "2030-01-15", "time_slot": "10:00"}, headers=owner)
+            assert conflict.status_code == 400
+            lock = await db.slot_locks.find_one({"staff_id": "st1", "date": "2030-01-08"})
+            assert [i["start"] for i in lock["intervals"]] == [615]
+
+            # Tek oluşum iptali normal durum güncellemesiyle
+            first = created["appointments"][0]["id"]
+            await client.patch(f"/api/appointments/{first}/status", params={"status": "cancelled"}, headers=owner)
+
+            cancelled = (await client.delete(f"{url}/{series_id}", params={"from_date": "2030-01-05"}, headers=owner)).json()
+            assert cancelled == {"cancelled": 2, "errors": []}
+            detail = (await client.get(f"{url}/{series_id}", headers=owner)).json()
+            assert detail["series"]["status"] == "cancelled"
+            assert {a["status"] for a in detail["appointments"]} == {"cancelled"}
+            assert await db.slot_locks.count_documents({"intervals.0": {"$exists": True}}) == 1
+
+    asyncio.run(run())
+
+
+def test_failed_occurrence_move_keeps_old_slot_locked(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        server_module.principal_cache.clear()
+        await seed(db)
+        owner = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'owner'})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/appointments/{BUSINESS_ID}/series"
+            created = (await client.post(url, json={
+                "customer_name": "Düzenli", "customer_phone": "0555", "service_id": "s30", "staff_id": "st1",
+                "appointment_date": "2030-01-01", "time_slot": "10:00",
+                "recurrence": {"frequency": "weekly", "count": 2}
+            }, headers=owner)).json()
+            series_id = created["series"]["id"]
+            first = created["appointments"][0]["id"]
+
+            reserve_slot = server_module.reserve_slot
+
+            async def reserve_then_race(*args):
+                conflict = await reserve_slot(*args)
+                # Yeni aralık kilitlendikten sonra randevu başka istekle tamamlandı yapılır
+                await db.appointments.update_one({"id": first}, {"$set": {"status": "completed"}})
+                return conflict
+
+            monkeypatch.setattr(server_module, "reserve_slot", reserve_then_race)
+            moved = await client.patch(
+                f"{url}/{series_id}/occurrences/{first}",
+                json={"appointment_date": "2030-01-03", "time_slot": "11:00"}, headers=owner
+            )
+            assert moved.status_code == 409
+
+            old = await db.slot_locks.find_one({"staff_id": "st1", "date": "2030-01-01"})
+            assert [i["appointment_id"] for i in old["intervals"]] == [first]
+            new = await db.slot_locks.find_one({"staff_id": "st1", "date": "2030-01-03"})
+            assert new["intervals"] == []
+
+    asyncio.run(run())
+
+
+def test_series_without_staff_assigns_each_occurrence(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        server_module.principal_cache.clear()
+        await seed(db)
+        await db.staff.insert_one({"id": "st2", "business_id": BUSINESS_ID, "name": "Burak"})
+        owner = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'owner'})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # İkinci hafta Ayşe, üçüncü hafta iki personel de dolu
+            for staff_id, day in (("st1", "2030-01-08"), ("st1", "2030-01-15"), ("st2", "2030-01-15")):
+                taken = await client.post(f"/api/appointments/{BUSINESS_ID}", json={
+                    "customer_name": "Başka", "customer_phone": "0500", "service_id": "s30",
+                    "staff_id": staff_id, "appointment_date": day, "time_slot": "10:00"
+                })
+                assert taken.status_code == 200
+
+            url = f"/api/appointments/{BUSINESS_ID}/series"
+            body = {
+                "customer_name": "Düzenli", "customer_phone": "0555", "service_id": "s30",
+                "appointment_date": "2030-01-01", "time_slot": "10:00",
+                "recurrence": {"frequency": "weekly", "count": 4}
+            }
+            rejected = await client.post(url, json=body, headers=owner)
+            assert rejected.status_code == 400 and "2030-01-15" in rejected.json()["detail"]
+            # Reddedilen serinin önceki oluşumlarına atanan kilitler bırakılır
+            assert await db.slot_locks.count_documents({"intervals.0": {"$exists": True}}) == 3
+            assert await db.appointments.count_documents({}) == 3
+
+            created = (await client.post(url, json={**body, "skip_conflicts": True}, headers=owner)).json()
+            assert created["skipped_dates"] == ["2030-01-15"]
+            occurrences = created["appointments"]
+            assert [a["appointment_date"] for a in occurrences] == ["2030-01-01", "2030-01-08", "2030-01-22"]
+            assert all(a["staff_id"] in ("st1", "st2") and a["staff_name"] for a in occurrences)
+            assert occurrences[1]["staff_id"] == "st2"
+            for a in occurrences:
+                lock = await db.slot_locks.find_one({"staff_id": a["staff_id"], "date": a["appointment_date"]})
+                assert a["id"] in [i["appointment_id"] for i in lock["intervals"]]
+
+    asyncio.run(run())
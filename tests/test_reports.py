@@ -0,0 +1,116 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from indexes import ensure_indexes
+
+BUSINESS_ID = "report-business"
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({
+        "id": BUSINESS_ID, "name": "Rapor Salon", "slug": "rapor-salon", "working_hours": {},
+        "is_active": True, "subscription_expires": "2099-01-01T00:00:00+00:00"
+    })
+    await db.services.insert_many([
+        {"id": "svc-a", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 150.0},
+        {"id": "svc-b", "business_id": BUSINESS_ID, "name": "Boya", "duration": 30, "price": 400.0},
+    ])
+    await db.staff.insert_many([
+        {"id": "st-1", "business_id": BUSINESS_ID, "name": "Ayşe", "services": [], "working_days": list(range(7))},
+        {"id": "st-2", "business_id": BUSINESS_ID, "name": "Mehmet", "services": [], "working_days": list(range(7))},
+    ])
+
+
+def expected_reports(appointments, now):
+    today = now.date().isoformat()
+    month = today[:7]
+    paid = ("confirmed", "completed")
+    today_list = [a for a in appointments if a['created_at'].isoformat()[:10] == today]
+    month_list = [a for a in appointments if a['created_at'].isoformat()[:7] == month]
+    month_revenue = sum(a['price'] for a in month_list if a['status'] in paid)
+    return {
+        "overview": {
+            "today_appointments": len(today_list),
+            "today_revenue": sum(a['price'] for a in today_list if a['status'] in paid),
+            "month_appointments": len(month_list),
+            "month_revenue": month_revenue,
+            "total_customers": len({a['customer_phone'] for a in appointments}),
+            "avg_appointment_value": round(month_revenue / len(month_list), 2) if month_list else 0,
+        },
+        "staff": {
+            sid: sum(1 for a in appointments if a.get('staff_id') == sid and a['status'] in paid)
+            for sid in ("st-1", "st-2")
+        },
+        "services": {
+            sid: sum(1 for a in appointments if a['service_id'] == sid and a['status'] in paid)
+            for sid in ("svc-a", "svc-b")
+        },
+    }
+
+
+async def fetch_reports(client):
+    overview = (await client.get(f"/api/reports/overview/{BUSINESS_ID}")).json()
+    staff = (await client.get(f"/api/reports/staff/{BUSINESS_ID}")).json()
+    services = (await client.get(f"/api/reports/services/{BUSINESS_ID}")).json()
+    return {
+        "overview": overview,
+        "staff": {s['staff_id']: s['appointment_count'] for s in staff},
+        "services": {s['service_id']: s['count'] for s in services},
+    }
+
+
+def test_rollups_match_full_scan_and_rebuild(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+        rng = random.Random(7)
+        day = (datetime.now(timezone.utc) + timedelta(days=30)).date()
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for n in range(40):
+                response = await client.post(f"/api/appointments/{BUSINESS_ID}", json={
+                    "customer_name": f"Müşteri {n}",
+                    "customer_phone": f"0555{rng.randint(0, 15):07d}",
+                    "service_id": rng.choice(["svc-a", "svc-b"]),
+                    "staff_id": rng.choice(["st-1", "st-2", None]),
+                    "appointment_date": (day + timedelta(days=n)).isoformat(),
+                    "time_slot": "10:00",
+                })
+                assert response.status_code == 200
+
+            # Geçmiş ayda oluşturulmuş eski bir randevu (bu ay sayılmamalı)
+            old = (await db.appointments.find_one({}, {"_id": 0}))
+            await db.appointments.update_one({"id": old['id']}, {"$set": {"created_at": datetime(2020, 1, 15, 10, 0, tzinfo=timezone.utc)}})
+
+            ids = [a['id'] for a in await db.appointments.find({}, {"_id": 0, "id": 1}).to_list(None)]
+            for appointment_id in rng.sample(ids, 15):
+                await server_module.update_appointment_status(
+                    appointment_id, rng.choice(["completed", "cancelled", "no_show"]), {"business_id": BUSINESS_ID}
+                )
+
+            # Oluşturma tarihi sonradan değiştiği için önce sayaçları yeniden kur
+            await server_module.rebuild_rollups(db, BUSINESS_ID)
+            appointments = await db.appointments.find({}, {"_id": 0}).to_list(None)
+            expected = expected_reports(appointments, datetime.now(timezone.utc))
+            assert await fetch_reports(client) == expected
+
+            # Artımlı güncelleme rebuild sonrası da tutarlı kalmalı
+            for appointment_id in rng.sample(ids, 10):
+                current = await db.appointments.find_one({"id": appointment_id})
+                new_status = "completed" if current['status'] != "completed" else "cancelled"
+                await server_module.update_appointment_status(appointment_id, new_status, {"business_id": BUSINESS_ID})
+
+            appointments = await db.appointments.find({}, {"_id": 0}).to_list(None)
+            expected = expected_reports(appointments, datetime.now(timezone.utc))
+            assert await fetch_reports(client) == expected
+
+            await server_module.rebuild_rollups(db, BUSINESS_ID)
+            assert await fetch_reports(client) == expected
+
+    asyncio.run(run())
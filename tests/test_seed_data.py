@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+from availability import busy_intervals, is_free, js_weekday
+from seed_data import PLAN_PROFILES, business_profile, finalize, plan_scale, seed_businesses
+
+NOW = datetime(2030, 6, 15, 12, 0, tzinfo=timezone.utc)
+START = date(2030, 6, 1)
+END = date(2030, 6, 28)
+KWARGS = {"seed": 7, "scale": 1.0, "start": START, "end": END, "now": NOW, "password_hash": "hash", "batch_size": 200}
+
+
+async def dump(db):
+    return {
+        name: await db[name].find({}, {"_id": 0}).sort("id", 1).to_list(None)
+        for name in ("businesses", "users", "services", "staff", "appointments")
+    }
+
+
+def test_seed_is_deterministic_regardless_of_worker_split(make_db):
+    async def run():
+        whole, split = make_db(), make_db()
+        written = await seed_businesses(whole, list(range(6)), **KWARGS)
+        # İki işçinin dilimleri gibi, farklı sırayla
+        await seed_businesses(split, [5, 3, 1], **KWARGS)
+        await seed_businesses(split, [4, 2, 0], **KWARGS)
+        assert await dump(whole) == await dump(split)
+        assert written["businesses"] == 6 and written["appointments"] > 200
+
+    asyncio.run(run())
+
+
+def test_seeded_data_is_consistent(make_db):
+    async def run():
+        db = make_db()
+        await seed_businesses(db, list(range(8)), **KWARGS)
+        businesses = await db.businesses.find({}, {"_id": 0}).to_list(None)
+        for business in businesses:
+            limits = PLAN_PROFILES[business["subscription_plan"]]
+            staff = await db.staff.find({"business_id": business["id"]}, {"_id": 0}).to_list(None)
+            services = await db.services.find({"business_id": business["id"]}, {"_id": 0}).to_list(None)
+            appointments = await db.appointments.find({"business_id": business["id"]}, {"_id": 0}).to_list(None)
+            assert limits["staff"][0] <= len(staff) == business["total_staff"] <= limits["staff"][1]
+            assert limits["services"][0] <= len(services) == business["total_services"] <= limits["services"][1]
+            assert len(appointments) == business["total_appointments"]
+            assert await db.users.count_documents({"business_id": business["id"], "email": business["owner_email"]}) == 1
+
+            working_days = {member["id"]: member["working_days"] for member in staff}
+            booked = {}
+            for appointment in appointments:
+                day = date.fromisoformat(appointment["appointment_date"])
+                assert js_weekday(day) in working_days[appointment["staff_id"]]
+                assert appointment["end_minute"] - appointment["start_minute"] == appointment["duration"]
+                assert appointment["created_at"] <= datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+                if day < NOW.date():
+                    assert appointment["status"] in ("completed", "cancelled", "no-show", "confirmed")
+                else:
+                    assert appointment["status"] in ("confirmed", "pending", "cancelled")
+                # Aynı personelin randevuları çakışmaz
+                key = (appointment["staff_id"], appointment["appointment_date"])
+                interval = (appointment["start_minute"], appointment["end_minute"])
+                assert is_free(busy_intervals(booked.get(key, [])), *interval)
+                booked.setdefault(key, []).append(appointment)
+
+    asyncio.run(run())
+
+
+def test_finalize_builds_indexes_and_derived_data(make_db):
+    async def run():
+        db = make_db()
+        await seed_businesses(db, [0, 1], **{**KWARGS, "start": date(2030, 6, 12), "end": date(2030, 6, 18)})
+        await finalize(db, True, NOW.date())
+        assert "id_1" in await db.appointments.index_information()
+        assert await db.report_rollups.count_documents({}) > 0
+        future = await db.appointments.count_documents({
+            "appointment_date": {"$gte": NOW.date().isoformat()}, "status": {"$ne": "cancelled"}
+        })
+        locks = await db.slot_locks.find({}, {"_id": 0, "intervals": 1}).to_list(None)
+        assert future > 0 and sum(len(lock["intervals"]) for lock in locks) == future
+
+    asyncio.run(run())
+
+
+def test_plan_scale_hits_target(make_db):
+    async def run():
+        total_days = (END - START).days + 1
+        scale = plan_scale(7, 20, total_days, 3000)
+        db = make_db()
+        written = await seed_businesses(db, list(range(20)), **{**KWARGS, "scale": scale})
+        assert 2500 <= written["appointments"] <= 3500
+        assert {business_profile(7, i)["plan"] for i in range(20)} <= set(PLAN_PROFILES)
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import httpx
+
+from serialization import DocumentShaper, _default, dumps, model_projection
+
+BUSINESS_ID = "fast-business"
+CREATED = datetime(2030, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+
+
+def appointment(n):
+    return {
+        "id": f"a{n}", "business_id": BUSINESS_ID, "customer_name": "Çağla", "customer_phone": "0555",
+        "service_id": "s1", "service_name": "Kesim", "staff_id": "st1", "staff_name": "Ayşe",
+        "appointment_date": "2030-01-07", "time_slot": f"{9 + n:02d}:00", "duration": 30, "price": 150.5,
+        "status": "confirmed", "notes": None, "start_minute": (9 + n) * 60, "end_minute": (9 + n) * 60 + 30,
+        "series_id": None, "series_exception": False, "created_at": CREATED,
+    }
+
+
+def test_fast_path_matches_model_json(server_module):
+    doc = appointment(0)
+    expected = json.loads(server_module.Appointment(**doc).model_dump_json())
+    assert json.loads(dumps(DocumentShaper(server_module.Appointment)(dict(doc)))) == expected
+    # orjson yoksa kullanılan yol da aynı biçimi üretir
+    assert json.loads(json.dumps(doc, default=_default)) == expected
+    assert expected["created_at"] == "2030-01-02T03:04:05.678000Z"
+
+    # Eski kayıt: eksik alanlar modelin varsayılanlarıyla doldurulur
+    legacy = {"id": "st1", "business_id": BUSINESS_ID, "name": "Ayşe", "created_at": CREATED}
+    shaped = DocumentShaper(server_module.Staff)(dict(legacy))
+    assert shaped["services"] == [] and shaped["working_days"] == [1, 2, 3, 4, 5] and shaped["phone"] is None
+    assert set(model_projection(server_module.Staff)) == {"_id", *server_module.Staff.model_fields}
+
+
+def test_list_endpoints_return_projected_rows(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await server_module.public_cache.backend.clear()
+        await db.appointments.insert_many([{**appointment(n), "internal": "gizli"} for n in range(3)])
+        await db.staff.insert_one({"id": "st1", "business_id": BUSINESS_ID, "name": "Ayşe", "created_at": CREATED})
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            page = await client.get(f"/api/appointments/{BUSINESS_ID}", params={"limit": 2, "order": "asc"})
+            assert page.headers["content-type"] == "application/json"
+            body = page.json()
+            assert [a["id"] for a in body["appointments"]] == ["a0", "a1"] and body["next_cursor"]
+            assert body["appointments"][0] == json.loads(server_module.Appointment(**appointment(0)).model_dump_json())
+
+            staff = (await client.get(f"/api/staff/{BUSINESS_ID}")).json()
+            assert staff == [json.loads(server_module.Staff(**{
+                "id": "st1", "business_id": BUSINESS_ID, "name": "Ayşe", "created_at": CREATED
+            }).model_dump_json())]
+
+    asyncio.run(run())
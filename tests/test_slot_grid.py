@@ -0,0 +1,174 @@
+import asyncio
+import random
+from datetime import date
+
+import slot_locks
+from availability import availability_by_staff, compute_availability, date_range, minutes_to_time
+from indexes import ensure_indexes
+from slot_grid import (
+    CELLS_PER_DAY,
+    WORD_MASK,
+    cell_span,
+    from_words,
+    grid_availability,
+    grid_days,
+    interval_mask,
+    is_free,
+    to_words,
+)
+from slot_locks import (
+    COLLECTION,
+    load_grids,
+    lock_appointments,
+    rebuild_slot_locks,
+    release_appointments,
+    release_slot,
+    reserve_slot,
+)
+
+BUSINESS_ID = "grid-business"
+DAY = "2030-01-07"  # Pazartesi
+
+
+async def assert_cells_match(db):
+    """Her dokümanın bitmap'i aralıklarının maskelerinin birleşimine eşit olmalı"""
+    async for lock in db[COLLECTION].find({}, {"_id": 0}):
+        expected = 0
+        for interval in lock['intervals']:
+            expected |= interval_mask(interval['start'], interval['end'])
+        assert from_words(lock.get('cells')) == expected, lock
+
+
+def test_bitmap_helpers():
+    assert cell_span(600, 607) == (120, 122)
+    assert cell_span(0, 24 * 60) == (0, CELLS_PER_DAY)
+    assert interval_mask(600, 630) == 0b111111 << 120
+
+    full = interval_mask(0, 24 * 60)
+    words = to_words(full)
+    assert len(words) == 6 and all(word == WORD_MASK for word in words.values())
+    assert to_words(interval_mask(600, 630)) == {"2": 0b111111 << 24}
+    assert from_words(to_words(full)) == full and from_words(None) == 0
+
+    grid = interval_mask(600, 607)
+    assert not is_free(grid, 605, 615) and is_free(grid, 610, 640) and is_free(grid, 540, 600)
+
+
+def test_reserve_and_release_keep_cells_in_sync(make_db):
+    async def run():
+        db = make_db()
+        await ensure_indexes(db)
+
+        assert await reserve_slot(db, BUSINESS_ID, "st", DAY, "a1", "10:00", 7) is None
+        # 10:07 aynı 5 dakikalık hücreye düşer: hücre biriminde çakışma
+        conflict = await reserve_slot(db, BUSINESS_ID, "st", DAY, "a2", "10:07", 30)
+        assert conflict['appointment_id'] == "a1"
+        assert await reserve_slot(db, BUSINESS_ID, "st", DAY, "a2", "10:10", 30) is None
+        assert await reserve_slot(db, BUSINESS_ID, "st", DAY, "a3", "14:00", 60) is None
+        await assert_cells_match(db)
+
+        await release_slot(db, "st", DAY, "a2", 610, 640)
+        await assert_cells_match(db)
+        # Aralık verilmezse bitmap aralıklardan yeniden hesaplanır
+        await release_slot(db, "st", DAY, "a3")
+        await assert_cells_match(db)
+
+        grids = await load_grids(db, BUSINESS_ID, DAY, DAY)
+        assert grids == {("st", DAY): interval_mask(600, 607)}
+
+        await release_appointments(db, [
+            {"id": "a1", "staff_id": "st", "appointment_date": DAY, "time_slot": "10:00", "duration": 7}
+        ])
+        assert await load_grids(db, BUSINESS_ID, DAY, DAY) == {("st", DAY): 0}
+
+    asyncio.run(run())
+
+
+def test_rebuild_upgrades_legacy_locks(make_db):
+    async def run():
+        db = make_db()
+        await ensure_indexes(db)
+        # Bitmap'ten önceki biçim: hücre alanları ve cells yok
+        await db[COLLECTION].insert_one({
+            "staff_id": "st", "date": DAY, "business_id": BUSINESS_ID,
+            "intervals": [{"appointment_id": "a1", "start": 600, "end": 630, "time_slot": "10:00", "duration": 30}]
+        })
+        await db.appointments.insert_many([
+            {"id": "a1", "business_id": BUSINESS_ID, "staff_id": "st", "appointment_date": DAY,
+             "time_slot": "10:00", "duration": 30, "status": "confirmed"},
+            {"id": "a2", "business_id": BUSINESS_ID, "staff_id": "st", "appointment_date": DAY,
+             "time_slot": "10:15", "duration": 30, "status": "confirmed"},
+        ])
+        await rebuild_slot_locks(db)
+
+        lock = await db[COLLECTION].find_one({"staff_id": "st", "date": DAY}, {"_id": 0})
+        assert [i['appointment_id'] for i in lock['intervals']] == ["a1", "a2"]
+        assert all("cell_start" in i for i in lock['intervals'])
+        # İçe aktarılan kayıtlar çakışabilir; bırakma bitmap'i yeniden hesaplamalı
+        assert lock['overlapping'] is True
+        await assert_cells_match(db)
+
+        await release_slot(db, "st", DAY, "a2", 615, 645)
+        lock = await db[COLLECTION].find_one({"staff_id": "st", "date": DAY}, {"_id": 0})
+        assert from_words(lock['cells']) == interval_mask(600, 630) and lock['overlapping'] is False
+
+    asyncio.run(run())
+
+
+def test_grid_availability_matches_interval_scan(make_db):
+    async def run():
+        db = make_db()
+        rng = random.Random(25)
+        business = {"id": BUSINESS_ID, "working_hours": {"0": None, "6": {"open": "10:00", "close": "16:00"}}}
+        staff_list = [
+            {"id": "st-1", "services": [], "working_days": [1, 2, 3, 4, 5]},
+            {"id": "st-2", "services": ["svc"], "working_days": [1, 3, 6]},
+            {"id": "st-3", "services": ["diger"], "working_days": [0, 1, 2, 3, 4, 5, 6]},
+        ]
+        days = date_range(date(2030, 1, 7), date(2030, 1, 13))
+        appointments = []
+        for staff in staff_list:
+            for day in days:
+                start = 9 * 60
+                while start < 18 * 60:
+                    start += rng.choice((0, 5, 15, 30, 45))
+                    duration = rng.choice((15, 20, 30, 45, 60, 90))
+                    appointments.append({
+                        "id": f"a{len(appointments)}", "business_id": BUSINESS_ID, "staff_id": staff['id'],
+                        "appointment_date": day.isoformat(), "time_slot": minutes_to_time(start), "duration": duration,
+                    })
+                    start += duration
+        await lock_appointments(db, appointments)
+        grids = await load_grids(db, BUSINESS_ID, days[0].isoformat(), days[-1].isoformat())
+
+        for duration, service_id in ((30, None), (45, "svc"), (90, None)):
+            assert grid_availability(business, staff_list, grids, days, duration, service_id) == availability_by_staff(
+                business, staff_list, appointments, days, duration, service_id
+            )
+            assert grid_days(business, staff_list, grids, days, duration, service_id) == compute_availability(
+                business, staff_list, appointments, days, duration, service_id
+            )
+        assert grid_days(business, [], {}, days, 30) == compute_availability(business, [], [], days, 30)
+
+    asyncio.run(run())
+
+
+def test_rebuild_reads_appointments_in_batches(make_db, monkeypatch):
+    async def run():
+        db = make_db()
+        await ensure_indexes(db)
+        monkeypatch.setattr(slot_locks, "WRITE_CHUNK", 2)
+        await db.appointments.insert_many([
+            {"id": f"{day}-{n}", "business_id": BUSINESS_ID, "staff_id": f"st-{n % 2}", "appointment_date": day,
+             "time_slot": minutes_to_time(600 + 30 * n), "duration": 30, "status": "confirmed"}
+            for n in range(5)
+            for day in ("2030-01-06", DAY)
+        ])
+
+        assert await rebuild_slot_locks(db, since_date=DAY) == 2
+        assert await db[COLLECTION].count_documents({}) == 2
+        lock = await db[COLLECTION].find_one({"staff_id": "st-0", "date": DAY}, {"_id": 0})
+        assert len(lock['intervals']) == 3
+        await assert_cells_match(db)
+
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+
+from assignment import eligible_candidates, least_loaded, round_robin
+from indexes import ensure_indexes
+
+BUSINESS_ID = "assign-business"
+DAY = "2030-01-07"  # Pazartesi
+
+
+def test_candidates_filter_service_weekday_and_overlap():
+    staff = [
+        {"id": "a", "services": ["s1"], "working_days": [1]},
+        {"id": "b", "services": ["s2"], "working_days": [1]},      # hizmeti vermiyor
+        {"id": "c", "services": [], "working_days": [2, 3]},       # pazartesi çalışmıyor
+        {"id": "d", "working_days": [1]},                          # tüm hizmetler
+        {"id": "e", "services": ["s1"], "working_days": [1]},      # dolu
+    ]
+    appointments = [
+        {"staff_id": "e", "time_slot": "09:45", "duration": 30},
+        {"staff_id": "d", "time_slot": "11:00", "duration": 60},
+        {"staff_id": "d", "time_slot": "14:00", "duration": 30},
+        {"staff_id": None, "time_slot": "10:00", "duration": 30},
+    ]
+    candidates = eligible_candidates(staff, appointments, date(2030, 1, 7), 600, 630, "s1")
+    assert [c["staff"]["id"] for c in candidates] == ["a", "d"]
+    assert candidates[1]["booked_minutes"] == 90
+
+    assert [c["staff"]["id"] for c in least_loaded(candidates, 0)] == ["a", "d"]
+    assert [c["staff"]["id"] for c in round_robin(candidates, 1)] == ["d", "a"]
+
+
+async def seed(db):
+    await ensure_indexes(db)
+    await db.businesses.insert_one({
+        "id": BUSINESS_ID, "name": "Atama", "slug": "atama", "is_active": True,
+        "subscription_expires": datetime.now(timezone.utc) + timedelta(days=30)
+    })
+    await db.services.insert_one({"id": "s30", "business_id": BUSINESS_ID, "name": "Kesim", "duration": 30, "price": 100.0})
+    await db.staff.insert_many([
+        {"id": "st1", "business_id": BUSINESS_ID, "name": "Ayşe", "services": ["s30"], "working_days": [1, 2]},
+        {"id": "st2", "business_id": BUSINESS_ID, "name": "Mehmet", "services": [], "working_days": [1], "phone": "05321112233"},
+        {"id": "st3", "business_id": BUSINESS_ID, "name": "Zeynep", "services": ["s30"], "working_days": [3]},
+    ])
+
+
+def booking(time_slot):
+    return {"customer_name": "Müşteri", "customer_phone": "0555", "service_id": "s30",
+            "appointment_date": DAY, "time_slot": time_slot}
+
+
+def test_unassigned_bookings_get_a_free_staff_member(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        await seed(db)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/api/appointments/{BUSINESS_ID}"
+            first = (await client.post(url, json=booking("10:00"))).json()
+            second = (await client.post(url, json=booking("10:15"))).json()
+            assert {first["staff_id"], second["staff_id"]} == {"st1", "st2"}
+            assert second["staff_name"] in ("Ayşe", "Mehmet")
+
+            # İki uygun personel de dolu; pazartesi çalışmayan st3 atanmaz
+            full = await client.post(url, json=booking("10:00"))
+            assert full.status_code == 400
+
+            # En az yüklü politika: 11:00'de boş olan ikisinden yükü az olan seçilir
+            await client.post(url, json={**booking("14:00"), "staff_id": "st1"})
+            third = (await client.post(url, json=booking("11:00"))).json()
+            assert third["staff_id"] == "st2"
+
+        locks = await db.slot_locks.find({"date": DAY}, {"_id": 0}).to_list(None)
+        assert sum(len(lock["intervals"]) for lock in locks) == 4
+        assert await db.notification_outbox.count_documents({"kind": "staff", "phone": "905321112233"}) >= 1
+
+    asyncio.run(run())
+
+
+def test_round_robin_policy_rotates(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "STAFF_ASSIGNMENT_POLICY", "round_robin")
+        await seed(db)
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assigned = [
+                (await client.post(f"/api/appointments/{BUSINESS_ID}", json=booking(f"{hour:02d}:00"))).json()["staff_id"]
+                for hour in (9, 10, 11, 12)
+            ]
+        assert assigned in (["st1", "st2", "st1", "st2"], ["st2", "st1", "st2", "st1"])
+
+    asyncio.run(run())
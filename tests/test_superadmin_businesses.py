@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+import httpx
+
+from indexes import ensure_indexes
+
+ADMIN_EMAIL = "root@example.com"
+
+
+async def seed(db, count=30):
+    await ensure_indexes(db)
+    rng = random.Random(11)
+    expected = {}
+    for n in range(count):
+        business_id = f"biz-{n:03d}"
+        counts = {"staff_count": rng.randint(0, 4), "service_count": rng.randint(0, 5), "appointment_count": rng.randint(0, 20)}
+        expected[business_id] = counts
+        await db.businesses.insert_one({
+            "id": business_id, "name": f"{'Kuaför' if n % 3 == 0 else 'Berber'} {n:03d}", "slug": f"isletme-{n}",
+            "owner_email": f"owner{n}@example.com", "created_at": f"2024-01-{n % 28 + 1:02d}T10:00:00+00:00",
+            "subscription_plan": "baslangic", "subscription_expires": "2099-01-01T00:00:00+00:00", "is_active": True
+        })
+        for collection, field, prefix in (("staff", "staff_count", "st"), ("services", "service_count", "sv"), ("appointments", "appointment_count", "ap")):
+            docs = [{"id": f"{business_id}-{prefix}{i}", "business_id": business_id} for i in range(counts[field])]
+            if docs:
+                await db[collection].insert_many(docs)
+    await db.users.insert_one({"id": "root", "email": ADMIN_EMAIL})
+    return expected
+
+
+async def fetch_all(client, headers, **params):
+    rows, page = [], 1
+    while True:
+        response = await client.get("/api/superadmin/businesses", headers=headers, params=dict(params, page=page, limit=7))
+        assert response.status_code == 200
+        body = response.json()
+        rows.extend(body["businesses"])
+        if page * 7 >= body["total"]:
+            return rows, body["total"]
+        page += 1
+
+
+def test_business_list_counts_sorting_paging_and_search(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "SUPER_ADMIN_EMAIL", ADMIN_EMAIL)
+        server_module.principal_cache.clear()
+        expected = await seed(db)
+        headers = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'root'})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            rows, total = await fetch_all(client, headers)
+            assert total == len(expected) == len(rows)
+            for row in rows:
+                assert {k: row[k] for k in expected[row["id"]]} == expected[row["id"]]
+            created = [row["created_at"] for row in rows]
+            assert created == sorted(created, reverse=True)
+
+            rows, _ = await fetch_all(client, headers, sort="appointment_count", order="desc")
+            assert [row["id"] for row in rows] == sorted(
+                expected, key=lambda b: (-expected[b]["appointment_count"], b)
+            )
+
+            rows, total = await fetch_all(client, headers, search="kuaför", sort="name", order="asc")
+            assert total == 10
+            assert [row["name"] for row in rows] == sorted(row["name"] for row in rows)
+            assert all(row["name"].startswith("Kuaför") for row in rows)
+
+            rows, total = await fetch_all(client, headers, search="kuaför", sort="staff_count", order="asc")
+            assert total == 10
+            assert [row["staff_count"] for row in rows] == sorted(row["staff_count"] for row in rows)
+
+            rows, total = await fetch_all(client, headers, search="owner7@")
+            assert [row["id"] for row in rows] == ["biz-007"]
+
+            bad = await client.get("/api/superadmin/businesses", headers=headers, params={"sort": "password"})
+            assert bad.status_code == 400
+
+    asyncio.run(run())
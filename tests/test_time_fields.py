@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from availability import busy_intervals
+from timefields import MIGRATION_ID, MIGRATIONS, TIME_FIELDS, as_utc, migrate_time_fields
+
+ADMIN_EMAIL = "root@example.com"
+
+
+async def seed_legacy(db):
+    """Dönüşümden önceki gibi ISO string tarihli kayıtlar"""
+    await db.users.insert_many([
+        {"id": f"u{n}", "email": f"user{n}@example.com", "created_at": "2024-01-05T10:00:00+03:00",
+         "last_login": "2024-02-01T08:30:00+00:00" if n % 2 else None}
+        for n in range(5)
+    ] + [{"id": "root", "email": ADMIN_EMAIL, "created_at": "2024-01-01T00:00:00+00:00"}])
+    await db.businesses.insert_many([
+        {"id": "b-live", "name": "Açık", "slug": "acik", "is_active": True, "subscription_plan": "baslangic",
+         "created_at": "2024-01-01T00:00:00+00:00", "subscription_expires": "2099-01-01T00:00:00+00:00"},
+        {"id": "b-expired", "name": "Bitmiş", "slug": "bitmis", "is_active": True, "subscription_plan": "baslangic",
+         "created_at": "2024-01-01T00:00:00+00:00", "subscription_expires": "2020-01-01T00:00:00+00:00"},
+    ])
+    await db.appointments.insert_many([
+        {"id": f"ap{n}", "business_id": "b-live", "appointment_date": "2030-01-01",
+         "time_slot": f"{9 + n}:30", "duration": 45, "status": "confirmed",
+         "created_at": "2024-03-01T12:00:00+00:00"}
+        for n in range(7)
+    ])
+    await db.logs.insert_one({"id": "l1", "timestamp": "2024-03-01T12:00:00+00:00", "type": "info"})
+
+
+def test_as_utc_normalizes_offsets():
+    assert as_utc("2024-01-05T10:00:00+03:00") == datetime(2024, 1, 5, 7, 0, tzinfo=timezone.utc)
+    assert as_utc(datetime(2024, 1, 5, 7, 0)) == datetime(2024, 1, 5, 7, 0, tzinfo=timezone.utc)
+    assert as_utc(None) is None
+
+
+def test_busy_intervals_prefer_stored_minutes():
+    assert busy_intervals([
+        {"time_slot": "10:00", "duration": 30, "start_minute": 600, "end_minute": 630},
+        {"time_slot": "10:15", "duration": 30},
+    ]) == [(600, 645)]
+
+
+def test_migration_is_batched_resumable_and_idempotent(make_db):
+    async def run():
+        db = make_db()
+        await seed_legacy(db)
+
+        first = await migrate_time_fields(db, batch_size=2, max_batches=3)
+        assert not first["complete"]
+
+        # Dönüşüm sürerken yeni değer yazılırsa ezilmemeli
+        fresh = datetime(2031, 5, 5, 5, 5, tzinfo=timezone.utc)
+        await db.appointments.update_one({"id": "ap6"}, {"$set": {"created_at": fresh}})
+
+        rounds = 1
+        while not (await migrate_time_fields(db, batch_size=2, max_batches=3))["complete"]:
+            rounds += 1
+            assert rounds < 50
+        assert rounds > 1
+
+        for collection, fields in TIME_FIELDS.items():
+            async for doc in db[collection].find({}):
+                for field in fields:
+                    assert not isinstance(doc.get(field), str), (collection, field)
+        user = await db.users.find_one({"id": "u0"})
+        assert user["created_at"] == datetime(2024, 1, 5, 7, 0, tzinfo=timezone.utc)
+        assert user["last_login"] is None
+        apt = await db.appointments.find_one({"id": "ap1"})
+        assert (apt["start_minute"], apt["end_minute"]) == (630, 675)
+        assert (await db.appointments.find_one({"id": "ap6"}))["created_at"] == fresh
+
+        state = await db[MIGRATIONS].find_one({"_id": MIGRATION_ID})
+        assert state["collections"]["appointments"]["scanned"] == 7
+        again = await migrate_time_fields(db, batch_size=2)
+        assert again["complete"]
+        assert again["collections"]["appointments"]["updated"] == state["collections"]["appointments"]["updated"]
+
+    asyncio.run(run())
+
+
+def test_endpoints_handle_legacy_and_native_values(make_db, server_module, monkeypatch):
+    async def run():
+        db = make_db()
+        monkeypatch.setattr(server_module, "db", db)
+        monkeypatch.setattr(server_module, "SUPER_ADMIN_EMAIL", ADMIN_EMAIL)
+        server_module.principal_cache.clear()
+        await seed_legacy(db)
+        now = datetime.now(timezone.utc)
+        await db.businesses.insert_one({
+            "id": "b-native", "name": "Yeni", "slug": "yeni", "is_active": True,
+            "created_at": now, "subscription_expires": now + timedelta(days=30)
+        })
+        headers = {"Authorization": f"Bearer {server_module.create_access_token({'sub': 'root'})}"}
+
+        transport = httpx.ASGITransport(app=server_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            listed = (await client.get("/api/businesses")).json()
+            assert sorted(b["id"] for b in listed) == ["b-live", "b-native"]
+
+            response = await client.post(
+                "/api/superadmin/migrate", headers=headers, params={"batch_size": 3, "max_batches": 100}
+            )
+            assert response.status_code == 200
+            assert response.json()["time_fields"]["complete"]
+
+            listed = (await client.get("/api/businesses")).json()
+            assert sorted(b["id"] for b in listed) == ["b-live", "b-native"]
+
+            details = (await client.get("/api/superadmin/businesses", headers=headers)).json()
+            remaining = {b["id"]: b["days_remaining"] for b in details["businesses"]}
+            assert remaining["b-expired"] < 0 < remaining["b-live"]
+
+    asyncio.run(run())